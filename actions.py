@@ -0,0 +1,163 @@
+"""
+actions.py
+==========
+
+Verb dispatch for Kama Sona agents.  Each verb that an agent can act
+on is registered once with a :class:`VerbRegistry`, which assigns it an
+integer opcode and records two handlers: one that applies the verb to
+a single :class:`agent.Agent` and, optionally, one that applies it to
+many agents of an :class:`population.AgentPopulation` at once.
+Acting then costs one dictionary lookup and one call instead of a
+chain of string comparisons, and a population can apply an array of
+opcodes with one call per distinct verb.
+
+Registering a verb also adds it to the registry's Toki Pona grammar
+(``VerbRegistry.grammar``), so sentences using it validate; pass that
+grammar to a :class:`mind.Mind` to share the lexicon.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from grammar import TokiPonaGrammar
+
+if TYPE_CHECKING:
+    from agent import Agent
+    from population import AgentPopulation
+
+# Opcode of verbs without a handler; acting on one does nothing.
+UNKNOWN = -1
+
+AgentHandler = Callable[["Agent", Sequence[str]], None]
+BatchHandler = Callable[["AgentPopulation", np.ndarray], None]
+
+
+class VerbRegistry:
+    """Maps verbs to opcodes and opcodes to handlers.
+
+    Registered verbs are added to ``grammar``, a grammar of the
+    registry's own unless one is given.
+    """
+
+    def __init__(self, grammar: Optional[TokiPonaGrammar] = None) -> None:
+        self.grammar = TokiPonaGrammar() if grammar is None else grammar
+        self.opcodes: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._handlers: List[AgentHandler] = []
+        self._batch_handlers: List[Optional[BatchHandler]] = []
+
+    def __contains__(self, verb: str) -> bool:
+        return verb in self.opcodes
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def register(self, verb: str, handler: AgentHandler,
+                 batch_handler: Optional[BatchHandler] = None) -> int:
+        """Register ``verb`` (or replace its handlers) and return its opcode.
+
+        Without a ``batch_handler`` a population applies ``handler`` to
+        an :class:`agent.Agent` view of each agent in turn.
+        """
+        opcode = self.opcodes.get(verb)
+        if opcode is None:
+            opcode = len(self.names)
+            self.opcodes[verb] = opcode
+            self.names.append(verb)
+            self._handlers.append(handler)
+            self._batch_handlers.append(batch_handler)
+        else:
+            self._handlers[opcode] = handler
+            self._batch_handlers[opcode] = batch_handler
+        self.grammar.verbs.add(verb)
+        return opcode
+
+    def opcode(self, verb: str) -> int:
+        """Return the opcode of ``verb``, or :data:`UNKNOWN`."""
+        return self.opcodes.get(verb, UNKNOWN)
+
+    def compile(self, tokens: Sequence[str]) -> int:
+        """Return the opcode for an action token sequence (its first token)."""
+        return self.opcodes.get(tokens[0], UNKNOWN) if tokens else UNKNOWN
+
+    def dispatch(self, agent: "Agent", tokens: Sequence[str], opcode: Optional[int] = None) -> None:
+        """Apply the action ``tokens`` to ``agent``.
+
+        Pass ``opcode`` if the tokens were already compiled.
+        """
+        if opcode is None:
+            opcode = self.compile(tokens)
+        if opcode != UNKNOWN:
+            self._handlers[opcode](agent, tokens)
+
+    def apply(self, population: "AgentPopulation", opcodes: np.ndarray) -> None:
+        """Apply one opcode per agent to a whole population."""
+        present = np.bincount(opcodes[opcodes >= 0], minlength=len(self.names))
+        for opcode in np.nonzero(present)[0].tolist():
+            rows = np.nonzero(opcodes == opcode)[0]
+            batch = self._batch_handlers[opcode]
+            if batch is not None:
+                batch(population, rows)
+                continue
+            handler, tokens = self._handlers[opcode], [self.names[opcode]]
+            for i in rows.tolist():
+                agent = population.agent(i)
+                population.sync_agents([i])
+                handler(agent, tokens)
+                population.pull(i, agent)
+
+
+# -- built-in verbs ----------------------------------------------------
+def _tawa(agent: "Agent", tokens: Sequence[str]) -> None:
+    # naive movement: move right by one unit per action
+    agent.x += 5
+    if not agent.env.infinite:
+        agent.x = min(agent.env.width, agent.x)
+    # wake anything the agent bumps into
+    agent.env.wake_radius(agent.x, agent.y, agent.radius)
+
+
+def _tawa_batch(population: "AgentPopulation", rows: np.ndarray) -> None:
+    x = population.x
+    x[rows] += population.step_size
+    if not population.env.infinite:
+        x[rows] = np.minimum(x[rows], population.env.width)
+    population.wake_near(rows, population.radius)
+
+
+def _lon(agent: "Agent", tokens: Sequence[str]) -> None:
+    # do nothing (stay in place)
+    pass
+
+
+def _lon_batch(population: "AgentPopulation", rows: np.ndarray) -> None:
+    pass
+
+
+def _moku(agent: "Agent", tokens: Sequence[str]) -> None:
+    # attempt to 'eat' an object; not implemented, but touching nearby
+    # objects wakes them
+    agent.env.wake_radius(agent.x, agent.y, 2 * agent.radius)
+
+
+def _moku_batch(population: "AgentPopulation", rows: np.ndarray) -> None:
+    population.wake_near(rows, 2 * population.radius)
+
+
+def default_registry() -> VerbRegistry:
+    """Return a registry with the built-in verbs ``tawa``, ``lon`` and ``moku``.
+
+    They get opcodes 0, 1 and 2, matching ``population.ACTIONS``.
+    """
+    registry = VerbRegistry()
+    registry.register("tawa", _tawa, _tawa_batch)
+    registry.register("lon", _lon, _lon_batch)
+    registry.register("moku", _moku, _moku_batch)
+    return registry
+
+
+# Registry used by agents unless they are given their own.
+verbs = default_registry()
@@ -10,69 +10,148 @@ through its mind, and applies those actions to move around the world.
 
 from __future__ import annotations
 
-from typing import List, Tuple, Optional
-import pygame
+from typing import TYPE_CHECKING, List, Tuple, Optional
 
-from environment import Environment
+import numpy as np
+
+from actions import VerbRegistry, verbs as default_verbs
+from attention import AttentionFilter
+from changes import WorldModel
+from environment import Environment, ObjectStates
 from mind import Mind
+from perception import PerceptionEncoder
+from vision import VisionSensor
+
+if TYPE_CHECKING:
+    import pygame
 
 
 class Agent:
-    """Embodied agent with a mind in a 2D environment."""
+    """Embodied agent with a mind in a 2D environment.
+
+    With ``incremental`` perception the agent keeps a
+    :class:`changes.WorldModel` of the world and perceives only what
+    changed since its last decision, instead of querying every nearby
+    object each time.  Given an ``encoder``, every perception also
+    carries a fixed-length feature vector (see perception.py); the
+    mind's memory must hold vectors of that size.  Given
+    a ``vision`` sensor, the agent perceives only the objects it can
+    see in the direction it is ``facing`` (see vision.py).  An
+    ``attention`` filter passes only the most salient objects on to the
+    mind (see attention.py).
+    """
 
-    def __init__(self, env: Environment, mind: Mind) -> None:
+    def __init__(self, env: Environment, mind: Mind, incremental: bool = False,
+                 verbs: Optional[VerbRegistry] = None,
+                 encoder: Optional[PerceptionEncoder] = None,
+                 vision: Optional[VisionSensor] = None,
+                 attention: Optional[AttentionFilter] = None) -> None:
         self.env = env
         self.mind = mind
         self.x: float = env.width / 2.0
         self.y: float = 0.0
+        # position before the last action, for interpolated rendering
+        self.prev_x: float = self.x
+        self.prev_y: float = self.y
         self.radius: int = 10
         self.color: Tuple[int, int, int] = (255, 0, 0)
+        # only objects within this distance are perceived
+        self.perception_radius: float = 200.0
+        # optional line-of-sight sensor, and the view direction in radians
+        self.vision = vision
+        self.facing: float = 0.0
+        # optional salience filter between perception and the mind
+        self.attention = attention
+        # local model of the world, patched with changes in incremental mode
+        self.world_model: Optional[WorldModel] = WorldModel() if incremental else None
         # internal state
         self._last_sentence: Optional[List[str]] = None
+        self._last_action: List[str] = []
+        # verbs the agent can act on, and the opcode of its last action
+        self.verbs = default_verbs if verbs is None else verbs
+        self._last_opcode = self.verbs.compile(self._last_action)
+        # fixed-length features, rewritten in place on every perception
+        if encoder is not None and encoder.size != mind.subconscious.memory.feature_size:
+            raise ValueError(f"encoder yields {encoder.size} features, the mind's memory "
+                             f"holds {mind.subconscious.memory.feature_size}; "
+                             "build the Mind with encoder=...")
+        self.encoder = encoder
+        self.features = None if encoder is None else np.zeros(encoder.size, dtype=np.float32)
 
     def perceive(self) -> dict:
-        """Gather perception data from the environment."""
-        objects_state = [obj.get_state() for obj in self.env.objects]
-        perception = {
-            "position": (self.x, self.y),
-            "objects": objects_state,
-            "sunlight": self.env.sunlight,
-        }
+        """Gather perception data from the environment.
+
+        In incremental mode the perception carries the agent's world
+        model under ``"world"`` and what changed since the last call
+        under ``"changes"``, rather than a list of nearby objects.  With
+        a vision sensor, ``"objects"`` holds only the visible objects,
+        nearest first, and ``"distances"`` how far away each one is.  With
+        an encoder, ``"features"`` holds the agent's feature vector; it
+        is overwritten by the next call, so copy it to keep it.
+        """
+        if self.world_model is not None:
+            changes = self.world_model.sync(self.env)
+            perception = {
+                "position": (self.x, self.y),
+                "changes": changes,
+                "world": self.world_model,
+                "sunlight": self.world_model.sunlight,
+            }
+        elif self.vision is not None:
+            rows, distances = self.vision.see(self.env, self.x, self.y, self.facing)
+            perception = {
+                "position": (self.x, self.y),
+                "objects": ObjectStates.of(self.env.objects, rows),
+                "distances": distances,
+                "sunlight": self.env.sunlight,
+            }
+        else:
+            # Object states come back as read-only arrays rather than one
+            # dict per object.
+            objects_state = self.env.query_radius_states(self.x, self.y, self.perception_radius)
+            perception = {
+                "position": (self.x, self.y),
+                "objects": objects_state,
+                "sunlight": self.env.sunlight,
+            }
+        perception["time"] = self.env.time
+        if self.encoder is not None:
+            perception["features"] = self.encoder.encode(self.env, self.x, self.y, out=self.features)
         return perception
 
-    def act(self, action_tokens: List[str]) -> None:
+    def act(self, action_tokens: List[str], opcode: Optional[int] = None) -> None:
         """Execute an action produced by the mind.
 
-        The action is represented as a list of Toki Pona tokens.
-        Currently supports very simple movements (tawa, lon) and
-        placeholder interactions (moku etc.).
+        The action is represented as a list of Toki Pona tokens and is
+        dispatched on its verb through the agent's verb registry (see
+        actions.py).  Pass ``opcode`` if the tokens were already
+        compiled.
         """
-        if not action_tokens:
-            return
-        verb = action_tokens[0]
-        # Example: 'tawa' means move; optionally followed by direction tokens
-        if verb == "tawa":
-            # naive movement: move right by one unit per action
-            self.x = min(self.env.width, self.x + 5)
-        elif verb == "lon":
-            # do nothing (stay in place)
-            pass
-        elif verb == "moku":
-            # attempt to 'eat' an object; not implemented
-            pass
-        # Additional verbs and actions can be handled here
-
-    def update(self, dt: float) -> List[str]:
+        self.verbs.dispatch(self, action_tokens, opcode)
+
+    def update(self, dt: float, decide: bool = True) -> Optional[List[str]]:
         """Update agent state and produce an utterance.
 
-        Returns the Toki Pona sentence produced by the mind.
+        Returns the Toki Pona sentence produced by the mind.  With
+        ``decide=False`` (see scheduler.DecisionScheduler) the mind is
+        not consulted: the last action is repeated and the last
+        sentence returned.
+        """
+        if decide:
+            perception = self.perceive()
+            if self.attention is not None:
+                perception = self.attention.filter(self.env, perception)
+            self._last_sentence, self._last_action = self.mind.decide(perception)
+            self._last_opcode = self.verbs.compile(self._last_action)
+        self.prev_x, self.prev_y = self.x, self.y
+        self.act(self._last_action, self._last_opcode)
+        return self._last_sentence
+
+    def render(self, surface: "pygame.Surface", alpha: float = 1.0) -> None:
+        """Draw the agent on the surface (imports the renderer lazily).
+
+        ``alpha`` blends between the position before and after the last
+        action (1.0 draws the current position).
         """
-        perception = self.perceive()
-        toki_sentence, action_tokens = self.mind.decide(perception)
-        self.act(action_tokens)
-        self._last_sentence = toki_sentence
-        return toki_sentence
-
-    def render(self, surface: pygame.Surface) -> None:
-        """Draw the agent on the surface."""
-        pygame.draw.circle(surface, self.color, (int(self.x), int(surface.get_height() - self.y)), self.radius)
+        from renderer import draw_agent
+        draw_agent(surface, self, alpha)
@@ -0,0 +1,104 @@
+"""
+attention.py
+============
+
+Salience-based attention for Kama Sona agents.  Perception can put
+hundreds of objects in front of an agent; an :class:`AttentionFilter`
+sits between :meth:`agent.Agent.perceive` and the mind and keeps only
+the ``k`` most salient of them, so the cost of the mind per agent
+stays constant however crowded the scene is.
+
+Salience is a weighted sum of three scores in [0, 1]:
+
+* **proximity** – closer objects score higher;
+* **motion** – faster objects score higher;
+* **novelty** – objects the agent has not attended to recently score
+  higher; the score recovers over ``novelty_time`` seconds after an
+  object was last attended.
+
+The top ``k`` are picked with ``numpy.argpartition`` (linear time)
+and only those ``k`` are sorted.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict
+
+import numpy as np
+
+from environment import ObjectStates
+
+
+class AttentionFilter:
+    """Keeps the ``k`` most salient objects of a perception."""
+
+    def __init__(self, k: int = 8, radius: float = 200.0,
+                 distance_weight: float = 1.0, motion_weight: float = 1.0,
+                 novelty_weight: float = 1.0, speed_scale: float = 10.0,
+                 novelty_time: float = 5.0, max_memory: int = 4096) -> None:
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.radius = radius
+        self.distance_weight = distance_weight
+        self.motion_weight = motion_weight
+        self.novelty_weight = novelty_weight
+        self.speed_scale = speed_scale
+        self.novelty_time = novelty_time
+        self.max_memory = max_memory
+        # When each object (by id) was last attended to.
+        self._last_seen: Dict[int, float] = {}
+
+    def salience(self, env, states: ObjectStates, x: float, y: float) -> np.ndarray:
+        """Return the salience of every object in ``states``."""
+        rows = states.rows
+        objects = env.objects
+        d = np.hypot(states.positions[:, 0] - x, states.positions[:, 1] - y)
+        proximity = np.clip(1.0 - d / self.radius, 0.0, 1.0)
+        speed = np.hypot(objects.vx[rows], objects.vy[rows])
+        motion = np.minimum(speed / self.speed_scale, 1.0)
+        last_seen = self._last_seen
+        ids = objects.ids[rows].tolist()
+        since = np.array([env.time - last_seen.get(i, -math.inf) for i in ids])
+        novelty = 1.0 - np.exp(-since / self.novelty_time)
+        return (self.distance_weight * proximity + self.motion_weight * motion
+                + self.novelty_weight * novelty)
+
+    def select(self, scores: np.ndarray) -> np.ndarray:
+        """Return the indices of the ``k`` highest ``scores``, best first."""
+        k = self.k
+        if scores.shape[0] > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def filter(self, env, perception: dict) -> dict:
+        """Return ``perception`` reduced to its ``k`` most salient objects.
+
+        The kept objects are remembered as attended.  Their salience is
+        added under ``"salience"``.  Perceptions without an
+        ``"objects"`` entry (incremental ones) are returned unchanged.
+        """
+        states = perception.get("objects")
+        if not isinstance(states, ObjectStates):
+            return perception
+        x, y = perception["position"]
+        scores = self.salience(env, states, x, y)
+        top = self.select(scores)
+        kept = ObjectStates(states.rows[top], states.positions[top], states.movable[top])
+        filtered = dict(perception, objects=kept, salience=scores[top])
+        if "distances" in perception:
+            filtered["distances"] = perception["distances"][top]
+        self._remember(env.objects.ids[kept.rows].tolist(), env.time)
+        return filtered
+
+    def _remember(self, ids, now: float) -> None:
+        last_seen = self._last_seen
+        for i in ids:
+            last_seen[i] = now
+        if len(last_seen) > self.max_memory:
+            # Forget the objects attended longest ago.
+            cutoff = sorted(last_seen.values())[len(last_seen) - self.max_memory // 2]
+            self._last_seen = {i: t for i, t in last_seen.items() if t >= cutoff}
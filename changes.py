@@ -0,0 +1,223 @@
+"""
+changes.py
+==========
+
+Change tracking for incremental perception.  The environment records
+what happens to its objects in a :class:`ChangeLog`: which objects
+were added, moved or removed and how the sunlight changed.  Agents
+keep a :class:`WorldModel`, a local copy of the world that they patch
+with the :class:`Changes` reported since they last looked, so the cost
+of perceiving depends on how much changed rather than on the size of
+the world.
+
+Objects are identified by stable ids (see ``ObjectStore.ids``) rather
+than by store rows, which are reassigned when objects are removed.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+# Kinds of log entries.
+ADDED = 0
+MOVED = 1
+REMOVED = 2
+SUNLIGHT = 3
+
+_NO_IDS = np.empty(0, dtype=np.int64)
+
+
+def _no_positions() -> np.ndarray:
+    return np.empty((0, 2), dtype=np.float64)
+
+
+@dataclass
+class Changes:
+    """What changed in the world between two reads of a change log.
+
+    ``added`` and ``moved`` come with the objects' current positions;
+    ``sunlight`` is None when it did not change.  When ``reset`` is
+    True the reader fell too far behind (or the world was replaced):
+    ``added`` then lists every object and the local model must be
+    rebuilt from scratch.
+    """
+
+    added: np.ndarray = field(default_factory=lambda: _NO_IDS)
+    added_positions: np.ndarray = field(default_factory=_no_positions)
+    added_movable: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    moved: np.ndarray = field(default_factory=lambda: _NO_IDS)
+    moved_positions: np.ndarray = field(default_factory=_no_positions)
+    removed: np.ndarray = field(default_factory=lambda: _NO_IDS)
+    sunlight: Optional[float] = None
+    reset: bool = False
+
+    def __len__(self) -> int:
+        return self.added.shape[0] + self.moved.shape[0] + self.removed.shape[0]
+
+
+class ChangeLog:
+    """Bounded log of object and sunlight changes.
+
+    Every record gets a sequence number.  A reader keeps a cursor (the
+    sequence number of the next record it has not seen) and passes it
+    to :meth:`read`.  Only the last ``max_entries`` records are kept; a
+    reader whose cursor points to a dropped record must resynchronise.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._entries: Deque[Tuple[int, object]] = deque(maxlen=max_entries)
+        # Sequence number of the oldest record still held, and of the next.
+        self._first = 0
+        self.seq = 0
+
+    def record(self, kind: int, payload) -> None:
+        """Append a record of ``kind``; ``payload`` is an id array or a float."""
+        if kind != SUNLIGHT:
+            # Copy: callers often pass views of store columns.
+            payload = np.array(payload, dtype=np.int64)
+            if payload.size == 0:
+                return
+        entries = self._entries
+        if len(entries) == entries.maxlen:
+            self._first += 1
+        entries.append((kind, payload))
+        self.seq += 1
+
+    def clear(self) -> None:
+        """Forget every record, forcing all readers to resynchronise."""
+        self._entries.clear()
+        self._first = self.seq
+
+    def read(self, cursor: int) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[float]]]:
+        """Return ``(added, moved, removed, sunlight)`` since ``cursor``.
+
+        The id arrays are net changes: an object added and removed
+        again is not reported, and objects added or removed are not
+        also reported as moved.  Returns None if the reader must
+        resynchronise.
+        """
+        if cursor < self._first or cursor > self.seq:
+            return None
+        parts: Dict[int, list] = {ADDED: [], MOVED: [], REMOVED: []}
+        sunlight = None
+        for kind, payload in islice(self._entries, cursor - self._first, None):
+            if kind == SUNLIGHT:
+                sunlight = payload
+            else:
+                parts[kind].append(payload)
+        added, moved, removed = (np.unique(np.concatenate(parts[kind])) if parts[kind] else _NO_IDS
+                                 for kind in (ADDED, MOVED, REMOVED))
+        born_and_gone = np.intersect1d(added, removed, assume_unique=True)
+        if born_and_gone.size:
+            added = np.setdiff1d(added, born_and_gone, assume_unique=True)
+            removed = np.setdiff1d(removed, born_and_gone, assume_unique=True)
+        if moved.size:
+            moved = np.setdiff1d(moved, np.concatenate([added, removed, born_and_gone]),
+                                 assume_unique=True)
+        return added, moved, removed, sunlight
+
+
+class WorldModel:
+    """An agent's local copy of the objects in the world.
+
+    The model maps object ids to positions and the movable flag, and
+    is brought up to date with :meth:`sync`, which only touches the
+    objects that changed.
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        self.cursor = -1  # no changes seen yet: the first sync is a reset
+        self.sunlight: Optional[float] = None
+        self._slot: Dict[int, int] = {}
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self._positions = np.zeros((capacity, 2), dtype=np.float64)
+        self._movable = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def __contains__(self, object_id: int) -> bool:
+        return object_id in self._slot
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self._positions[:len(self._slot)]
+
+    @property
+    def movable(self) -> np.ndarray:
+        return self._movable[:len(self._slot)]
+
+    def position(self, object_id: int) -> Tuple[float, float]:
+        x, y = self._positions[self._slot[object_id]].tolist()
+        return x, y
+
+    def sync(self, env) -> Changes:
+        """Fetch the changes since the last sync from ``env`` and apply them."""
+        changes = env.changes_since(self.cursor)
+        self.cursor = env.changes.seq
+        self.apply(changes)
+        return changes
+
+    def apply(self, changes: Changes) -> None:
+        """Patch the model with ``changes``."""
+        if changes.reset:
+            self._slot.clear()
+        if changes.sunlight is not None:
+            self.sunlight = changes.sunlight
+        slot = self._slot
+        for object_id in changes.removed.tolist():
+            self._drop(object_id)
+        if changes.moved.size:
+            slots = [slot.get(i, -1) for i in changes.moved.tolist()]
+            known = np.array(slots, dtype=np.int64)
+            mask = known >= 0
+            self._positions[known[mask]] = changes.moved_positions[mask]
+        added = changes.added
+        if added.size:
+            # Skip objects the model already has (e.g. after a reset).
+            keep = np.fromiter((i not in slot for i in added.tolist()), dtype=bool,
+                               count=added.shape[0])
+            added = added[keep]
+            n = len(slot)
+            end = n + added.shape[0]
+            self._grow(end)
+            self.ids[n:end] = added
+            self._positions[n:end] = changes.added_positions[keep]
+            self._movable[n:end] = changes.added_movable[keep]
+            slot.update(zip(added.tolist(), range(n, end)))
+
+    def within(self, x: float, y: float, r: float) -> np.ndarray:
+        """Return the ids of modelled objects within ``r`` of ``(x, y)``."""
+        d = self.positions - (x, y)
+        hit = np.einsum("ij,ij->i", d, d) <= r * r
+        return self.ids[:len(self._slot)][hit]
+
+    def _drop(self, object_id: int) -> None:
+        slot = self._slot
+        i = slot.pop(object_id, None)
+        if i is None:
+            return
+        last = len(slot)
+        if i != last:
+            moved = int(self.ids[last])
+            self.ids[i] = moved
+            self._positions[i] = self._positions[last]
+            self._movable[i] = self._movable[last]
+            slot[moved] = i
+
+    def _grow(self, minimum: int) -> None:
+        capacity = self.ids.shape[0]
+        if capacity >= minimum:
+            return
+        while capacity < minimum:
+            capacity *= 2
+        for name in ("ids", "_positions", "_movable"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:old.shape[0]] = old
+            setattr(self, name, new)
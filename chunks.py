@@ -0,0 +1,181 @@
+"""
+chunks.py
+=========
+
+Chunked, lazily generated world for the Kama Sona simulation.  The
+world is split along the x axis into fixed-size chunks.  A chunk is
+loaded into the environment's object store when an agent comes near
+it and unloaded again once every agent has moved far away, so memory
+use and the cost of each physics step depend on the active area
+rather than on the total size of the world.
+
+The contents of a chunk are generated from the world seed and the
+chunk index alone the first time it is loaded, so the same seed
+always produces the same world.  A chunk that has been visited is
+saved when it is unloaded, either in memory or, when a cache
+directory is given, as an ``.npz`` file on disk.  Objects that drift
+into a chunk that was never generated are saved there too, and are
+added to the chunk's generated contents when it is first loaded.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+# A chunk generator receives a seeded RNG and the chunk's x-range
+# and returns object column data in the format of ObjectStore.export.
+ChunkGenerator = Callable[[np.random.Generator, float, float], Dict[str, np.ndarray]]
+
+
+def default_generator(rng: np.random.Generator, x0: float, x1: float) -> Dict[str, np.ndarray]:
+    """Scatter a few static trees and falling rocks across a chunk."""
+    trees = int(rng.integers(0, 4))
+    rocks = int(rng.integers(0, 6))
+    x = rng.uniform(x0, x1, trees + rocks)
+    y = np.concatenate([np.zeros(trees), rng.uniform(0.0, 150.0, rocks)])
+    movable = np.concatenate([np.zeros(trees, dtype=bool), np.ones(rocks, dtype=bool)])
+    return {"x": x, "y": y, "movable": movable}
+
+
+class ChunkManager:
+    """Loads and unloads world chunks around a set of agent positions.
+
+    Chunks within ``load_radius`` chunks of any agent are loaded;
+    chunks further than ``unload_radius`` from every agent are
+    unloaded.  Keeping ``unload_radius`` larger than ``load_radius``
+    stops chunks at the boundary from thrashing.
+    """
+
+    def __init__(self, env, chunk_size: float = 512.0, seed: int = 0,
+                 load_radius: int = 1, unload_radius: int = 2,
+                 cache_dir: Optional[str] = None,
+                 generator: ChunkGenerator = default_generator) -> None:
+        if unload_radius < load_radius:
+            raise ValueError("unload_radius must be at least load_radius")
+        self.env = env
+        self.chunk_size = float(chunk_size)
+        self.seed = seed
+        self.load_radius = load_radius
+        self.unload_radius = unload_radius
+        self.cache_dir = cache_dir
+        self.generator = generator
+        self.loaded: Set[int] = set()
+        # Chunks whose generated contents have been added to the world.
+        self.generated: Set[int] = set()
+        # Saved contents of visited chunks when no cache_dir is set.
+        self._saved: Dict[int, Dict[str, np.ndarray]] = {}
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def chunk_of(self, x: float) -> int:
+        """Return the index of the chunk containing ``x``."""
+        return int(np.floor(x / self.chunk_size))
+
+    def bounds(self, chunk: int) -> Tuple[float, float]:
+        """Return the ``[x0, x1)`` range covered by ``chunk``."""
+        return chunk * self.chunk_size, (chunk + 1) * self.chunk_size
+
+    def update(self, positions: Iterable[float]) -> Tuple[int, int]:
+        """Load and unload chunks around the given agent x positions.
+
+        Returns the number of chunks loaded and unloaded.
+        """
+        centres = {self.chunk_of(x) for x in positions}
+        wanted = {c + d for c in centres
+                  for d in range(-self.load_radius, self.load_radius + 1)}
+        stale = {c for c in self.loaded
+                 if all(abs(c - k) > self.unload_radius for k in centres)}
+        fresh = sorted(wanted - self.loaded)
+        for chunk in fresh:
+            self._load(chunk)
+        if stale:
+            self.loaded -= stale
+            self._evict(stale)
+        return len(fresh), len(stale)
+
+    def _load(self, chunk: int) -> None:
+        data = self._restore(chunk)
+        if chunk not in self.generated:
+            rng = np.random.default_rng([self.seed % 2**32, chunk % 2**32, (chunk >> 32) % 2**32])
+            x0, x1 = self.bounds(chunk)
+            self.env.objects.extend(self.generator(rng, x0, x1))
+            self.generated.add(chunk)
+        if data is not None:
+            # Saved contents, or objects that drifted in before the
+            # chunk was first generated.
+            self.env.objects.extend(data)
+        self.loaded.add(chunk)
+
+    def _evict(self, stale: Set[int]) -> None:
+        # Objects are saved into the chunk they currently lie in, so
+        # objects that drifted out of the loaded area are evicted too.
+        objects = self.env.objects
+        chunk_ids = np.floor(objects.x / self.chunk_size).astype(np.int64)
+        loaded = np.fromiter(self.loaded, dtype=np.int64, count=len(self.loaded))
+        out = np.nonzero(~np.isin(chunk_ids, loaded))[0]
+        owners = chunk_ids[out]
+        data = objects.extract(out)
+        for chunk in stale | set(np.unique(owners).tolist()):
+            mask = owners == chunk
+            self._save(chunk, {field: col[mask] for field, col in data.items()})
+
+    def saved_chunks(self) -> Dict[int, Dict[str, np.ndarray]]:
+        """Return the saved contents of every visited, unloaded chunk.
+
+        Unlike loading a chunk this leaves the saved data in place.
+        """
+        if self.cache_dir is None:
+            return dict(self._saved)
+        saved = {}
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("chunk_") and name.endswith(".npz"):
+                with np.load(os.path.join(self.cache_dir, name)) as archive:
+                    saved[int(name[6:-4])] = {field: archive[field] for field in archive.files}
+        return saved
+
+    def load_saved(self, loaded: Iterable[int], saved: Dict[int, Dict[str, np.ndarray]],
+                   generated: Optional[Iterable[int]] = None) -> None:
+        """Replace the chunk bookkeeping, e.g. when restoring a snapshot.
+
+        ``loaded`` are the chunks whose objects are already in the
+        environment, ``saved`` the contents of unloaded chunks and
+        ``generated`` the chunks already generated (by default the
+        loaded and saved ones).
+        """
+        self.loaded = set(loaded)
+        self.generated = self.loaded | set(saved) if generated is None else set(generated)
+        if self.cache_dir is None:
+            self._saved = dict(saved)
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("chunk_") and name.endswith(".npz"):
+                os.remove(os.path.join(self.cache_dir, name))
+        for chunk, data in saved.items():
+            np.savez(self._path(chunk), **data)
+
+    def _path(self, chunk: int) -> str:
+        return os.path.join(self.cache_dir, f"chunk_{chunk}.npz")
+
+    def _save(self, chunk: int, data: Dict[str, np.ndarray]) -> None:
+        previous = self._restore(chunk)
+        if previous is not None:
+            data = {field: np.concatenate([previous[field], col]) for field, col in data.items()}
+        if self.cache_dir is None:
+            self._saved[chunk] = data
+        else:
+            np.savez(self._path(chunk), **data)
+
+    def _restore(self, chunk: int) -> Optional[Dict[str, np.ndarray]]:
+        # Return (and forget) the saved contents of a chunk, if any.
+        if self.cache_dir is None:
+            return self._saved.pop(chunk, None)
+        path = self._path(chunk)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as archive:
+            data = {field: archive[field] for field in archive.files}
+        os.remove(path)
+        return data
@@ -0,0 +1,143 @@
+"""
+collision.py
+============
+
+Object–object collision for the Kama Sona world.  Collision runs in
+two phases over the rows of an :class:`environment.ObjectStore`:
+
+* a **broadphase** (:class:`SweepAndPrune`) that sorts objects by the
+  left edge of their x-interval and sweeps the sorted list to find
+  pairs whose intervals overlap, and
+* a **narrowphase** (:func:`resolve_circle_contacts`) that tests those
+  pairs as circles and pushes overlapping objects apart.
+
+The broadphase keeps its sort order between ticks.  Objects move only
+a little per step, so the previous order is nearly sorted and the
+stable sort (Timsort) re-sorts it in close to linear time.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+# Approach speed above which a contact wakes a sleeping object.
+WAKE_SPEED = 1.0
+# Gap up to which a resting object still counts as touching its support.
+SUPPORT_MARGIN = 1.0
+
+
+class SweepAndPrune:
+    """Sort-and-sweep broadphase along the x axis."""
+
+    def __init__(self) -> None:
+        self._order = np.empty(0, dtype=np.int64)
+
+    def _refresh_order(self, n: int) -> np.ndarray:
+        order = self._order
+        if order.shape[0] != n or (n and order.max() >= n):
+            # Rows were added or removed: drop stale rows and append the
+            # new ones; the sort below puts them in place.
+            order = order[order < n]
+            present = np.zeros(n, dtype=bool)
+            present[order] = True
+            order = np.concatenate([order, np.nonzero(~present)[0]])
+        return order
+
+    def pairs(self, xs: np.ndarray, radii: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return row pairs ``(a, b)`` whose x-intervals overlap."""
+        n = xs.shape[0]
+        order = self._refresh_order(n)
+        mins = xs[order] - radii[order]
+        perm = np.argsort(mins, kind="stable")
+        order = order[perm]
+        mins = mins[perm]
+        self._order = order
+        if n < 2:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        maxs = xs[order] + radii[order]
+        # Every interval starting before maxs[i] (and after i) overlaps i.
+        ends = np.searchsorted(mins, maxs, side="right")
+        starts = np.arange(1, n + 1)
+        counts = np.maximum(ends - starts, 0)
+        total = int(counts.sum())
+        if total == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        first = np.repeat(np.arange(n), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + offsets
+        return order[first], order[second]
+
+
+def resolve_circle_contacts(store, a: np.ndarray, b: np.ndarray,
+                            restitution: float = 0.0) -> np.ndarray:
+    """Separate overlapping circles among the candidate pairs ``(a, b)``.
+
+    Only objects that are both movable and awake are moved; static and
+    sleeping objects act as immovable, and pairs with no such object
+    are skipped, so sleeping piles cost nothing.  Overlapping objects
+    are pushed apart along the contact normal and their approaching
+    velocity is removed (scaled by ``restitution``); an object on the
+    ground is not pushed into it.  A sleeping object hit faster than
+    ``WAKE_SPEED`` is woken for the next step.  Returns the rows whose
+    position changed.
+    """
+    active = store.movable & store.awake
+    keep = active[a] | active[b]
+    a, b = a[keep], b[keep]
+    if a.size == 0:
+        return a
+    xs, ys, radii = store.x, store.y, store.radius
+    dx = xs[b] - xs[a]
+    dy = ys[b] - ys[a]
+    dist2 = dx * dx + dy * dy
+    reach = radii[a] + radii[b]
+    hit = dist2 < reach * reach
+    a, b, dx, dy, dist2, reach = a[hit], b[hit], dx[hit], dy[hit], dist2[hit], reach[hit]
+    if a.size == 0:
+        return a
+
+    dist = np.sqrt(dist2)
+    # Coincident centres get an arbitrary horizontal normal.
+    safe = np.where(dist > 0, dist, 1.0)
+    nx = np.where(dist > 0, dx / safe, 1.0)
+    ny = np.where(dist > 0, dy / safe, 0.0)
+    wa = active[a].astype(np.float64)
+    wb = active[b].astype(np.float64)
+    # The ground takes the share of an object pushed down into it, so
+    # the other object is pushed (and stopped) alone.
+    floor_a = (ys[a] <= 0) & (ny > 0) & (wb > 0)
+    floor_b = (ys[b] <= 0) & (ny < 0) & (wa > 0)
+    wa[floor_a] = 0.0
+    wb[floor_b] = 0.0
+    wsum = wa + wb
+    depth = reach - dist
+
+    # Positional correction split between the two bodies.
+    push_a = depth * wa / wsum
+    push_b = depth * wb / wsum
+    np.subtract.at(xs, a, nx * push_a)
+    np.subtract.at(ys, a, ny * push_a)
+    np.add.at(xs, b, nx * push_b)
+    np.add.at(ys, b, ny * push_b)
+
+    # Remove the approaching component of the relative velocity.
+    vxs, vys = store.vx, store.vy
+    vn = (vxs[b] - vxs[a]) * nx + (vys[b] - vys[a]) * ny
+    j = np.where(vn < 0, -(1.0 + restitution) * vn / wsum, 0.0)
+    np.subtract.at(vxs, a, nx * j * wa)
+    np.subtract.at(vys, a, ny * j * wa)
+    np.add.at(vxs, b, nx * j * wb)
+    np.add.at(vys, b, ny * j * wb)
+
+    touched = np.unique(np.concatenate([a[wa > 0], b[wb > 0]]))
+    # Pushing must not drive anything below the ground.
+    below = touched[ys[touched] <= 0]
+    ys[below] = 0.0
+    vys[below] = np.maximum(vys[below], 0.0)
+    hard = vn < -WAKE_SPEED
+    store.wake(np.concatenate([a[hard], b[hard]]))
+    return touched
@@ -0,0 +1,206 @@
+"""
+consolidation.py
+================
+
+Background memory consolidation for the Kama Sona mind.  A
+:class:`Consolidator` folds old raw experiences into a compact
+:class:`Summary` on a worker thread, after which the raw rows are
+evicted from the :class:`memory.ExperienceBuffer`:
+
+* experiences are grouped into state buckets by flooring the first
+  ``len(cell)`` features (position and sunlight in both feature
+  layouts) by ``cell``;
+* each bucket keeps per-action counts and reward sums, the number of
+  experiences folded into it and their mean feature vector (its
+  prototype).
+
+The handoff is double-buffered.  :meth:`Consolidator.submit` is called
+on the simulation thread; once more than ``keep + batch`` experiences
+are held it copies the ``batch`` oldest into whichever of two
+preallocated buffers is free, evicts them and queues the buffer for the
+worker.  If the worker still holds both buffers it returns at once
+without evicting anything, so the tick never waits on consolidation.
+The worker publishes each new summary by swapping a reference, so
+readers always see a complete summary.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class Summary:
+    """Consolidated experience, one row per state bucket.
+
+    Column ``a + 1`` of ``counts`` and ``reward_sums`` belongs to action
+    opcode ``a``; column 0 collects unknown actions.
+    """
+
+    keys: np.ndarray          # (m, d) int64 state buckets
+    experiences: np.ndarray   # (m,) experiences folded into each bucket
+    counts: np.ndarray        # (m, actions + 1) int64
+    reward_sums: np.ndarray   # (m, actions + 1) float64
+    prototypes: np.ndarray    # (m, feature_size) float32 mean features
+    consolidated: int = 0     # experiences folded in total
+    until: float = -np.inf    # newest timestamp folded
+
+    @classmethod
+    def empty(cls, feature_size: int, dims: int) -> "Summary":
+        return cls(np.zeros((0, dims), dtype=np.int64), np.zeros(0, dtype=np.int64),
+                   np.zeros((0, 1), dtype=np.int64), np.zeros((0, 1)),
+                   np.zeros((0, feature_size), dtype=np.float32))
+
+    def __len__(self) -> int:
+        return self.keys.shape[0]
+
+    def mean_rewards(self) -> np.ndarray:
+        """Return the mean reward per bucket and action (NaN where untried)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 0, self.reward_sums / self.counts, np.nan)
+
+    def nearest(self, features: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ``k`` buckets whose prototypes are nearest ``features``."""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        m = min(features.shape[0], self.prototypes.shape[1])
+        diff = self.prototypes.astype(np.float64)
+        diff[:, :m] -= features[:m]
+        distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        rows = np.argsort(distances, kind="stable")[:k]
+        return rows, distances[rows]
+
+
+class Consolidator:
+    """Folds old experiences into a :class:`Summary` on a worker thread."""
+
+    def __init__(self, feature_size: int = 3, keep: int = 1024, batch: int = 1024,
+                 cell: Sequence[float] = (32.0, 32.0, 0.25)) -> None:
+        if keep < 0 or batch < 1:
+            raise ValueError("keep must be non-negative and batch positive")
+        self.feature_size = feature_size
+        self.keep = keep
+        self.batch = batch
+        self.cell = np.asarray(cell, dtype=np.float64)[:feature_size]
+        dims = self.cell.shape[0]
+        # Two preallocated handoff buffers.
+        self._buffers = [
+            {"features": np.zeros((batch, feature_size), dtype=np.float32),
+             "actions": np.zeros(batch, dtype=np.int32),
+             "rewards": np.zeros(batch, dtype=np.float32),
+             "times": np.zeros(batch, dtype=np.float64)}
+            for _ in range(2)
+        ]
+        self._free: "queue.Queue[int]" = queue.Queue()
+        self._ready: "queue.Queue[Optional[int]]" = queue.Queue()
+        for i in range(len(self._buffers)):
+            self._free.put(i)
+        # Worker-owned aggregates, grown as buckets appear.
+        self._rows: Dict[Tuple[int, ...], int] = {}
+        self._keys = np.zeros((64, dims), dtype=np.int64)
+        self._experiences = np.zeros(64, dtype=np.int64)
+        self._counts = np.zeros((64, 1), dtype=np.int64)
+        self._reward_sums = np.zeros((64, 1))
+        self._feature_sums = np.zeros((64, feature_size))
+        # The published summary; replaced, never mutated.
+        self.summary = Summary.empty(feature_size, dims)
+        self._thread = threading.Thread(target=self._run, name="consolidation", daemon=True)
+        self._thread.start()
+
+    # -- simulation thread --------------------------------------------
+    def submit(self, memory) -> np.ndarray:
+        """Hand the oldest experiences of ``memory`` to the worker if due.
+
+        Returns the physical slots evicted from ``memory`` (empty when
+        nothing was handed off), so indexes over them can be updated.
+        """
+        if len(memory) < self.keep + self.batch:
+            return np.zeros(0, dtype=np.int64)
+        try:
+            i = self._free.get_nowait()
+        except queue.Empty:
+            return np.zeros(0, dtype=np.int64)
+        buffer = self._buffers[i]
+        slots = memory.discard(self.batch)
+        # The evicted slots are only overwritten by later appends.
+        m = min(memory.feature_size, self.feature_size)
+        buffer["features"][:, :m] = memory.features[slots, :m]
+        buffer["features"][:, m:] = 0.0
+        np.take(memory.actions, slots, out=buffer["actions"])
+        np.take(memory.rewards, slots, out=buffer["rewards"])
+        np.take(memory.times, slots, out=buffer["times"])
+        self._ready.put(i)
+        return slots
+
+    def drain(self) -> None:
+        """Wait until every handed-off buffer has been folded."""
+        self._ready.join()
+
+    def close(self) -> None:
+        """Fold what was handed off and stop the worker."""
+        self._ready.put(None)
+        self._thread.join()
+
+    # -- worker thread ------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            i = self._ready.get()
+            try:
+                if i is None:
+                    return
+                self._fold(self._buffers[i])
+                self._free.put(i)
+            finally:
+                self._ready.task_done()
+
+    def _grow(self, rows: int, columns: int) -> None:
+        size = self._keys.shape[0]
+        width = self._counts.shape[1]
+        if rows <= size and columns <= width:
+            return
+        size = max(size, 1 << (rows - 1).bit_length())
+        width = max(width, columns)
+
+        def grown(a: np.ndarray, shape) -> np.ndarray:
+            out = np.zeros(shape, dtype=a.dtype)
+            out[:a.shape[0], :a.shape[1]] = a
+            return out
+
+        self._keys = grown(self._keys, (size, self._keys.shape[1]))
+        self._experiences = grown(self._experiences[:, None], (size, 1))[:, 0]
+        self._counts = grown(self._counts, (size, width))
+        self._reward_sums = grown(self._reward_sums, (size, width))
+        self._feature_sums = grown(self._feature_sums, (size, self.feature_size))
+
+    def _fold(self, buffer: Dict[str, np.ndarray]) -> None:
+        features = buffer["features"]
+        dims = self.cell.shape[0]
+        keys = np.floor(features[:, :dims] / self.cell).astype(np.int64)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        lookup = self._rows
+        ids = np.array([lookup.setdefault(k, len(lookup)) for k in map(tuple, unique.tolist())],
+                       dtype=np.int64)
+        rows = ids[inverse.reshape(-1)]
+        columns = buffer["actions"].astype(np.int64) + 1
+        np.maximum(columns, 0, out=columns)
+        self._grow(len(lookup), int(columns.max()) + 1)
+        self._keys[ids] = unique
+        np.add.at(self._experiences, rows, 1)
+        np.add.at(self._counts, (rows, columns), 1)
+        np.add.at(self._reward_sums, (rows, columns), buffer["rewards"])
+        np.add.at(self._feature_sums, rows, features)
+        m = len(lookup)
+        experiences = self._experiences[:m].copy()
+        previous = self.summary
+        self.summary = Summary(
+            self._keys[:m].copy(), experiences, self._counts[:m].copy(),
+            self._reward_sums[:m].copy(),
+            (self._feature_sums[:m] / experiences[:, None]).astype(np.float32),
+            previous.consolidated + features.shape[0],
+            max(previous.until, float(buffer["times"].max())),
+        )
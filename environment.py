@@ -2,35 +2,580 @@
 environment.py
 ================
 
-Defines the 2D world used by the Kama Sona simulation.  The
-Environment class is responsible for storing world objects,
-applying simple physics (gravity and sunlight) and rendering
-them using Pygame.  This module should remain agnostic of
-agent logic; it merely updates and draws objects.
+Defines the 2D world used by the Kama Sona simulation.  The
+Environment class is responsible for storing world objects and
+applying simple physics (gravity and sunlight).  This module should
+remain agnostic of agent logic; it merely updates objects.  Drawing
+lives in renderer.py, so the world can be simulated without Pygame.
+
+Object state is kept in an :class:`ObjectStore`, a structure of
+contiguous NumPy arrays (one per attribute), so that physics can be
+applied to every object in a single vectorised step.  Individual
+:class:`WorldObject` instances are thin views onto a row of the store.
 """
 
 from __future__ import annotations
 
 import math
-import pygame
-from typing import List, Tuple
+import numpy as np
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from changes import ADDED, MOVED, REMOVED, SUNLIGHT, ChangeLog, Changes
+from chunks import ChunkManager
+from collision import SUPPORT_MARGIN, SweepAndPrune, resolve_circle_contacts
+from events import EventScheduler
+from spatial import SpatialHash
+
+if TYPE_CHECKING:
+    import pygame
+
+
+class ObjectStore:
+    """Structure-of-arrays storage for world objects.
+
+    Positions, velocities, the movable mask and radii live in
+    preallocated NumPy arrays which grow geometrically as objects are
+    appended.  The public ``x``, ``y``, ``vx``, ``vy``, ``movable`` and
+    ``radius`` properties return writable views of the occupied rows.
+    The store also behaves like a list of :class:`WorldObject` views so
+    that code iterating over ``env.objects`` keeps working.
+
+    ``version`` is bumped whenever existing rows are reassigned (on
+    removal), so that indices built over row numbers know to rebuild.
+
+    Objects that have come to rest are put to sleep by :meth:`settle`
+    and skipped by :meth:`integrate` until they are woken again, either
+    explicitly through :meth:`wake` or by writing to their state
+    through a :class:`WorldObject` view.
+
+    Every object has an ``id`` that, unlike its row, never changes while
+    it is in the store.  When ``log`` is set, additions, removals and
+    writes through views are recorded in that :class:`changes.ChangeLog`.
+
+    A physics backend that evaluates positions lazily can register a
+    ``pending`` callback; it is run by :meth:`flush` before positions
+    or velocities are read.  Setting ``touched`` to a list makes the
+    store record the rows whose state is written through a view.
+    """
+
+    # Speed below which an object counts as resting, and how long (in
+    # seconds) it must rest before it is put to sleep.
+    sleep_velocity = 0.5
+    sleep_delay = 0.5
+
+    def __init__(self, capacity: int = 16) -> None:
+        capacity = max(1, capacity)
+        self._x = np.zeros(capacity, dtype=np.float64)
+        self._y = np.zeros(capacity, dtype=np.float64)
+        self._vx = np.zeros(capacity, dtype=np.float64)
+        self._vy = np.zeros(capacity, dtype=np.float64)
+        self._movable = np.zeros(capacity, dtype=bool)
+        self._radius = np.zeros(capacity, dtype=np.float64)
+        # Positions at the start of the last physics step, for rendering
+        # interpolated states between fixed steps.
+        self._px = np.zeros(capacity, dtype=np.float64)
+        self._py = np.zeros(capacity, dtype=np.float64)
+        self._awake = np.zeros(capacity, dtype=bool)
+        self._rest = np.zeros(capacity, dtype=np.float64)
+        self._id = np.zeros(capacity, dtype=np.int64)
+        self.next_id = 0
+        # Cached rows of awake objects; None when it must be recomputed.
+        self._awake_rows: np.ndarray | None = None
+        self.pending: Optional[Callable[[], None]] = None
+        self.touched: Optional[List[int]] = None
+        self._views: List[WorldObject] = []
+        self.version = 0
+        self.log: Optional[ChangeLog] = None
+        # (version, count, order, sorted ids) used by rows_of.
+        self._id_lookup: Optional[Tuple[int, int, np.ndarray, np.ndarray]] = None
+
+    # -- array access -------------------------------------------------
+    @property
+    def count(self) -> int:
+        return len(self._views)
+
+    @property
+    def capacity(self) -> int:
+        return self._x.shape[0]
+
+    @property
+    def x(self) -> np.ndarray:
+        self.flush()
+        return self._x[:self.count]
+
+    @property
+    def y(self) -> np.ndarray:
+        self.flush()
+        return self._y[:self.count]
+
+    @property
+    def vx(self) -> np.ndarray:
+        self.flush()
+        return self._vx[:self.count]
+
+    @property
+    def vy(self) -> np.ndarray:
+        self.flush()
+        return self._vy[:self.count]
+
+    @property
+    def movable(self) -> np.ndarray:
+        return self._movable[:self.count]
+
+    @property
+    def radius(self) -> np.ndarray:
+        return self._radius[:self.count]
+
+    @property
+    def awake(self) -> np.ndarray:
+        return self._awake[:self.count]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._id[:self.count]
+
+    def _new_ids(self, k: int) -> np.ndarray:
+        ids = np.arange(self.next_id, self.next_id + k, dtype=np.int64)
+        self.next_id += k
+        return ids
+
+    def rows_of(self, ids: np.ndarray) -> np.ndarray:
+        """Return the rows of the objects with ``ids``, in order.
+
+        Ids of objects no longer in the store are skipped.
+        """
+        n = self.count
+        lookup = self._id_lookup
+        if lookup is None or lookup[0] != self.version or lookup[1] != n:
+            order = np.argsort(self._id[:n], kind="stable")
+            lookup = self._id_lookup = (self.version, n, order, self._id[:n][order])
+        order, sorted_ids = lookup[2], lookup[3]
+        ids = np.asarray(ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(sorted_ids, ids), max(n - 1, 0))
+        found = sorted_ids[pos] == ids if n else np.zeros(ids.shape[0], dtype=bool)
+        return order[pos[found]]
+
+    def flush(self) -> None:
+        """Run the pending position update, if any."""
+        pending = self.pending
+        if pending is not None:
+            self.pending = None
+            pending()
+
+    _COLUMNS = ("_x", "_y", "_vx", "_vy", "_movable", "_radius", "_px", "_py",
+                "_awake", "_rest", "_id")
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return tuple(getattr(self, name) for name in self._COLUMNS)
+
+    def _grow(self, minimum: int) -> None:
+        capacity = self.capacity
+        while capacity < minimum:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:old.shape[0]] = old
+            setattr(self, name, new)
+
+    # -- list-like interface ------------------------------------------
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator["WorldObject"]:
+        return iter(list(self._views))
+
+    def __getitem__(self, index: int) -> "WorldObject":
+        return self._views[index]
+
+    def append(self, obj: "WorldObject") -> None:
+        """Adopt ``obj`` into the store, copying its current state.
+
+        An object already held by another store is moved out of it.
+        """
+        if obj._store is self:
+            return
+        self.flush()
+        obj._store.flush()
+        row = self.count
+        self._grow(row + 1)
+        src, src_row = obj._store, obj._index
+        for dst_col, src_col in zip(self._columns(), src._columns()):
+            dst_col[row] = src_col[src_row]
+        src._release(src_row)
+        obj._store = self
+        obj._index = row
+        self._views.append(obj)
+        self._id[row] = self._new_ids(1)[0]
+        self._awake_rows = None
+        if self.log is not None:
+            self.log.record(ADDED, self._id[row:row + 1])
+
+    def remove(self, obj: "WorldObject") -> None:
+        """Remove ``obj`` from the store.
+
+        The last row is moved into the freed slot so the arrays stay
+        contiguous.  The removed object keeps its last known state in a
+        private single-row store.
+        """
+        if obj._store is not self:
+            raise ValueError("object is not in this store")
+        # Bring a lazily evaluated row up to date before copying it.
+        self.flush()
+        row = obj._index
+        private = ObjectStore(capacity=1)
+        for dst_col, src_col in zip(private._columns(), self._columns()):
+            dst_col[0] = src_col[row]
+        private._views.append(obj)
+        self._release(row)
+        obj._store = private
+        obj._index = 0
+
+    # -- bulk access --------------------------------------------------
+    # Columns that make up an object's persistent state, keyed by the
+    # field names used in exported data.
+    STATE_FIELDS = {"x": "_x", "y": "_y", "vx": "_vx", "vy": "_vy",
+                    "movable": "_movable", "radius": "_radius", "awake": "_awake"}
+
+    def export(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Return a copy of the state columns, for ``rows`` or all rows."""
+        self.flush()
+        n = self.count
+        if rows is None:
+            return {field: getattr(self, name)[:n].copy()
+                    for field, name in self.STATE_FIELDS.items()}
+        return {field: getattr(self, name)[:n][rows]
+                for field, name in self.STATE_FIELDS.items()}
+
+    def extend(self, data: Dict[str, np.ndarray]) -> np.ndarray:
+        """Append objects from column data as produced by :meth:`export`.
+
+        Only ``x`` and ``y`` are required; velocities default to zero,
+        ``movable`` to False, ``radius`` to 10 and ``awake`` to
+        ``movable``.  Returns the rows of the new objects.
+        """
+        x = np.asarray(data["x"], dtype=np.float64)
+        k = x.shape[0]
+        start = self.count
+        self._grow(start + k)
+        end = start + k
+        movable = np.asarray(data.get("movable", np.zeros(k, dtype=bool)), dtype=bool)
+        defaults = {"vx": 0.0, "vy": 0.0, "movable": movable, "radius": 10.0, "awake": movable}
+        for field, name in self.STATE_FIELDS.items():
+            getattr(self, name)[start:end] = data.get(field, defaults.get(field))
+        self._px[start:end] = self._x[start:end]
+        self._py[start:end] = self._y[start:end]
+        self._rest[start:end] = 0.0
+        self._id[start:end] = self._new_ids(k)
+        self._views.extend(WorldObject._view(self, row) for row in range(start, end))
+        self._awake_rows = None
+        if self.log is not None:
+            self.log.record(ADDED, self._id[start:end])
+        return np.arange(start, end)
+
+    def extract(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Remove ``rows`` from the store and return their exported state.
+
+        The remaining rows are compacted in order.  Views of the removed
+        objects keep their last known state in a private store.
+        """
+        self.flush()
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        n = self.count
+        data = self.export(rows)
+        if rows.size == 0:
+            return data
+        if self.log is not None:
+            self.log.record(REMOVED, self._id[rows])
+        keep = np.ones(n, dtype=bool)
+        keep[rows] = False
+        private = ObjectStore(capacity=rows.size)
+        for dst_col, src_col in zip(private._columns(), self._columns()):
+            dst_col[:rows.size] = src_col[:n][rows]
+        m = n - rows.size
+        for col in self._columns():
+            col[:m] = col[:n][keep]
+        views = self._views
+        private._views = [views[row] for row in rows.tolist()]
+        for i, obj in enumerate(private._views):
+            obj._store, obj._index = private, i
+        self._views = [views[row] for row in np.nonzero(keep)[0].tolist()]
+        for i, obj in enumerate(self._views):
+            obj._index = i
+        self.version += 1
+        self._awake_rows = None
+        return data
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return the occupied rows of every internal column (not copied).
+
+        Unlike :meth:`export` this includes the bookkeeping columns
+        (previous positions and rest timers), so that :meth:`adopt` can
+        reproduce the store exactly.
+        """
+        self.flush()
+        n = self.count
+        return {name[1:]: getattr(self, name)[:n] for name in self._COLUMNS}
+
+    def adopt(self, columns: Dict[str, np.ndarray]) -> None:
+        """Replace the contents of the store with ``columns``.
+
+        ``columns`` maps every name returned by :meth:`columns` to an
+        array of equal length; fresh ids are assigned if ``id`` is
+        missing.  The arrays are used as they are, without
+        copying, so a copy-on-write memory map can back the store until
+        it next grows.  Views of the previous objects are detached.
+        """
+        self.extract(np.arange(self.count))
+        n = columns["x"].shape[0]
+        if "id" not in columns:
+            columns = dict(columns, id=np.arange(n, dtype=np.int64))
+        if n == 0:
+            columns = {name[1:]: np.zeros(1, dtype=getattr(self, name).dtype)
+                       for name in self._COLUMNS}
+        for name in self._COLUMNS:
+            col = columns[name[1:]]
+            if col.dtype != getattr(self, name).dtype or col.shape != (max(n, 1),):
+                raise ValueError(f"column {name[1:]!r} has the wrong dtype or length")
+            setattr(self, name, col)
+        self._views = [WorldObject._view(self, row) for row in range(n)]
+        self.next_id = int(self._id[:n].max()) + 1 if n else 0
+        self.version += 1
+        self._awake_rows = None
+        if self.log is not None:
+            self.log.clear()
+
+    def _release(self, row: int) -> None:
+        self.flush()
+        if self.log is not None:
+            self.log.record(REMOVED, self._id[row:row + 1])
+        last = self.count - 1
+        if row != last:
+            for col in self._columns():
+                col[row] = col[last]
+            moved = self._views[last]
+            moved._index = row
+            self._views[row] = moved
+        self._views.pop()
+        self.version += 1
+        self._awake_rows = None
+
+    # -- sleeping -----------------------------------------------------
+    def awake_rows(self) -> np.ndarray:
+        """Return the rows of all awake objects."""
+        if self._awake_rows is None:
+            self._awake_rows = np.nonzero(self._awake[:self.count])[0]
+        return self._awake_rows
+
+    @property
+    def awake_count(self) -> int:
+        """Number of movable objects currently simulated."""
+        rows = self.awake_rows()
+        return int(np.count_nonzero(self._movable[rows]))
+
+    @property
+    def sleeping_count(self) -> int:
+        """Number of movable objects currently asleep."""
+        return int(np.count_nonzero(self.movable)) - self.awake_count
+
+    def wake(self, rows: np.ndarray | int) -> None:
+        """Wake the objects at ``rows`` so the next step simulates them."""
+        rows = np.asarray(rows, dtype=np.int64)
+        asleep = rows[~self._awake[rows]]
+        if asleep.size == 0:
+            return
+        self._awake[asleep] = True
+        self._rest[asleep] = 0.0
+        self._awake_rows = None
+
+    def touch(self, row: int) -> None:
+        """Wake ``row`` and record it as externally modified."""
+        self.wake(row)
+        if self.touched is not None:
+            self.touched.append(row)
+        if self.log is not None:
+            self.log.record(MOVED, self._id[row:row + 1])
+
+    def wake_all(self) -> None:
+        """Wake every object in the store."""
+        self.wake(np.arange(self.count))
+
+    # -- physics ------------------------------------------------------
+    def save_previous(self) -> None:
+        """Remember current positions as the start of the next step.
+
+        Only awake rows are copied; a sleeping object did not move
+        during the step in which it fell asleep.
+        """
+        rows = self.awake_rows()
+        self._px[rows] = self._x[rows]
+        self._py[rows] = self._y[rows]
+
+    def interpolated(self, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Return positions blended ``alpha`` of the way into the last step."""
+        self.flush()
+        n = self.count
+        px, py = self._px[:n], self._py[:n]
+        return px + (self._x[:n] - px) * alpha, py + (self._y[:n] - py) * alpha
+
+    def integrate(self, dt: float, gravity: float, friction: float = 0.0) -> np.ndarray:
+        """Apply gravity and ground collision to every awake movable object.
+
+        Objects on the ground lose horizontal speed at rate ``friction``
+        (per second) so that sliding objects eventually come to rest.
+        Returns the rows that were awake during the step, i.e. every row
+        whose position may have changed.
+        """
+        rows = self.awake_rows()
+        if rows.size == 0:
+            return rows
+        active = rows[self._movable[rows]]
+        vx = self._vx[active]
+        vy = self._vy[active] - gravity * dt
+        x = self._x[active] + vx * dt
+        y = self._y[active] + vy * dt
+        # Simple ground collision: stop at y = 0
+        grounded = y <= 0
+        y[grounded] = 0.0
+        vy[grounded] = 0.0
+        if friction > 0.0:
+            vx[grounded] *= max(0.0, 1.0 - friction * dt)
+            self._vx[active] = vx
+        self._x[active] = x
+        self._y[active] = y
+        self._vy[active] = vy
+        return rows
+
+    def settle(self, dt: float, rows: np.ndarray) -> None:
+        """Advance rest timers for ``rows`` and put rested objects to sleep.
+
+        ``rows`` are the rows simulated in this step.  Movable objects
+        slower than ``sleep_velocity`` for ``sleep_delay`` seconds fall
+        asleep; awake objects that are not movable sleep immediately.
+        """
+        if rows.size == 0:
+            return
+        movable = self._movable[rows]
+        active = rows[movable]
+        limit = self.sleep_velocity
+        resting = (np.abs(self._vx[active]) < limit) & (np.abs(self._vy[active]) < limit)
+        rest = np.where(resting, self._rest[active] + dt, 0.0)
+        self._rest[active] = rest
+        asleep = active[rest >= self.sleep_delay]
+        if asleep.size or not movable.all():
+            self._awake[asleep] = False
+            self._awake[rows[~movable]] = False
+            self._awake_rows = None
 
 
 class WorldObject:
     """Representation of an object in the world.
 
     This simple class stores position, velocity and whether the
-    object is affected by gravity.  It can be extended to include
-    sprites, collision shapes and interactions.
+    object is affected by gravity.  The state itself lives in a row of
+    an :class:`ObjectStore`; a freshly created object owns a private
+    single-row store until it is appended to an environment.  An
+    instance holds nothing but its store and row (``__slots__``).
     """
 
+    __slots__ = ("_store", "_index")
+
     def __init__(self, x: float, y: float, movable: bool = False) -> None:
-        self.x = x
-        self.y = y
-        self.velocity_x = 0.0
-        self.velocity_y = 0.0
-        self.movable = movable
-        self.radius = 10  # radius for drawing
+        store = ObjectStore(capacity=1)
+        store._x[0] = store._px[0] = x
+        store._y[0] = store._py[0] = y
+        store._movable[0] = movable
+        store._radius[0] = 10  # radius for drawing
+        store._awake[0] = True
+        store._views.append(self)
+        self._store = store
+        self._index = 0
+
+    @property
+    def x(self) -> float:
+        self._store.flush()
+        return float(self._store._x[self._index])
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._store.flush()
+        self._store._x[self._index] = value
+        self._touch()
+
+    @property
+    def y(self) -> float:
+        self._store.flush()
+        return float(self._store._y[self._index])
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._store.flush()
+        self._store._y[self._index] = value
+        self._touch()
+
+    @property
+    def velocity_x(self) -> float:
+        self._store.flush()
+        return float(self._store._vx[self._index])
+
+    @velocity_x.setter
+    def velocity_x(self, value: float) -> None:
+        self._store.flush()
+        self._store._vx[self._index] = value
+        self._touch()
+
+    @property
+    def velocity_y(self) -> float:
+        self._store.flush()
+        return float(self._store._vy[self._index])
+
+    @velocity_y.setter
+    def velocity_y(self, value: float) -> None:
+        self._store.flush()
+        self._store._vy[self._index] = value
+        self._touch()
+
+    @property
+    def movable(self) -> bool:
+        return bool(self._store._movable[self._index])
+
+    @movable.setter
+    def movable(self, value: bool) -> None:
+        self._store._movable[self._index] = value
+        self._touch()
+
+    @property
+    def radius(self) -> float:
+        return float(self._store._radius[self._index])
+
+    @radius.setter
+    def radius(self, value: float) -> None:
+        self._store._radius[self._index] = value
+
+    @classmethod
+    def _view(cls, store: ObjectStore, row: int) -> "WorldObject":
+        # Create a view onto an existing row without a private store.
+        obj = cls.__new__(cls)
+        obj._store = store
+        obj._index = row
+        return obj
+
+    def _touch(self) -> None:
+        self._store.touch(self._index)
+
+    @property
+    def awake(self) -> bool:
+        return bool(self._store._awake[self._index])
+
+    def apply_impulse(self, dvx: float, dvy: float) -> None:
+        """Change the object's velocity and wake it up."""
+        store, row = self._store, self._index
+        store.flush()
+        store._vx[row] += dvx
+        store._vy[row] += dvy
+        store.touch(row)
 
     def update(self, dt: float, gravity: float) -> None:
         """Apply physics updates to the object."""
@@ -44,9 +589,10 @@ class WorldObject:
                 self.y = 0
                 self.velocity_y = 0
 
-    def render(self, surface: pygame.Surface) -> None:
-        """Draw the object as a circle."""
-        pygame.draw.circle(surface, (0, 0, 255), (int(self.x), int(surface.get_height() - self.y)), self.radius)
+    def render(self, surface: "pygame.Surface") -> None:
+        """Draw the object as a circle (imports the renderer lazily)."""
+        from renderer import draw_object
+        draw_object(surface, self)
 
     def get_state(self) -> dict:
         """Return a serialisable representation of the object state."""
@@ -56,34 +602,324 @@ class WorldObject:
         }
 
 
+class ObjectStates:
+    """Read-only, array-backed states of a set of objects.
+
+    ``positions`` is an ``(n, 2)`` array of ``(x, y)`` and ``movable``
+    a boolean array, both snapshots taken when the states were made
+    and marked read-only.  Building one costs a few array operations
+    regardless of how many objects it holds; indexing it returns the
+    same dict as :meth:`WorldObject.get_state` for code that wants one.
+    """
+
+    __slots__ = ("rows", "positions", "movable")
+
+    def __init__(self, rows: np.ndarray, positions: np.ndarray, movable: np.ndarray) -> None:
+        for array in (rows, positions, movable):
+            array.flags.writeable = False
+        self.rows = rows
+        self.positions = positions
+        self.movable = movable
+
+    @classmethod
+    def of(cls, store: ObjectStore, rows: np.ndarray) -> "ObjectStates":
+        """Capture the current states of ``rows`` of ``store``."""
+        positions = np.empty((rows.shape[0], 2), dtype=np.float64)
+        np.take(store.x, rows, out=positions[:, 0])
+        np.take(store.y, rows, out=positions[:, 1])
+        return cls(rows, positions, store.movable[rows])
+
+    def __len__(self) -> int:
+        return self.rows.shape[0]
+
+    def __getitem__(self, i: int) -> dict:
+        x, y = self.positions[i].tolist()
+        return {"position": (x, y), "movable": bool(self.movable[i])}
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self[i] for i in range(len(self)))
+
+
 class Environment:
-    """A 2D world with basic physics and lighting."""
+    """A 2D world with basic physics and lighting.
+
+    By default the world is ``width`` units wide.  Passing ``seed``
+    makes it unbounded instead: the world is split into chunks of
+    ``chunk_size`` that are generated from the seed as agents approach
+    and unloaded (to ``cache_dir`` if given) once they leave; see
+    :meth:`update_chunks`.  ``width`` then only sets the initial view.
+
+    ``physics`` selects the simulation mode: ``"step"`` integrates every
+    awake object on each call to :meth:`update_physics`, while
+    ``"event"`` moves objects along closed-form trajectories and only
+    does work when an object lands, comes to rest or touches another
+    (see events.py).
+    """
 
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, cell_size: float = 64.0,
+                 seed: Optional[int] = None, chunk_size: float = 512.0,
+                 cache_dir: Optional[str] = None, physics: str = "step") -> None:
+        if physics not in ("step", "event"):
+            raise ValueError(f"unknown physics mode: {physics!r}")
         self.width = width
         self.height = height
-        self.objects: List[WorldObject] = []
+        self.objects = ObjectStore()
+        self.index = SpatialHash(cell_size)
+        self.broadphase = SweepAndPrune()
+        self.restitution = 0.0  # bounciness of object-object contacts
+        self.friction = 5.0  # horizontal damping of objects on the ground
         self.gravity = 9.8
         self.sunlight = 1.0  # 0–1 intensity
         self.time = 0.0
+        # Object and sunlight changes, for incremental perception.
+        self.changes = ChangeLog()
+        self.objects.log = self.changes
 
         # Populate the world with a few objects
         # Example: a static tree and a movable rock
         self.objects.append(WorldObject(x=200, y=0, movable=False))
         self.objects.append(WorldObject(x=400, y=100, movable=True))
 
+        self.events: Optional[EventScheduler] = None
+        if physics == "event":
+            self.events = EventScheduler(self)
+
+        self.chunks: Optional[ChunkManager] = None
+        if seed is not None:
+            self.chunks = ChunkManager(self, chunk_size=chunk_size, seed=seed,
+                                       cache_dir=cache_dir)
+
+    @property
+    def infinite(self) -> bool:
+        """True when the world is chunked and has no fixed width."""
+        return self.chunks is not None
+
+    def update_chunks(self, positions: Iterable[float]) -> None:
+        """Load chunks near, and unload chunks far from, agent x positions."""
+        if self.chunks is not None:
+            self.chunks.update(positions)
+
     def update_physics(self, dt: float) -> None:
         """Update world state over a time step."""
         self.time += dt
         # Sunlight oscillates with time
         self.sunlight = max(0.0, (math.sin(self.time / 10.0) + 1.0) / 2.0)
-        for obj in self.objects:
-            obj.update(dt, gravity=self.gravity)
-
-    def render(self, surface: pygame.Surface) -> None:
-        """Render the world and its objects."""
-        # Draw a simple ground
-        pygame.draw.rect(surface, (50, 200, 50), (0, surface.get_height() - 10, surface.get_width(), 10))
-        # Draw objects
-        for obj in self.objects:
-            obj.render(surface)
+        self.changes.record(SUNLIGHT, self.sunlight)
+        if self.events is not None:
+            self.events.advance(self.time)
+            # Objects in flight move every tick; rather than logging them
+            # all, changes_since() reports whatever is in flight when read.
+            moved = self.events.moved
+            if moved:
+                self.changes.record(MOVED, self.objects._id[np.concatenate(moved)])
+            return
+        objects = self.objects
+        objects.save_previous()
+        moved = objects.integrate(dt, gravity=self.gravity, friction=self.friction)
+        if moved.size == 0:
+            return
+        self.collide()
+        # Objects asleep on something that moved away lost their support.
+        shifted = moved[(objects._x[moved] != objects._px[moved])
+                        | (objects._y[moved] != objects._py[moved])]
+        self.wake_unsupported(objects._px[shifted], objects._py[shifted],
+                              objects._radius[shifted])
+        objects.settle(dt, moved)
+        self._sync_index(moved)
+        moved = moved[self.objects._movable[moved]]
+        self.changes.record(MOVED, self.objects._id[moved])
+
+    def changes_since(self, cursor: int) -> Changes:
+        """Return what changed since ``cursor`` (a ``changes.seq`` value).
+
+        Positions are those at the time of the call.  In event mode,
+        objects in flight are not logged tick by tick and are reported
+        as moved whenever they are in flight at the time of the call.
+        If the log no longer reaches back to ``cursor`` the result is a
+        reset listing every object.
+        """
+        objects = self.objects
+        read = self.changes.read(cursor)
+        if read is None:
+            return Changes(added=objects.ids.copy(),
+                           added_positions=np.column_stack([objects.x, objects.y]),
+                           added_movable=objects.movable.copy(),
+                           sunlight=self.sunlight, reset=True)
+        added, moved, removed, sunlight = read
+        if self.events is not None:
+            flying = objects._id[self.events.flying_rows()]
+            if flying.size:
+                moved = np.setdiff1d(np.union1d(moved, flying), added, assume_unique=True)
+        added_rows = objects.rows_of(added)
+        moved_rows = objects.rows_of(moved)
+        xs, ys = objects.x, objects.y
+        return Changes(added=objects._id[added_rows],
+                       added_positions=np.column_stack([xs[added_rows], ys[added_rows]]),
+                       added_movable=objects._movable[added_rows],
+                       moved=objects._id[moved_rows],
+                       moved_positions=np.column_stack([xs[moved_rows], ys[moved_rows]]),
+                       removed=removed, sunlight=sunlight)
+
+    def position_at(self, obj: WorldObject, t: float) -> Tuple[float, float]:
+        """Return where ``obj`` is at time ``t``.
+
+        In event mode this evaluates the object's trajectory directly
+        (valid up to its next event); otherwise it is the current
+        position.
+        """
+        if self.events is not None and obj._store is self.objects:
+            return self.events.position_at(obj._index, t)
+        return obj.x, obj.y
+
+    def collide(self) -> np.ndarray:
+        """Resolve overlaps between objects; returns the rows pushed."""
+        objects = self.objects
+        a, b = self.broadphase.pairs(objects.x, objects.radius)
+        return resolve_circle_contacts(objects, a, b, self.restitution)
+
+    def _sync_index(self, rows: np.ndarray | None = None) -> None:
+        objects = self.objects
+        self.index.update(objects.x, objects.y, objects.version, rows=rows)
+
+    @property
+    def awake_count(self) -> int:
+        """Number of movable objects currently being simulated."""
+        return self.objects.awake_count
+
+    @property
+    def sleeping_count(self) -> int:
+        """Number of movable objects asleep and skipped by physics."""
+        return self.objects.sleeping_count
+
+    def wake_radius(self, x: float, y: float, r: float) -> int:
+        """Wake every object within ``r`` of ``(x, y)``.
+
+        Used when an agent interacts with its surroundings.  Returns the
+        number of objects in range.
+        """
+        rows = self.query_radius_rows(x, y, r)
+        self.objects.wake(rows)
+        return rows.shape[0]
+
+    def wake_unsupported(self, xs: np.ndarray, ys: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """Wake sleeping objects resting on circles that have moved away.
+
+        ``(xs, ys)`` and ``radii`` describe where the moved objects
+        were.  Sleeping movable objects above the ground that touched
+        one of those circles from above are woken so that they fall if
+        nothing else holds them up.  Returns the rows woken.
+        """
+        objects = self.objects
+        n = objects.count
+        sleeping = np.nonzero(objects._movable[:n] & ~objects._awake[:n]
+                              & (objects._y[:n] > 0.0))[0]
+        if sleeping.size == 0 or xs.shape[0] == 0:
+            return np.empty(0, dtype=np.int64)
+        # Same sorted-x sweep as query_radius_pairs, over sleepers only.
+        sx = objects._x[sleeping]
+        order = np.argsort(sx, kind="stable")
+        sleeping, sx = sleeping[order], sx[order]
+        margin = SUPPORT_MARGIN
+        reach = radii + float(objects._radius[sleeping].max()) + margin
+        starts = np.searchsorted(sx, xs - reach, side="left")
+        counts = np.searchsorted(sx, xs + reach, side="right") - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        query = np.repeat(np.arange(xs.shape[0]), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = sleeping[np.repeat(starts, counts) + offsets]
+        dx = objects._x[rows] - xs[query]
+        dy = objects._y[rows] - ys[query]
+        touching = np.hypot(dx, dy) <= radii[query] + objects._radius[rows] + margin
+        woken = np.unique(rows[touching & (dy > 0.0)])
+        objects.wake(woken)
+        return woken
+
+    def terrain_changed(self, x0: float, x1: float) -> None:
+        """Wake every object whose x lies in ``[x0, x1]``.
+
+        Call this after modifying the ground so that resting objects
+        re-evaluate their support.
+        """
+        xs = self.objects.x
+        self.objects.wake(np.nonzero((xs >= x0) & (xs <= x1))[0])
+
+    def _index_stale(self) -> bool:
+        return (len(self.index) != self.objects.count
+                or self.index._version != self.objects.version)
+
+    def query_radius_rows(self, x: float, y: float, r: float) -> np.ndarray:
+        """Return store rows of objects within ``r`` of ``(x, y)``.
+
+        The index is refreshed on every physics step; objects added or
+        removed since then are picked up here, but positions changed
+        directly through a :class:`WorldObject` are only seen after the
+        next :meth:`update_physics`.
+        """
+        if self._index_stale():
+            self._sync_index()
+        return self.index.query_radius(x, y, r, self.objects.x, self.objects.y)
+
+    def nearest_rows(self, x: float, y: float, k: int) -> np.ndarray:
+        """Return store rows of the ``k`` objects nearest ``(x, y)``."""
+        if self._index_stale():
+            self._sync_index()
+        return self.index.nearest(x, y, k, self.objects.x, self.objects.y)
+
+    def query_radius(self, x: float, y: float, r: float) -> List[WorldObject]:
+        """Return the objects within ``r`` of ``(x, y)``."""
+        views = self.objects._views
+        return [views[row] for row in self.query_radius_rows(x, y, r).tolist()]
+
+    def query_radius_states(self, x: float, y: float, r: float) -> ObjectStates:
+        """Return the states of the objects within ``r`` of ``(x, y)``.
+
+        Unlike :meth:`query_radius` this creates no per-object Python
+        objects.
+        """
+        return ObjectStates.of(self.objects, self.query_radius_rows(x, y, r))
+
+    def query_radius_pairs(self, xs: np.ndarray, ys: np.ndarray,
+                           radii: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(i, row)`` pairs of objects within ``radii[i]`` of ``(xs[i], ys[i])``.
+
+        This answers many radius queries at once: objects are sorted by
+        x and each query scans only the objects whose x lies within its
+        radius, all in a handful of array operations.
+        """
+        objects = self.objects
+        if objects.count == 0 or xs.shape[0] == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        ox, oy = objects.x, objects.y
+        order = np.argsort(ox, kind="stable")
+        sorted_x = ox[order]
+        starts = np.searchsorted(sorted_x, xs - radii, side="left")
+        ends = np.searchsorted(sorted_x, xs + radii, side="right")
+        counts = ends - starts
+        total = int(counts.sum())
+        if total == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        query = np.repeat(np.arange(xs.shape[0]), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = order[np.repeat(starts, counts) + offsets]
+        dx = ox[rows] - xs[query]
+        dy = oy[rows] - ys[query]
+        hit = dx * dx + dy * dy <= radii[query] ** 2
+        return query[hit], rows[hit]
+
+    def nearest(self, x: float, y: float, k: int) -> List[WorldObject]:
+        """Return up to ``k`` objects nearest ``(x, y)``, closest first."""
+        views = self.objects._views
+        return [views[row] for row in self.nearest_rows(x, y, k).tolist()]
+
+    def render(self, surface: "pygame.Surface", alpha: float = 1.0) -> None:
+        """Render the world and its objects (imports the renderer lazily).
+
+        ``alpha`` blends object positions between the previous and the
+        current physics step (1.0 draws the current state).
+        """
+        from renderer import draw_environment
+        draw_environment(surface, self, alpha)
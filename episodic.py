@@ -0,0 +1,255 @@
+"""
+episodic.py
+===========
+
+On-disk episodic memory for the Kama Sona mind.  An
+:class:`EpisodicLog` appends experiences (timestamp, action opcode,
+sentence, reward and a float32 feature vector) as fixed-size binary
+records to a directory of segment files:
+
+* records are written through a buffered file handle and are only
+  ever appended;
+* a segment holds at most ``segment_records`` records, after which a
+  new segment is started;
+* ``index.bin`` lists the first timestamp of every segment, so a time
+  range query only opens the segments that overlap it;
+* segments are read back through read-only ``numpy.memmap``, so the
+  history can be far larger than RAM;
+* sentences are interned in ``sentences.txt``, one per line.
+
+Opening an existing directory resumes the log where it stopped; a
+record cut short by a crash is discarded.  Timestamps are expected to
+be appended in non-decreasing order.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_INDEX_ENTRY = struct.Struct("<qd")  # segment number, first timestamp
+
+
+def record_dtype(feature_size: int) -> np.dtype:
+    """Return the structured dtype of one record."""
+    return np.dtype([("time", "<f8"), ("action", "<i4"), ("sentence", "<i4"),
+                     ("reward", "<f4"), ("features", "<f4", (feature_size,))])
+
+
+class EpisodicLog:
+    """Segmented, append-only, memory-mapped log of experiences."""
+
+    def __init__(self, path: str, feature_size: int = 3,
+                 segment_records: int = 1 << 16, buffer_size: int = 1 << 16) -> None:
+        if segment_records < 1:
+            raise ValueError("segment_records must be positive")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.buffer_size = buffer_size
+        meta_path = os.path.join(path, "log.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            feature_size = meta["feature_size"]
+            segment_records = meta["segment_records"]
+        else:
+            with open(meta_path, "w") as f:
+                json.dump({"feature_size": feature_size,
+                           "segment_records": segment_records}, f)
+        self.feature_size = feature_size
+        self.segment_records = segment_records
+        self.dtype = record_dtype(feature_size)
+        self._record = np.zeros(1, dtype=self.dtype)
+
+        # Sparse time index: segment numbers and their first timestamps.
+        self._segments: List[int] = []
+        self._first_times: List[float] = []
+        self._counts: List[int] = []
+        self._maps: Dict[int, np.memmap] = {}
+        self._load_index()
+
+        self._sentence_tokens: List[List[str]] = []
+        self._sentence_ids: Dict[str, int] = {}
+        sentences = os.path.join(path, "sentences.txt")
+        if os.path.exists(sentences):
+            with open(sentences, encoding="utf-8") as f:
+                for line in f.read().splitlines():
+                    self._intern(line)
+        self._sentences_file = open(sentences, "a", encoding="utf-8")
+        self._index_file = open(os.path.join(path, "index.bin"), "ab")
+        self._file = None
+        if self._segments:
+            self._open_segment(self._segments[-1])
+
+    # -- files --------------------------------------------------------
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"segment_{segment:08d}.bin")
+
+    def _load_index(self) -> None:
+        index_path = os.path.join(self.path, "index.bin")
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, "rb") as f:
+            data = f.read()
+        size = _INDEX_ENTRY.size
+        entries = [_INDEX_ENTRY.unpack_from(data, i) for i in range(0, len(data) - size + 1, size)]
+        for segment, first_time in entries:
+            path = self._segment_path(segment)
+            if not os.path.exists(path):
+                break
+            length = os.path.getsize(path)
+            count = length // self.dtype.itemsize
+            if count * self.dtype.itemsize != length:
+                # A record was cut short (e.g. by a crash): drop it.
+                with open(path, "r+b") as f:
+                    f.truncate(count * self.dtype.itemsize)
+            if count == 0:
+                break
+            self._segments.append(segment)
+            self._first_times.append(first_time)
+            self._counts.append(count)
+        # Rewrite the index so it only lists the segments kept.
+        with open(index_path, "wb") as f:
+            for segment, first_time in zip(self._segments, self._first_times):
+                f.write(_INDEX_ENTRY.pack(segment, first_time))
+
+    def _open_segment(self, segment: int) -> None:
+        self._file = open(self._segment_path(segment), "ab", buffering=self.buffer_size)
+
+    def _rotate(self, time: float) -> None:
+        if self._file is not None:
+            self._file.close()
+        segment = self._segments[-1] + 1 if self._segments else 0
+        self._segments.append(segment)
+        self._first_times.append(time)
+        self._counts.append(0)
+        self._index_file.write(_INDEX_ENTRY.pack(segment, time))
+        self._index_file.flush()
+        self._open_segment(segment)
+
+    def flush(self) -> None:
+        """Push buffered records to the operating system."""
+        if self._file is not None:
+            self._file.flush()
+        self._sentences_file.flush()
+
+    def close(self) -> None:
+        """Flush and close the log."""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._sentences_file.close()
+        self._index_file.close()
+        self._maps.clear()
+
+    def __enter__(self) -> "EpisodicLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- sentences ----------------------------------------------------
+    def _intern(self, text: str) -> int:
+        sid = len(self._sentence_tokens)
+        self._sentence_ids[text] = sid
+        self._sentence_tokens.append(text.split(" ") if text else [])
+        return sid
+
+    def sentence_id(self, tokens: Sequence[str]) -> int:
+        """Return the id of a sentence, interning (and saving) it on first use."""
+        text = " ".join(tokens)
+        sid = self._sentence_ids.get(text)
+        if sid is None:
+            sid = self._intern(text)
+            # Written through at once, so no record on disk can refer
+            # to a sentence that is not.
+            self._sentences_file.write(text + "\n")
+            self._sentences_file.flush()
+        return sid
+
+    def sentence(self, sid: int) -> List[str]:
+        """Return the tokens of sentence ``sid`` (empty if it was never saved)."""
+        if 0 <= sid < len(self._sentence_tokens):
+            return list(self._sentence_tokens[sid])
+        return []
+
+    # -- writing ------------------------------------------------------
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+    def append(self, features: Optional[np.ndarray], action: int, sentence: Sequence[str],
+               reward: float, time: float) -> None:
+        """Append one experience.  ``features`` is truncated or zero-padded."""
+        if not self._segments or self._counts[-1] >= self.segment_records:
+            self._rotate(time)
+        record = self._record[0]
+        record["time"] = time
+        record["action"] = action
+        record["sentence"] = self.sentence_id(sentence)
+        record["reward"] = reward
+        row = record["features"]
+        if features is None:
+            row[:] = 0.0
+        else:
+            m = min(features.shape[0], self.feature_size)
+            row[:m] = features[:m]
+            row[m:] = 0.0
+        self._file.write(self._record.tobytes())
+        self._counts[-1] += 1
+
+    # -- reading ------------------------------------------------------
+    def _map(self, i: int) -> np.ndarray:
+        # Memory map of the i-th segment (re-mapped while it still grows).
+        segment, count = self._segments[i], self._counts[i]
+        cached = self._maps.get(segment)
+        if cached is not None and cached.shape[0] == count:
+            return cached
+        if i == len(self._segments) - 1 and self._file is not None:
+            self._file.flush()
+        mapped = np.memmap(self._segment_path(segment), dtype=self.dtype, mode="r", shape=(count,))
+        self._maps[segment] = mapped
+        return mapped
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Return records ``start`` to ``stop`` (in append order) as a structured array."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        parts = []
+        offset = 0
+        for i, count in enumerate(self._counts):
+            lo, hi = max(start - offset, 0), min(stop - offset, count)
+            if lo < hi:
+                parts.append(np.array(self._map(i)[lo:hi]))
+            offset += count
+            if offset >= stop:
+                break
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype)
+
+    def range(self, t0: float, t1: float = np.inf) -> np.ndarray:
+        """Return the records with ``t0 <= time < t1``, oldest first.
+
+        Only segments whose time span overlaps the range are mapped,
+        and they are searched by bisection on the time column.
+        """
+        first = int(np.searchsorted(self._first_times, t0, side="right")) - 1
+        parts = []
+        for i in range(max(first, 0), len(self._segments)):
+            if self._first_times[i] >= t1:
+                break
+            if self._counts[i] == 0:
+                continue
+            records = self._map(i)
+            times = records["time"]
+            lo = int(np.searchsorted(times, t0, side="left"))
+            hi = int(np.searchsorted(times, t1, side="left"))
+            if lo < hi:
+                parts.append(np.array(records[lo:hi]))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype)
+
+    def last(self, n: int) -> np.ndarray:
+        """Return the ``n`` newest records, oldest first."""
+        return self.read(max(len(self) - n, 0))
@@ -0,0 +1,602 @@
+"""
+events.py
+=========
+
+Event-driven physics for the Kama Sona world.  Objects in the world
+move under constant gravity, so between discrete events their motion
+has a closed form:
+
+* in **flight** an object follows a parabola,
+  ``x = x0 + vx·τ``, ``y = y0 + vy·τ − g·τ²/2``;
+* while **sliding** on the ground, friction decays its speed
+  exponentially, ``x = x0 + vx·(1 − e^(−kτ))/k``.
+
+Instead of integrating every tick, :class:`EventScheduler` records a
+trajectory for each moving object and keeps a priority queue of the
+times at which something discrete happens: an object lands, a sliding
+object comes to rest, or two objects touch.  Advancing time only pops
+the events that are due, and positions are evaluated from the
+trajectories on demand, so an idle world costs nothing and a
+ballistic-heavy one costs one event per impact.
+
+Trajectories are kept like the object store itself, as NumPy columns
+indexed by store row, so that objects woken together are launched,
+and their contacts searched for, in a handful of array operations.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from collision import SUPPORT_MARGIN, WAKE_SPEED, resolve_circle_contacts
+
+# Trajectory modes.
+STATIC, FLIGHT, SLIDE = 0, 1, 2
+# Event kinds.
+IMPACT, REST, CONTACT = 0, 1, 2
+# How far ahead (in seconds) contacts are looked for.
+HORIZON = 60.0
+# Depth (in world units) two objects must sink into each other before
+# their contact is resolved.
+TOLERANCE = 0.1
+
+
+def evaluate(mode: np.ndarray, t0: np.ndarray, x0: np.ndarray, y0: np.ndarray,
+             vx: np.ndarray, vy: np.ndarray, t: np.ndarray,
+             gravity: float, friction: float) -> Tuple[np.ndarray, ...]:
+    """Evaluate trajectories at time ``t`` (all arguments broadcast).
+
+    Returns ``(x, y, vx, vy)`` at that time.
+    """
+    tau = np.maximum(t - t0, 0.0)
+    flight = mode == FLIGHT
+    # Horizontal travel: linear in flight, exponentially damped when
+    # sliding, none for static objects (whose vx is zero).
+    if friction > 0.0 and np.any(mode == SLIDE):
+        decay = np.where(flight, 1.0, np.exp(-friction * tau))
+        dx = np.where(flight, vx * tau, vx * (1.0 - decay) / friction)
+        out_vx = vx * decay
+    else:
+        dx = vx * tau
+        out_vx = vx + 0.0 * tau
+    x = x0 + dx
+    y = np.where(flight, y0 + vy * tau - 0.5 * gravity * tau * tau, y0 + 0.0 * tau)
+    out_vy = np.where(flight, vy - gravity * tau, 0.0)
+    return x, y, out_vx, out_vy
+
+
+def path_bounds(mode: np.ndarray, t0: np.ndarray, x0: np.ndarray, y0: np.ndarray,
+                vx: np.ndarray, vy: np.ndarray, t1: np.ndarray,
+                gravity: float, friction: float) -> Tuple[np.ndarray, ...]:
+    """Return the ``(x_min, x_max, y_min, y_max)`` bounds of trajectories up to ``t1``."""
+    x1, y1, _, _ = evaluate(mode, t0, x0, y0, vx, vy, t1, gravity, friction)
+    # Every coordinate is monotonic except the height of a rising
+    # flight, which peaks where its vertical speed reaches zero.
+    peak = np.clip(vy / gravity, 0.0, np.maximum(t1 - t0, 0.0)) if gravity > 0.0 else 0.0
+    _, y2, _, _ = evaluate(mode, t0, x0, y0, vx, vy, t0 + peak, gravity, friction)
+    return (np.minimum(x0, x1), np.maximum(x0, x1),
+            np.minimum(y0, y1), np.maximum(np.maximum(y0, y1), y2))
+
+
+class EventScheduler:
+    """Time-to-impact event queue for an :class:`environment.Environment`.
+
+    Movable, awake objects are *launched*: their current state becomes
+    the start of a trajectory and the next events are scheduled.  An
+    object that lands with (almost) no horizontal speed, a sliding
+    object whose speed has decayed below the store's
+    ``sleep_velocity``, or one stopped by a contact while resting
+    objects it touches hold it up, goes to sleep and leaves the
+    simulation until something wakes it.
+
+    Contacts are found when objects are launched.  Each path's bounding
+    box is tested against resting objects (through the environment's
+    spatial index) and against the paths of other moving objects, which
+    are bucketed by x-extent into ``lane_width`` wide lanes.  For every
+    pair that may meet, the distance is sampled along both trajectories
+    and the first crossing refined by false position; only the
+    earliest contact of each object is queued, and if the partner
+    changes course before it happens the search is run again from that
+    time.  ``samples`` sets how finely trajectories are sampled; very
+    fast, very small objects can tunnel between samples.  Objects that
+    already overlap only make contact again when they approach each
+    other or sink in further, so objects resting against each other do
+    not keep re-colliding.
+    """
+
+    # Per-row trajectory columns, grown along with the object store.
+    _COLUMNS = ("_flying", "_mode", "_t0", "_x0", "_y0", "_vx", "_vy", "_t_end", "_box", "_gen")
+
+    def __init__(self, env, samples: int = 32, lane_width: float = 256.0) -> None:
+        self.env = env
+        self.samples = samples
+        self.lane_width = lane_width
+        self._lanes: Dict[int, Set[int]] = {}
+        self._lanes_of: Dict[int, range] = {}
+        self.now = env.time
+        # Trajectory of every row, valid where ``_flying`` is set.
+        self._flying = np.zeros(0, dtype=bool)
+        self._mode = np.zeros(0, dtype=np.int8)
+        self._t0 = np.zeros(0)
+        self._x0 = np.zeros(0)
+        self._y0 = np.zeros(0)
+        self._vx = np.zeros(0)
+        self._vy = np.zeros(0)
+        self._t_end = np.zeros(0)
+        # Bounds of the path (x_min, x_max, y_min, y_max), widened by the radius.
+        self._box = np.zeros((0, 4))
+        # Bumped whenever a row's motion changes, so that events queued
+        # for its old motion can be recognised as stale.
+        self._gen = np.zeros(0, dtype=np.int64)
+        self._flying_rows: Optional[np.ndarray] = None
+        self._grow(env.objects.capacity)
+        self._frac = np.linspace(0.0, 1.0, samples)
+        self._queue: List[Tuple[float, int, int, int, int, int, int]] = []
+        self._seq = itertools.count()
+        self._version = env.objects.version
+        self._max_radius = 0.0
+        self.events_processed = 0
+        # Rows whose motion started, changed or ended during the last
+        # advance, in batches (rows may repeat).
+        self.moved: List[np.ndarray] = []
+        env.objects.touched = []
+
+    def _grow(self, capacity: int) -> None:
+        size = self._flying.shape[0]
+        if capacity <= size:
+            return
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:size] = old
+            setattr(self, name, new)
+
+    def flying_rows(self) -> np.ndarray:
+        """Return the rows of all objects in flight or sliding."""
+        if self._flying_rows is None:
+            self._flying_rows = np.nonzero(self._flying)[0]
+        return self._flying_rows
+
+    # -- evaluation ---------------------------------------------------
+    def _motion(self, rows: np.ndarray) -> Tuple[np.ndarray, ...]:
+        # Trajectory parameters of ``rows``; rows not in flight stay put.
+        store = self.env.objects
+        flying = self._flying[rows]
+        return (np.where(flying, self._mode[rows], STATIC),
+                self._t0[rows],
+                np.where(flying, self._x0[rows], store._x[rows]),
+                np.where(flying, self._y0[rows], store._y[rows]),
+                np.where(flying, self._vx[rows], 0.0),
+                np.where(flying, self._vy[rows], 0.0))
+
+    def position_at(self, row: int, t: float) -> Tuple[float, float]:
+        """Return the position of ``row`` at time ``t`` (not after its next event)."""
+        x, y, _, _ = evaluate(*self._motion(np.array([row])), t,
+                              self.env.gravity, self.env.friction)
+        return float(x[0]), float(y[0])
+
+    def materialize(self) -> None:
+        """Write the positions of all moving objects at ``now`` into the store."""
+        rows = self.flying_rows()
+        if rows.size == 0:
+            return
+        x, y, vx, vy = evaluate(*self._motion(rows), self.now, self.env.gravity, self.env.friction)
+        store = self.env.objects
+        store._x[rows] = x
+        store._y[rows] = y
+        store._vx[rows] = vx
+        store._vy[rows] = vy
+        self.env._sync_index(rows)
+
+    def _write_row(self, row: int, t: float) -> None:
+        if not self._flying[row]:
+            return
+        rows = np.array([row])
+        x, y, vx, vy = evaluate(*self._motion(rows), t, self.env.gravity, self.env.friction)
+        self.moved.append(rows)
+        store = self.env.objects
+        store._x[row], store._y[row] = x[0], y[0]
+        store._vx[row], store._vy[row] = vx[0], vy[0]
+        self.env._sync_index(rows)
+
+    # -- scheduling ---------------------------------------------------
+    def advance(self, now: float) -> int:
+        """Process every event due up to ``now``; return how many ran."""
+        store = self.env.objects
+        store.flush()
+        self._grow(store.capacity)
+        if store.version != self._version:
+            self._reset()
+        n = store.count
+        self._max_radius = float(store._radius[:n].max()) if n else 0.0
+        # Objects woken or modified since the last call start new trajectories.
+        touched = np.array(store.touched, dtype=np.int64)
+        store.touched.clear()
+        awake = store.awake_rows()
+        awake = awake[store._movable[awake]]
+        pending = awake[~self._flying[awake]]
+        if touched.size:
+            touched = touched[touched < n]
+            touched = touched[store._movable[touched] & store._awake[touched]]
+            pending = np.union1d(pending, touched)
+        # Renderers interpolate from the previous positions: start them
+        # where everything that moved last time, or may move now, is.
+        previous = np.concatenate([self.flying_rows(), pending] + self.moved)
+        previous = previous[previous < n]
+        store._px[previous] = store._x[previous]
+        store._py[previous] = store._y[previous]
+        self.moved = []
+        if pending.size:
+            self._launch(pending, self.now)
+        processed = 0
+        queue = self._queue
+        gens = self._gen
+        while queue and queue[0][0] <= now:
+            t, _, kind, row, other, gen, other_gen = heapq.heappop(queue)
+            if gens[row] != gen:
+                continue
+            if kind == CONTACT:
+                if gens[other] != other_gen:
+                    # The partner changed course: this was the row's only
+                    # pending contact, so look for the next one from here.
+                    self._schedule_contacts(np.array([row]), start=t)
+                    continue
+                self._contact(row, other, t)
+            elif kind == IMPACT:
+                self._write_row(row, t)
+                store._y[row] = 0.0
+                store._vy[row] = 0.0
+                self._launch(np.array([row]), t)
+            else:
+                self._write_row(row, t)
+                self._sleep(np.array([row]), t)
+            processed += 1
+        self.now = now
+        self.events_processed += processed
+        store.pending = self.materialize if self.flying_rows().size else None
+        return processed
+
+    def _reset(self) -> None:
+        # Rows were reassigned; restart every trajectory from the store.
+        self._flying[:] = False
+        self._flying_rows = None
+        self._lanes.clear()
+        self._lanes_of.clear()
+        self._queue.clear()
+        self.moved = []
+        self._version = self.env.objects.version
+
+    def _launch(self, rows: np.ndarray, t: float) -> None:
+        """Start trajectories for ``rows`` from their state in the store at ``t``."""
+        env = self.env
+        store = env.objects
+        # Rows leaving a resting spot may have been holding up sleeping
+        # objects; wake those and launch them too.
+        resting = rows[~self._flying[rows]]
+        while resting.size:
+            resting = env.wake_unsupported(store._x[resting], store._y[resting],
+                                           store._radius[resting])
+            rows = np.concatenate([rows, resting])
+        self._drop(rows)
+        self.moved.append(rows)
+        x, y = store._x[rows], store._y[rows]
+        vx, vy = store._vx[rows], store._vy[rows]
+        grounded = (y <= 0.0) & (vy <= 0.0)
+        y = store._y[rows] = np.where(grounded, 0.0, y)
+        vy = store._vy[rows] = np.where(grounded, 0.0, vy)
+        limit = store.sleep_velocity
+        still = grounded & (np.abs(vx) < limit)
+        if still.any():
+            self._sleep(rows[still], t)
+            keep = ~still
+            rows, x, y, vx, vy, grounded = rows[keep], x[keep], y[keep], vx[keep], vy[keep], grounded[keep]
+            if rows.size == 0:
+                return
+
+        gravity, friction = env.gravity, env.friction
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if friction > 0.0:
+                slide_end = t + np.log(np.abs(vx) / limit) / friction
+            else:
+                slide_end = np.full(rows.shape[0], math.inf)
+            if gravity > 0.0:
+                flight_end = t + (vy + np.sqrt(vy * vy + 2.0 * gravity * np.maximum(y, 0.0))) / gravity
+            else:
+                flight_end = np.where(vy < 0.0, t - y / vy, math.inf)
+        t_end = np.where(grounded, slide_end, flight_end)
+        mode = np.where(grounded, SLIDE, FLIGHT)
+        self._flying[rows] = True
+        self._flying_rows = None
+        self._mode[rows] = mode
+        self._t0[rows] = t
+        self._x0[rows] = x
+        self._y0[rows] = y
+        self._vx[rows] = vx
+        self._vy[rows] = vy
+        self._t_end[rows] = t_end
+        self._gen[rows] += 1
+        bounds = path_bounds(mode, t, x, y, vx, vy, np.minimum(t_end, t + HORIZON),
+                             gravity, friction)
+        radius = store._radius[rows]
+        box = self._box
+        box[rows, 0] = bounds[0] - radius
+        box[rows, 1] = bounds[1] + radius
+        box[rows, 2] = bounds[2] - radius
+        box[rows, 3] = bounds[3] + radius
+        self._enter_lanes(rows)
+
+        kinds = np.where(grounded, REST, IMPACT)
+        finite = np.nonzero(t_end < math.inf)[0]
+        self._push([(float(t_end[i]), next(self._seq), int(kinds[i]), int(rows[i]), -1,
+                     int(self._gen[rows[i]]), 0) for i in finite.tolist()])
+        self._schedule_contacts(rows)
+
+    def _push(self, events: List[Tuple[float, int, int, int, int, int, int]]) -> None:
+        queue = self._queue
+        if len(events) * 8 < len(queue):
+            for event in events:
+                heapq.heappush(queue, event)
+        elif events:
+            queue.extend(events)
+            heapq.heapify(queue)
+
+    def _sleep(self, rows: np.ndarray, t: float) -> None:
+        store = self.env.objects
+        self._drop(rows)
+        self.moved.append(rows)
+        store._vx[rows] = 0.0
+        store._vy[rows] = 0.0
+        store._awake[rows] = False
+        store._rest[rows] = 0.0
+        store._awake_rows = None
+        self.env._sync_index(rows)
+        # Movers may have been counting on the rows' old motion; look
+        # for their contacts with the resting spots instead.
+        x, y, radius = store._x[rows], store._y[rows], store._radius[rows]
+        query, movers = self._movers_near(np.column_stack([x - radius, x + radius,
+                                                           y - radius, y + radius]))
+        if movers.size:
+            self._queue_contacts(movers, rows[query], np.full(movers.shape[0], t))
+
+    def _drop(self, rows: np.ndarray) -> None:
+        # Forget the trajectories of ``rows`` and take them out of their lanes.
+        lanes = self._lanes
+        for row in rows[self._flying[rows]].tolist():
+            for lane in self._lanes_of.pop(row, ()):
+                bucket = lanes[lane]
+                bucket.discard(row)
+                if not bucket:
+                    del lanes[lane]
+        self._flying[rows] = False
+        self._flying_rows = None
+        self._gen[rows] += 1
+
+    def _enter_lanes(self, rows: np.ndarray) -> None:
+        width = self.lane_width
+        first = np.floor(self._box[rows, 0] / width).astype(np.int64)
+        last = np.floor(self._box[rows, 1] / width).astype(np.int64)
+        lanes = self._lanes
+        for row, lo, hi in zip(rows.tolist(), first.tolist(), last.tolist()):
+            span = range(lo, hi + 1)
+            self._lanes_of[row] = span
+            for lane in span:
+                bucket = lanes.get(lane)
+                if bucket is None:
+                    lanes[lane] = {row}
+                else:
+                    bucket.add(row)
+
+    def _contact(self, row: int, other: int, t: float) -> None:
+        store = self.env.objects
+        self._write_row(row, t)
+        self._write_row(other, t)
+        a = np.array([row], dtype=np.int64)
+        b = np.array([other], dtype=np.int64)
+        resolve_circle_contacts(store, a, b, self.env.restitution)
+        # The lower object first: whether the upper one is held up
+        # depends on whether the lower one comes to rest.
+        for r in sorted((row, other), key=lambda r: store._y[r]):
+            if not (store._movable[r] and store._awake[r]):
+                continue
+            rows = np.array([r], dtype=np.int64)
+            if self._held(r):
+                self._sleep(rows, t)
+            else:
+                self._launch(rows, t)
+
+    def _held(self, row: int) -> bool:
+        """Return whether resting objects it touches stop ``row``.
+
+        Only static and sleeping objects count as support.  One support
+        below stops the object if it sits so nearly on top that the
+        object would slide off slower than the store's sleep threshold,
+        and it is moving slower than ``WAKE_SPEED``.  Supports pushing
+        from both sides wedge it if together they can carry its weight;
+        then only rising faster than that frees it.
+        """
+        env = self.env
+        store = env.objects
+        x, y, radius = float(store._x[row]), float(store._y[row]), float(store._radius[row])
+        near = env.query_radius_rows(x, y, radius + self._max_radius + SUPPORT_MARGIN)
+        near = near[(near != row) & ~self._flying[near]]
+        if near.size == 0:
+            return False
+        dx = x - store._x[near]
+        dy = y - store._y[near]
+        dist = np.hypot(dx, dy)
+        touching = (dist > 0.0) & (dist <= radius + store._radius[near] + SUPPORT_MARGIN)
+        if not touching.any():
+            return False
+        nx = dx[touching] / dist[touching]
+        ny = dy[touching] / dist[touching]
+        right, left = nx > 0.0, nx < 0.0
+        if right.any() and left.any():
+            # The steepest normal from each side; they carry the weight
+            # if "up" lies between them.
+            a = np.argmax(np.where(right, ny, -np.inf))
+            b = np.argmax(np.where(left, ny, -np.inf))
+            if nx[a] * ny[b] - ny[a] * nx[b] > 0.0:
+                return bool(store._vy[row] < WAKE_SPEED)
+        below = ny > 0.0
+        if not below.any():
+            return False
+        slope = np.abs(nx[below]).min() * env.gravity * store.sleep_delay
+        speed = math.hypot(store._vx[row], store._vy[row])
+        return bool(slope < store.sleep_velocity and speed < WAKE_SPEED)
+
+    # -- contact search -------------------------------------------------
+    def _movers_near(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(i, row)`` pairs of moving rows whose paths may enter ``boxes[i]``."""
+        flying = self.flying_rows()
+        empty = np.empty(0, dtype=np.int64)
+        if flying.size == 0 or boxes.shape[0] == 0:
+            return empty, empty
+        if boxes.shape[0] <= 8:
+            # A few boxes: gather candidates from the lanes they cover.
+            width = self.lane_width
+            lanes = self._lanes
+            query: List[int] = []
+            rows: List[int] = []
+            for i, (x0, x1) in enumerate(boxes[:, :2].tolist()):
+                found: Set[int] = set()
+                for lane in range(int(math.floor(x0 / width)), int(math.floor(x1 / width)) + 1):
+                    bucket = lanes.get(lane)
+                    if bucket:
+                        found |= bucket
+                query.extend([i] * len(found))
+                rows.extend(found)
+            query_arr = np.array(query, dtype=np.int64)
+            rows_arr = np.array(rows, dtype=np.int64)
+        else:
+            # Many boxes: sweep them against every path sorted by x_min.
+            paths = self._box[flying]
+            order = np.argsort(paths[:, 0], kind="stable")
+            starts_x = paths[order, 0]
+            widest = float((paths[:, 1] - paths[:, 0]).max())
+            starts = np.searchsorted(starts_x, boxes[:, 0] - widest, side="left")
+            counts = np.searchsorted(starts_x, boxes[:, 1], side="right") - starts
+            total = int(counts.sum())
+            if total == 0:
+                return empty, empty
+            query_arr = np.repeat(np.arange(boxes.shape[0]), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            rows_arr = flying[order[np.repeat(starts, counts) + offsets]]
+        if rows_arr.size == 0:
+            return empty, empty
+        paths = self._box[rows_arr]
+        box = boxes[query_arr]
+        hit = ((paths[:, 0] <= box[:, 1]) & (paths[:, 1] >= box[:, 0])
+               & (paths[:, 2] <= box[:, 3]) & (paths[:, 3] >= box[:, 2]))
+        return query_arr[hit], rows_arr[hit]
+
+    def _resting_near(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(i, row)`` pairs of resting rows that overlap ``boxes[i]``."""
+        env = self.env
+        store = env.objects
+        cx = 0.5 * (boxes[:, 0] + boxes[:, 1])
+        cy = 0.5 * (boxes[:, 2] + boxes[:, 3])
+        reach = 0.5 * np.hypot(boxes[:, 1] - boxes[:, 0], boxes[:, 3] - boxes[:, 2]) + self._max_radius
+        if boxes.shape[0] == 1:
+            rows = env.query_radius_rows(float(cx[0]), float(cy[0]), float(reach[0]))
+            query = np.zeros(rows.shape[0], dtype=np.int64)
+        else:
+            query, rows = env.query_radius_pairs(cx, cy, reach)
+        keep = ~self._flying[rows]
+        query, rows = query[keep], rows[keep]
+        x, y, radius = store._x[rows], store._y[rows], store._radius[rows]
+        box = boxes[query]
+        hit = ((x - radius <= box[:, 1]) & (x + radius >= box[:, 0])
+               & (y - radius <= box[:, 3]) & (y + radius >= box[:, 2]))
+        return query[hit], rows[hit]
+
+    def _schedule_contacts(self, rows: np.ndarray, start: Optional[float] = None) -> None:
+        """Queue the first contact of each of ``rows`` along its trajectory, if any.
+
+        The search covers each trajectory from ``start`` (its launch time
+        by default) up to its end.
+        """
+        boxes = self._box[rows]
+        mq, movers = self._movers_near(boxes)
+        rq, resting = self._resting_near(boxes)
+        query = np.concatenate([mq, rq])
+        others = np.concatenate([movers, resting])
+        a = rows[query]
+        keep = others != a
+        a, others = a[keep], others[keep]
+        if a.size == 0:
+            return
+        begin = self._t0[a] if start is None else np.full(a.shape[0], start)
+        self._queue_contacts(a, others, begin)
+
+    def _queue_contacts(self, a: np.ndarray, b: np.ndarray, start: np.ndarray) -> None:
+        """Queue the earliest contact of each moving row in ``a`` with its partner in ``b``.
+
+        Every pair ``(a[i], b[i])`` is searched from ``start[i]`` until
+        either trajectory ends.
+        """
+        env = self.env
+        store = env.objects
+        gravity, friction = env.gravity, env.friction
+        end = np.minimum(self._t_end[a], self._t0[a] + HORIZON)
+        end = np.where(self._flying[b], np.minimum(end, self._t_end[b]), end)
+        live = end > start
+        if not live.all():
+            a, b, start, end = a[live], b[live], start[live], end[live]
+            if a.size == 0:
+                return
+        motion_a = self._motion(a)
+        motion_b = self._motion(b)
+        reach = store._radius[a] + store._radius[b]
+
+        def gap(t: np.ndarray, pairs=slice(None)) -> np.ndarray:
+            # Distance between the surfaces of each pair at times ``t``.
+            shape = (slice(None),) + (None,) * (t.ndim - 1)
+            ax, ay, _, _ = evaluate(*(m[pairs][shape] for m in motion_a), t, gravity, friction)
+            bx, by, _, _ = evaluate(*(m[pairs][shape] for m in motion_b), t, gravity, friction)
+            return np.hypot(ax - bx, ay - by) - reach[pairs][shape]
+
+        frac = self._frac
+        if frac.shape[0] != self.samples:
+            frac = self._frac = np.linspace(0.0, 1.0, self.samples)
+        grid = start[:, None] + (end - start)[:, None] * frac[None, :]
+        g = gap(grid)
+        # A contact is an entry deeper than TOLERANCE.  Pairs already in
+        # deeper than that touch straight away if they are still closing
+        # in, and otherwise only once they sink in further.
+        depth = np.minimum(-TOLERANCE, g[:, 0] - TOLERANCE)
+        closing = (g[:, 0] <= -TOLERANCE) & (g[:, 1] < g[:, 0])
+        crossing = (g[:, :-1] > depth[:, None]) & (g[:, 1:] <= depth[:, None])
+        hit = crossing.any(axis=1)
+        when = np.where(closing, start, math.inf)
+        idx = np.nonzero(hit & ~closing)[0]
+        if idx.size:
+            first = np.argmax(crossing[idx], axis=1)
+            lo = grid[idx, first]
+            hi = grid[idx, first + 1]
+            f_lo = g[idx, first] - depth[idx]
+            f_hi = g[idx, first + 1] - depth[idx]
+            # A few false-position steps, keeping the contact bracketed.
+            for _ in range(4):
+                mid = lo + (hi - lo) * f_lo / (f_lo - f_hi)
+                f_mid = gap(mid, idx) - depth[idx]
+                inside = f_mid <= 0.0
+                hi = np.where(inside, mid, hi)
+                f_hi = np.where(inside, f_mid, f_hi)
+                lo = np.where(inside, lo, mid)
+                f_lo = np.where(inside, f_lo, f_mid)
+            when[idx] = hi
+        found = np.nonzero(when < math.inf)[0]
+        if found.size == 0:
+            return
+        # The earliest contact of each row.
+        order = found[np.lexsort((when[found], a[found]))]
+        rows, first = np.unique(a[order], return_index=True)
+        chosen = order[first]
+        gens = self._gen
+        self._push([(float(when[i]), next(self._seq), CONTACT, int(a[i]), int(b[i]),
+                     int(gens[a[i]]), int(gens[b[i]])) for i in chosen.tolist()])
@@ -12,11 +12,16 @@ such as ``li``, ``e`` and ``o``.
 
 from __future__ import annotations
 
-from typing import List, Tuple, Optional
+from typing import Iterable, List, Tuple, Optional
 
 
 class TokiPonaGrammar:
-    """Minimal grammar and lexicon for Toki Pona."""
+    """Minimal grammar and lexicon for Toki Pona.
+
+    Each grammar has its own set of ``verbs``, starting from the class
+    lexicon plus any ``extra_verbs``, so adding a verb to one grammar
+    (see ``actions.VerbRegistry``) leaves the others unchanged.
+    """
 
     # A small lexicon of words grouped by category.  This can be
     # expanded to include all official root words.
@@ -25,6 +30,10 @@ class TokiPonaGrammar:
     objects = {"kili", "ma", "tomo", "supa"}
     particles = {"li", "e", "o", "la", "pi"}
 
+    def __init__(self, extra_verbs: Iterable[str] = ()) -> None:
+        self.verbs = set(type(self).verbs)
+        self.verbs.update(extra_verbs)
+
     def validate(self, tokens: List[str]) -> bool:
         """Validate a token sequence against basic Toki Pona grammar.
 
@@ -1,5 +1,5 @@
 """
-Entry point for the Kama Sona simulation game.
+Entry point for the Kama Sona simulation game.
 
 This script initialises the environment, agent and mind and runs the
 main game loop.  The game uses Pygame for rendering and event handling,
@@ -7,66 +7,134 @@ but this file only contains the high‑level loop; details of the
 environment and agent behaviour are defined in separate modules.
 
 See environment.py for the 2D world implementation and agent.py for
-the agent and mind integration.
+the agent and mind integration.  Physics and agent decisions advance
+in fixed steps (see scheduler.py) independently of the render rate.
+Pygame is only imported (via renderer.py) when a window is opened, so
+``python main.py --headless`` runs on machines without SDL.
 """
 
-import pygame
+import argparse
+from typing import List, Optional, Tuple
+
 from environment import Environment
 from agent import Agent
 from mind import Mind
 from grammar import TokiPonaGrammar
 from personality import Personality
+from population import AgentPopulation
+from scheduler import DecisionScheduler, FixedStepScheduler
 
 
-def main() -> None:
-    """Run the simulation until the user closes the window."""
-    # Initialise Pygame and create a window
-    pygame.init()
-    width, height = 800, 600
-    screen = pygame.display.set_mode((width, height))
-    pygame.display.set_caption("Kama Sona Simulation")
-
-    # Create environment and agent
-    env = Environment(width=width, height=height)
+def build_world(width: int = 800, height: int = 600,
+                seed: Optional[int] = None) -> Tuple[Environment, Agent]:
+    """Create the environment and a single agent with its mind."""
+    env = Environment(width=width, height=height, seed=seed)
     grammar = TokiPonaGrammar()
     personality = Personality(openness=0.5, conscientiousness=0.5,
                               extraversion=0.5, agreeableness=0.5,
                               neuroticism=0.5)
     mind = Mind(grammar=grammar, personality=personality)
     agent = Agent(env=env, mind=mind)
+    return env, agent
+
+
+def step(env: Environment, agent: Agent, scheduler: FixedStepScheduler,
+         frame_dt: float, cadence: Optional[DecisionScheduler] = None) -> Optional[List[str]]:
+    """Advance the simulation by ``frame_dt`` seconds of wall-clock time.
+
+    If ``cadence`` is given, the agent only consults its mind on the
+    decision steps it schedules and repeats its last action otherwise.
+    Returns the last sentence spoken during this frame, if any.
+    """
+    toki_sentence = None
+    physics_steps, decision_steps = scheduler.advance(frame_dt)
+    for _ in range(physics_steps):
+        env.update_physics(scheduler.physics_dt)
+    for _ in range(decision_steps):
+        decide = cadence is None or bool(cadence.due()[0])
+        toki_sentence = agent.update(scheduler.decision_dt, decide=decide)
+    if decision_steps:
+        env.update_chunks([agent.x])
+    return toki_sentence
+
+
+def run_headless(steps: int, physics_hz: float = 240.0, decision_hz: float = 60.0,
+                 seed: Optional[int] = None) -> Optional[List[str]]:
+    """Run ``steps`` physics steps without a window.
+
+    Returns the last sentence produced by the agent.
+    """
+    env, agent = build_world(seed=seed)
+    scheduler = FixedStepScheduler(physics_hz=physics_hz, decision_hz=decision_hz)
+    cadence = DecisionScheduler(1)
+    toki_sentence = None
+    for _ in range(steps):
+        toki_sentence = step(env, agent, scheduler, scheduler.physics_dt, cadence) or toki_sentence
+    return toki_sentence
+
+
+def run_population(steps: int, agents: int, physics_hz: float = 240.0,
+                   decision_hz: float = 60.0, seed: Optional[int] = None) -> AgentPopulation:
+    """Run ``steps`` physics steps of ``agents`` agents without a window."""
+    env = Environment(width=800, height=600, seed=seed)
+    population = AgentPopulation.random(env, agents, seed=seed)
+    scheduler = FixedStepScheduler(physics_hz=physics_hz, decision_hz=decision_hz)
+    cadence = DecisionScheduler(agents)
+    for _ in range(steps):
+        physics_steps, decision_steps = scheduler.advance(scheduler.physics_dt)
+        for _ in range(physics_steps):
+            env.update_physics(scheduler.physics_dt)
+        for _ in range(decision_steps):
+            population.update(scheduler.decision_dt, due=cadence.due())
+        if decision_steps:
+            env.update_chunks(population.x.tolist())
+    return population
+
+
+def main(physics_hz: float = 240.0, decision_hz: float = 60.0, fps: int = 60,
+         seed: Optional[int] = None) -> None:
+    """Run the simulation until the user closes the window.
+
+    ``physics_hz`` and ``decision_hz`` set the fixed simulation rates
+    for physics and agent decisions; ``fps`` caps the render rate.
+    Passing ``seed`` creates an unbounded, chunk-generated world.
+    """
+    # Only now is Pygame needed.
+    from renderer import PygameRenderer
 
-    # Clock for frame rate control
-    clock = pygame.time.Clock()
-
-    running = True
-    while running:
-        dt = clock.tick(60) / 1000.0  # delta time in seconds
-
-        # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            # Additional input handling (e.g., chat) can be added here.
-
-        # Update physics and agent
-        env.update_physics(dt)
-        toki_sentence = agent.update(dt)
-
-        # Clear screen and draw environment
-        screen.fill((255, 255, 255))  # white background
-        env.render(screen)
-        agent.render(screen)
-
-        # Render the agent's utterance as text at bottom of screen
-        if toki_sentence:
-            font = pygame.font.SysFont(None, 24)
-            text_surface = font.render(" ".join(toki_sentence), True, (0, 0, 0))
-            screen.blit(text_surface, (10, height - 30))
+    width, height = 800, 600
+    renderer = PygameRenderer(width, height)
+    env, agent = build_world(width, height, seed=seed)
+    scheduler = FixedStepScheduler(physics_hz=physics_hz, decision_hz=decision_hz)
+    cadence = DecisionScheduler(1)
+    # The only agent is always on camera, so it decides at full rate.
+    cadence.promote(0)
+    toki_sentence = None
 
-        pygame.display.flip()
+    while renderer.poll():
+        frame_dt = renderer.tick(fps)  # wall-clock time in seconds
+        toki_sentence = step(env, agent, scheduler, frame_dt, cadence) or toki_sentence
+        renderer.draw(env, [agent], toki_sentence,
+                      alpha=scheduler.alpha, agent_alpha=scheduler.decision_alpha)
 
-    pygame.quit()
+    renderer.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Kama Sona simulation")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate without opening a window")
+    parser.add_argument("--steps", type=int, default=2400,
+                        help="physics steps to run in headless mode")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="generate an unbounded world from this seed")
+    parser.add_argument("--agents", type=int, default=1,
+                        help="number of agents in headless mode (vectorised if > 1)")
+    args = parser.parse_args()
+    if args.headless and args.agents > 1:
+        population = run_population(args.steps, args.agents, seed=args.seed)
+        print(" ".join(population.sentence(0)))
+    elif args.headless:
+        print(" ".join(run_headless(args.steps, seed=args.seed) or []))
+    else:
+        main(seed=args.seed)
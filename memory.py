@@ -0,0 +1,140 @@
+"""
+memory.py
+=========
+
+Bounded experience memory for the Kama Sona mind.  An
+:class:`ExperienceBuffer` is a fixed-capacity ring buffer stored as
+columns of NumPy arrays: an encoded perception (a float32 feature
+vector), the action opcode, an interned sentence id, the reward and a
+timestamp.  Appending is O(1) and never allocates; once the buffer is
+full the oldest experience is overwritten.  Ranges of experiences are
+read back as whole column slices.
+
+Positions in the buffer are logical: 0 is the oldest experience still
+held and ``len(buffer) - 1`` the newest.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+COLUMNS = ("features", "actions", "sentences", "rewards", "times")
+
+
+class ExperienceBuffer:
+    """Fixed-capacity columnar ring buffer of experiences."""
+
+    def __init__(self, capacity: int = 4096, feature_size: int = 3) -> None:
+        if capacity < 1 or feature_size < 0:
+            raise ValueError("capacity must be positive and feature_size non-negative")
+        self.capacity = capacity
+        self.feature_size = feature_size
+        self.features = np.zeros((capacity, feature_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int32)
+        self.sentences = np.zeros(capacity, dtype=np.int32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self._next = 0  # slot the next experience is written to
+        self._count = 0
+        # Number of experiences ever appended.
+        self.total = 0
+        # Interned sentences: id -> tokens and text -> id.
+        self._sentence_tokens: List[List[str]] = []
+        self._sentence_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    # -- sentences ----------------------------------------------------
+    def sentence_id(self, tokens: Sequence[str]) -> int:
+        """Return the id of a sentence, interning it on first use."""
+        text = " ".join(tokens)
+        sid = self._sentence_ids.get(text)
+        if sid is None:
+            sid = len(self._sentence_tokens)
+            self._sentence_ids[text] = sid
+            self._sentence_tokens.append(list(tokens))
+        return sid
+
+    def sentence(self, sid: int) -> List[str]:
+        """Return the tokens of the sentence with id ``sid``."""
+        return list(self._sentence_tokens[sid])
+
+    # -- writing ------------------------------------------------------
+    def append(self, features: Optional[np.ndarray], action: int, sentence: int,
+               reward: float, time: float) -> int:
+        """Store one experience, overwriting the oldest when full.
+
+        ``features`` is truncated or zero-padded to ``feature_size``.
+        Returns the physical slot the experience was written to.
+        """
+        slot = self._next
+        row = self.features[slot]
+        if features is None:
+            row[:] = 0.0
+        else:
+            m = min(features.shape[0], self.feature_size)
+            row[:m] = features[:m]
+            row[m:] = 0.0
+        self.actions[slot] = action
+        self.sentences[slot] = sentence
+        self.rewards[slot] = reward
+        self.times[slot] = time
+        self._next = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.total += 1
+        return slot
+
+    def clear(self) -> None:
+        self._next = 0
+        self._count = 0
+
+    def discard(self, n: int) -> np.ndarray:
+        """Drop the ``n`` oldest experiences and return their physical slots."""
+        n = min(max(n, 0), self._count)
+        first = (self._next - self._count) % self.capacity
+        self._count -= n
+        return np.arange(first, first + n) % self.capacity
+
+    # -- reading ------------------------------------------------------
+    def _slots(self, start: int, stop: int) -> np.ndarray | slice:
+        # Physical slots of logical positions [start, stop).
+        first = (self._next - self._count) % self.capacity
+        a, b = first + start, first + stop
+        if b <= self.capacity:
+            return slice(a, b)
+        return np.arange(a, b) % self.capacity
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Return the columns of experiences ``start`` to ``stop`` (logical).
+
+        Negative positions count from the newest experience, as with
+        list slicing.  The arrays are copies, oldest first.
+        """
+        start, stop, _ = slice(start, stop).indices(self._count)
+        stop = max(stop, start)
+        slots = self._slots(start, stop)
+        return {name: getattr(self, name)[slots].copy() for name in COLUMNS}
+
+    def slots_of(self, positions: np.ndarray) -> np.ndarray:
+        """Return the physical slots of logical ``positions``."""
+        first = (self._next - self._count) % self.capacity
+        return (first + positions) % self.capacity
+
+    def gather(self, slots: np.ndarray) -> Dict[str, np.ndarray]:
+        """Return the columns of the experiences at physical ``slots``."""
+        return {name: getattr(self, name)[slots] for name in COLUMNS}
+
+    def last(self, n: int) -> Dict[str, np.ndarray]:
+        """Return the ``n`` newest experiences, oldest first."""
+        return self.read(max(self._count - n, 0))
+
+    def since(self, time: float) -> Dict[str, np.ndarray]:
+        """Return the experiences recorded at or after ``time``.
+
+        Assumes timestamps were appended in non-decreasing order.
+        """
+        times = self.times[self._slots(0, self._count)]
+        return self.read(int(np.searchsorted(times, time, side="left")))
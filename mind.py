@@ -10,55 +10,362 @@ utterances.
 
 from __future__ import annotations
 
-import random
-from typing import List, Tuple, Any
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
+
+from actions import verbs
+from consolidation import Consolidator, Summary
 from grammar import TokiPonaGrammar
 from personality import Personality
+from prioritized import PrioritizedReplayBuffer
+from qlearning import QTable
 from emotion import Emotion
+from episodic import EpisodicLog
+from memory import ExperienceBuffer
+from perception import PerceptionEncoder
+from recall import RecallIndex
 
 
 class Subconscious:
-    """Low‑level memory and associative processing."""
+    """Low‑level memory and associative processing.
+
+    Experiences are kept in a bounded :class:`memory.ExperienceBuffer`
+    of ``capacity`` entries; perceptions are stored as their feature
+    vector (``perception["features"]``) or, without one, as position
+    and sunlight.
+
+    With an ``episodic`` log (:class:`episodic.EpisodicLog`) every
+    experience is also appended to disk, and the full history outlives
+    the buffer and the process.  A log that already holds experiences
+    is resumed: its newest ``capacity`` experiences are loaded back into
+    the buffer.
+
+    The buffer's feature vectors are indexed by a
+    :class:`recall.RecallIndex`, so :meth:`recall` finds the past
+    experiences most similar to a perception without scanning memory.
+
+    With a ``consolidator`` (:class:`consolidation.Consolidator`) the
+    oldest experiences are periodically folded into its summary on a
+    background thread and evicted from memory and the index.
+
+    With ``prioritized`` set, :attr:`priorities` is a
+    :class:`prioritized.PrioritizedReplayBuffer` over the memory that
+    each new experience enters with a priority given by its reward.
 
-    def __init__(self) -> None:
-        # Keep a simple memory of past perceptions and actions
-        self.memory: List[Tuple[dict, List[str], List[str], float]] = []
+    Feature vectors must have ``feature_size`` entries (that of the
+    perception encoder, if one is used); a log, consolidator or
+    perception of another size raises ValueError rather than being
+    truncated.
+    """
+
+    def __init__(self, capacity: int = 4096, feature_size: int = 3,
+                 episodic: Optional[EpisodicLog] = None, recall_width: float = 16.0,
+                 consolidator: Optional[Consolidator] = None, prioritized: bool = False) -> None:
+        for part in (episodic, consolidator):
+            if part is not None and part.feature_size != feature_size:
+                raise ValueError(f"{type(part).__name__} holds {part.feature_size} features, "
+                                 f"memory expects {feature_size}")
+        # Keep a bounded memory of past perceptions and actions
+        self.memory = ExperienceBuffer(capacity, feature_size)
+        self.index = RecallIndex(feature_size, capacity, width=recall_width)
+        self._scratch = np.zeros(3, dtype=np.float32)
+        self._steps = 0
+        self.episodic = episodic
+        self.consolidator = consolidator
+        self.priorities = PrioritizedReplayBuffer(self.memory) if prioritized else None
+        if episodic is not None and len(episodic):
+            self.resume()
+
+    def resume(self) -> None:
+        """Reload the newest experiences of the episodic log into memory."""
+        log = self.episodic
+        memory = self.memory
+        memory.clear()
+        self.index.clear()
+        if self.priorities is not None:
+            self.priorities.clear()
+        for record in log.last(memory.capacity):
+            sid = memory.sentence_id(log.sentence(int(record["sentence"])))
+            self._store(record["features"], int(record["action"]), sid,
+                        float(record["reward"]), float(record["time"]))
+        self._steps = len(log)
+
+    def _store(self, features: np.ndarray, opcode: int, sid: int,
+               reward: float, time: float) -> None:
+        slot = self.memory.append(features, opcode, sid, reward, time)
+        self.index.insert(slot, self.memory.features[slot])
+        if self.priorities is not None:
+            self.priorities.add(slot)
+        if self.consolidator is not None:
+            evicted = self.consolidator.submit(self.memory)
+            for row in evicted.tolist():
+                self.index.remove(row)
+            if self.priorities is not None and evicted.size:
+                self.priorities.remove(evicted)
+
+    def _features(self, perception: dict) -> np.ndarray:
+        features = perception.get("features")
+        if features is None:
+            features = self._scratch
+            features[0], features[1] = perception.get("position", (0.0, 0.0))
+            features[2] = perception.get("sunlight", 0.0)
+        elif features.shape[0] != self.memory.feature_size:
+            raise ValueError(f"perception has {features.shape[0]} features, "
+                             f"memory expects {self.memory.feature_size}")
+        return features
 
     def process(self, perception: dict) -> Any:
         """Process perception and return a latent state.
 
         In a real implementation, this would update neural state or
         integrate sensor data.  For now we just return the perception.
+        Incremental perceptions (see ``Agent.perceive``) carry the
+        agent's world model and the latest changes instead of a list
+        of objects, and are passed through the same way.
         """
         return perception
 
+    def recall(self, perception: dict, k: int = 5) -> Dict[str, np.ndarray]:
+        """Return the ``k`` remembered experiences most similar to ``perception``.
+
+        Similarity is Euclidean distance between feature vectors; the
+        result holds the memory columns (see :data:`memory.COLUMNS`)
+        and ``"distances"``, most similar first.  The search is
+        approximate, so fewer than ``k`` experiences may be returned.
+        """
+        features = self._features(perception)
+        slots, distances = self.index.query(features, self.memory.features, k)
+        recalled = self.memory.gather(slots)
+        recalled["distances"] = distances
+        return recalled
+
+    def recall_summary(self, perception: dict, k: int = 1) -> Dict[str, np.ndarray]:
+        """Return the ``k`` consolidated buckets nearest ``perception``.
+
+        The result holds the buckets' ``prototypes``, action ``counts``,
+        ``mean_rewards`` (see :class:`consolidation.Summary`) and
+        ``distances``, nearest first.  Empty without a consolidator.
+        """
+        if self.consolidator is None:
+            summary = Summary.empty(self.memory.feature_size, 0)
+        else:
+            summary = self.consolidator.summary
+        rows, distances = summary.nearest(self._features(perception), k)
+        return {"prototypes": summary.prototypes[rows], "counts": summary.counts[rows],
+                "mean_rewards": summary.mean_rewards()[rows], "distances": distances}
+
     def record(self, perception: dict, sentence: List[str], action: List[str], reward: float) -> None:
-        """Record an experience for potential future learning."""
-        self.memory.append((perception, sentence, action, reward))
+        """Record an experience for potential future learning.
+
+        The experience is timestamped with ``perception["time"]`` if
+        present, otherwise with the number of experiences recorded.
+        """
+        features = self._features(perception)
+        opcode = verbs.compile(action)
+        time = perception.get("time", self._steps)
+        self._store(features, opcode, self.memory.sentence_id(sentence), reward, time)
+        if self.episodic is not None:
+            self.episodic.append(features, opcode, sentence, reward, time)
+        self._steps += 1
 
 
 class Superego:
-    """High‑level normative reasoning based on reinforcement."""
+    """High‑level normative reasoning based on reinforcement.
+
+    The strength of each action is held in a fixed-capacity rule table
+    of NumPy arrays.  Actions are interned: an action's id is the row
+    it occupies, and stays valid until the rule is released or evicted.
+    Positive rewards strengthen an action and negative rewards weaken
+    it; a rule whose weight drops to zero or below is released.
+
+    With a ``half_life``, weights decay exponentially with time.  Decay
+    is applied lazily: each rule keeps the time it was last updated and
+    its weight is decayed when read.  When the table is full, a new
+    action evicts the least frequently used rule (``policy="lfu"``,
+    ties broken by recency) or the least recently used one
+    (``policy="lru"``).
+
+    With a ``q`` table (:class:`qlearning.QTable`) the Superego also
+    learns state-dependent action values: :meth:`choose` picks an
+    action for a perception (greedily, or by softmax when
+    ``temperature`` is positive) and the reward later passed to
+    :meth:`update` is backed up into the table once the next state is
+    known.
+    """
+
+    def __init__(self, capacity: int = 1024, half_life: Optional[float] = None,
+                 policy: str = "lfu", q: Optional[QTable] = None,
+                 temperature: float = 0.0) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if policy not in ("lfu", "lru"):
+            raise ValueError(f"unknown eviction policy {policy!r}")
+        self.capacity = capacity
+        self.half_life = half_life
+        self.policy = policy
+        self.weights = np.zeros(capacity)
+        self.stamps = np.zeros(capacity)  # time each weight was last written
+        self.uses = np.zeros(capacity, dtype=np.int64)
+        self.recent = np.zeros(capacity, dtype=np.int64)  # clock of last use
+        self.held = np.zeros(capacity, dtype=bool)
+        self._actions: List[Optional[Tuple[str, ...]]] = [None] * capacity
+        self._ids: Dict[Tuple[str, ...], int] = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self._clock = 0
+        # Latest time seen by update().
+        self.now = 0.0
+        self.q = q
+        self.temperature = temperature
+        # Q-learning transition awaiting its next state: state, action, reward.
+        self._state = -1
+        self._action = -1
+        self._reward: Optional[float] = None
+        # Serialises rule and Q-table updates with a background trainer
+        # (see replay.py).  Reentrant so that a trainer holding it can
+        # still call update().
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
 
-    def __init__(self) -> None:
-        self.rules: dict[str, float] = {}
+    # -- rule table ---------------------------------------------------
+    def lookup(self, action: Sequence[str]) -> Optional[int]:
+        """Return the id of ``action``, or None if it holds no rule."""
+        return self._ids.get(tuple(action))
 
-    def get_norms(self) -> dict[str, float]:
-        return self.rules
+    def action(self, rule: int) -> Tuple[str, ...]:
+        return self._actions[rule]
 
-    def update(self, action: List[str], reward: float) -> None:
+    def _decayed(self, rule: int) -> float:
+        weight = float(self.weights[rule])
+        if self.half_life is not None:
+            weight *= 0.5 ** ((self.now - float(self.stamps[rule])) / self.half_life)
+        return weight
+
+    def _touch(self, rule: int) -> None:
+        self._clock += 1
+        self.uses[rule] += 1
+        self.recent[rule] = self._clock
+
+    def _allocate(self, key: Tuple[str, ...]) -> int:
+        if not self._free:
+            if self.policy == "lfu":
+                # Fewest uses first, then least recent.
+                victim = int(np.lexsort((self.recent, self.uses))[0])
+            else:
+                victim = int(np.argmin(self.recent))
+            self._release(victim)
+        rule = self._free.pop()
+        self._ids[key] = rule
+        self._actions[rule] = key
+        self.held[rule] = True
+        self.uses[rule] = 0
+        return rule
+
+    def _release(self, rule: int) -> None:
+        del self._ids[self._actions[rule]]
+        self._actions[rule] = None
+        self.held[rule] = False
+        self.weights[rule] = 0.0
+        self._free.append(rule)
+
+    def weight(self, action: Sequence[str]) -> float:
+        """Return the current (decayed) strength of ``action``."""
+        rule = self._ids.get(tuple(action))
+        if rule is None:
+            return 0.0
+        self._touch(rule)
+        return self._decayed(rule)
+
+    def get_norms(self) -> Mapping[str, float]:
+        """Return a read-only view of the rules, keyed by joined action."""
+        return _Norms(self)
+
+    @property
+    def rules(self) -> Dict[str, float]:
+        """The rules as a dict of joined action -> weight decayed to ``now``."""
+        return {" ".join(key): self._decayed(rule) for key, rule in self._ids.items()}
+
+    @rules.setter
+    def rules(self, rules: Dict[str, float]) -> None:
+        for rule in list(self._ids.values()):
+            self._release(rule)
+        for key, weight in rules.items():
+            if weight > 0:
+                rule = self._allocate(tuple(key.split()))
+                self.weights[rule] = weight
+                self.stamps[rule] = self.now
+                self._touch(rule)
+
+    def choose(self, perception: dict) -> int:
+        """Return the Q-table action id to take for ``perception``.
+
+        The state is read from ``perception["features"]`` or, without
+        one, from its position and sunlight.  Completes the Q-learning
+        backup of the previous decision.
+        """
+        features = perception.get("features")
+        if features is None:
+            x, y = perception.get("position", (0.0, 0.0))
+            state = int(self.q.states_of(x, y, perception.get("sunlight", 0.0)))
+        else:
+            state = int(self.q.state(features))
+        if self._reward is not None:
+            with self.lock:
+                self.q.update([self._state], [self._action], [self._reward], [state])
+            self._reward = None
+        self._state = state
+        self._action = int(self.q.softmax(np.array([state]), self.temperature)[0])
+        return self._action
+
+    def update(self, action: List[str], reward: float, time: Optional[float] = None) -> None:
         """Update normative strength of an action.
 
-        This simplistic implementation treats the action sequence
-        concatenated as a key; positive rewards strengthen it; negative
-        rewards weaken it.
+        ``time`` (default: the latest time seen) advances the clock the
+        lazy decay is measured against.  In Q-learning mode the reward
+        is also kept for the backup of the last :meth:`choose`.
         """
-        key = " ".join(action)
-        self.rules[key] = self.rules.get(key, 0.0) + reward
-        # Remove rules with negative weight
-        if self.rules[key] <= 0:
-            del self.rules[key]
+        if time is not None and time > self.now:
+            self.now = time
+        if self.q is not None and self._action >= 0:
+            self._reward = reward
+        key = tuple(action)
+        with self.lock:
+            rule = self._ids.get(key)
+            weight = (0.0 if rule is None else self._decayed(rule)) + reward
+            # Remove rules with negative weight
+            if weight <= 0:
+                if rule is not None:
+                    self._release(rule)
+                return
+            if rule is None:
+                rule = self._allocate(key)
+            self.weights[rule] = weight
+            self.stamps[rule] = self.now
+            self._touch(rule)
+
+
+class _Norms(Mapping):
+    # Read-only mapping view over a Superego's rule table.
+
+    def __init__(self, superego: Superego) -> None:
+        self._superego = superego
+
+    def __getitem__(self, key: str) -> float:
+        superego = self._superego
+        rule = superego._ids.get(tuple(key.split()))
+        if rule is None:
+            raise KeyError(key)
+        return superego._decayed(rule)
+
+    def __iter__(self) -> Iterator[str]:
+        return (" ".join(key) for key in list(self._superego._ids))
+
+    def __len__(self) -> int:
+        return len(self._superego)
 
 
 class EgoModel:
@@ -73,13 +380,22 @@ class EgoModel:
             ["lon"],
             ["moku"],
         ]
-    def generate(self, latent_state: Any, norms: dict[str, float], mood: float) -> Tuple[List[str], List[str]]:
-        """Generate a sentence and an associated action. placeholder implementation selects an action based on
+
+    def generate(self, latent_state: Any, norms: Mapping[str, float], mood: float,
+                 superego: Optional[Superego] = None) -> Tuple[List[str], List[str]]:
+        """Generate a sentence and an associated action.
+
+        This placeholder implementation selects an action based on
         personality, constructs a simple sentence describing the
-        action, and returns both.
+        action, and returns both.  If ``superego`` learns a Q-table,
+        the action is instead the candidate it chooses for the
+        perception.
         """
-        # Choose an action candidate using personality bias
-                action = self.personality.influence_action(self.action_candidates, mood)
+        if superego is not None and superego.q is not None:
+            action = list(self.action_candidates[superego.choose(latent_state)])
+        else:
+            # Choose an action candidate using personality bias
+            action = self.personality.influence_action(self.action_candidates, mood)
         # Generate a simple declarative sentence: subject verb [object]
         subject = "mi"
         verb = action[0] if action else "lon"
@@ -90,25 +406,39 @@ class EgoModel:
 
 
 class Mind:
-    """Composite mind that coordinates subconscious, superego and ego."""
+    """Composite mind that coordinates subconscious, superego and ego.
 
-    def __init__(self, grammar: TokiPonaGrammar, personality: Personality) -> None:
-        self.subconscious = Subconscious()
-                self.emotion = Emotion()
-        self.superego = Superego()
+    Memory holds ``feature_size`` features per experience; given the
+    agent's perception ``encoder`` instead, it is sized to match it.
+    """
+
+    def __init__(self, grammar: TokiPonaGrammar, personality: Personality,
+                 memory_capacity: int = 4096, feature_size: Optional[int] = None,
+                 episodic: Optional[EpisodicLog] = None,
+                 superego: Optional[Superego] = None,
+                 encoder: Optional[PerceptionEncoder] = None) -> None:
+        if encoder is not None:
+            if feature_size is not None and feature_size != encoder.size:
+                raise ValueError(f"feature_size {feature_size} does not match "
+                                 f"the encoder's {encoder.size} features")
+            feature_size = encoder.size
+        elif feature_size is None:
+            feature_size = 3
+        self.subconscious = Subconscious(memory_capacity, feature_size, episodic)
+        self.emotion = Emotion()
+        self.superego = Superego() if superego is None else superego
         self.ego = EgoModel(grammar=grammar, personality=personality)
 
     def decide(self, perception: dict) -> Tuple[List[str], List[str]]:
-                """Given a perception, produce a Toki Pona sentence and an action."""
-                
+        """Given a perception, produce a Toki Pona sentence and an action."""
         latent_state = self.subconscious.process(perception)
-                norms = self.superego.get_norms()
-                sentence, action = self.ego.generate(latent_state, norms, self.emotion.mood)
+        norms = self.superego.get_norms()
+        sentence, action = self.ego.generate(latent_state, norms, self.emotion.mood, self.superego)
         # Evaluate outcome (placeholder reward)
         reward = self.evaluate_outcome(perception, action)
-                self.emotion.update(reward)
+        self.emotion.update(reward)
         # Update superego and record memory
-        self.superego.update(action, reward)
+        self.superego.update(action, reward, perception.get("time"))
         self.subconscious.record(perception, sentence, action, reward)
         return sentence, action
 
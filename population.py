@@ -0,0 +1,255 @@
+"""
+population.py
+=============
+
+Vectorised populations of Kama Sona agents.  An
+:class:`AgentPopulation` keeps the state of many agents in NumPy
+arrays (positions, moods, Big Five traits and Superego norms) and runs
+the perceive → decide → act cycle for all of them at once, with the
+same rules as a single :class:`agent.Agent` and its :class:`mind.Mind`:
+
+* **perceive** counts the objects within each agent's perception
+  radius (see :meth:`environment.Environment.query_radius_pairs`) and
+  reads the sunlight;
+* **decide** weights the candidate actions by personality and mood
+  exactly as :meth:`personality.Personality.influence_action` does,
+  samples one action per agent and applies the reward, mood and norm
+  updates of :meth:`mind.Mind.decide` (with a shared
+  :class:`qlearning.QTable`, actions are instead sampled from the
+  table and every deciding agent's last transition is backed up into
+  it in one vectorised update);
+* **act** moves the agents that chose ``tawa`` and wakes the objects
+  they bump into.
+
+Individual :class:`agent.Agent` objects can still be obtained with
+:meth:`AgentPopulation.agent` for inspection; they are snapshots of
+the arrays and are refreshed by :meth:`AgentPopulation.sync_agents`.
+Per-agent experience memories are not kept.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from actions import VerbRegistry, verbs as default_verbs
+from agent import Agent
+from environment import Environment
+from grammar import TokiPonaGrammar
+from mind import Mind
+from perception import PerceptionEncoder
+from personality import Personality
+from qlearning import QTable
+
+# Candidate actions, in the order used by EgoModel.action_candidates.
+# Their indices double as opcodes in actions.default_registry().
+ACTIONS = ("tawa", "lon", "moku")
+TAWA, LON, MOKU = range(3)
+TRAITS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+
+
+class AgentPopulation:
+    """Many agents in one environment, updated as arrays.
+
+    ``traits`` is an ``(n, 5)`` array of Big Five traits in the order
+    of :data:`TRAITS`; ``x`` defaults to the middle of the world.  With
+    an ``encoder``, :meth:`perceive` also fills :attr:`features` with
+    one feature vector per agent.
+    """
+
+    radius = 10
+    step_size = 5.0
+
+    def __init__(self, env: Environment, traits: np.ndarray,
+                 x: Optional[np.ndarray] = None, perception_radius: float = 200.0,
+                 seed: Optional[int] = None, verbs: Optional[VerbRegistry] = None,
+                 encoder: Optional[PerceptionEncoder] = None,
+                 q_table: Optional[QTable] = None, temperature: float = 1.0) -> None:
+        traits = np.asarray(traits, dtype=np.float64)
+        if traits.ndim != 2 or traits.shape[1] != len(TRAITS):
+            raise ValueError("traits must have shape (n, 5)")
+        n = traits.shape[0]
+        self.env = env
+        self.traits = traits
+        self.x = np.full(n, env.width / 2.0) if x is None else np.asarray(x, dtype=np.float64).copy()
+        self.y = np.zeros(n)
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+        self.mood = np.zeros(n)
+        # Superego norm strength per agent and action (0 means no rule).
+        self.norms = np.zeros((n, len(ACTIONS)))
+        self.perception_radius = np.full(n, perception_radius)
+        self.rng = np.random.default_rng(seed)
+        self.verbs = default_verbs if verbs is None else verbs
+        if [self.verbs.opcode(verb) for verb in ACTIONS] != list(range(len(ACTIONS))):
+            raise ValueError("verb registry must give ACTIONS the opcodes 0, 1, 2")
+        # Latest perception and decision of each agent.
+        self.sunlight = env.sunlight
+        self.nearby = np.zeros(n, dtype=np.int64)
+        self.actions = np.full(n, LON, dtype=np.int64)
+        self.rewards = np.zeros(n)
+        # Feature vectors, one row per agent, when an encoder is given.
+        self.encoder = encoder
+        self.features = None if encoder is None else np.zeros((n, encoder.size), dtype=np.float32)
+        # Shared Q-table and each agent's last state in it (-1: none yet).
+        self.q_table = q_table
+        self.temperature = temperature
+        self.q_states = np.full(n, -1, dtype=np.int64)
+        self._agents: Dict[int, Agent] = {}
+
+    @classmethod
+    def random(cls, env: Environment, n: int, seed: Optional[int] = None,
+               **kwargs) -> "AgentPopulation":
+        """Create ``n`` agents with uniformly random traits and positions."""
+        rng = np.random.default_rng(seed)
+        traits = rng.uniform(0.0, 1.0, (n, len(TRAITS)))
+        x = rng.uniform(0.0, env.width, n)
+        return cls(env, traits, x=x, seed=seed, **kwargs)
+
+    def __len__(self) -> int:
+        return self.x.shape[0]
+
+    # -- stages -------------------------------------------------------
+    def perceive(self, rows: Optional[np.ndarray] = None) -> None:
+        """Read the sunlight and count the objects near every agent.
+
+        If ``rows`` is given, only those agents perceive.
+        """
+        self.sunlight = self.env.sunlight
+        rows = np.arange(len(self)) if rows is None else rows
+        agent, _ = self.env.query_radius_pairs(self.x[rows], self.y[rows], self.perception_radius[rows])
+        self.nearby[rows] = np.bincount(agent, minlength=rows.shape[0])
+        if self.encoder is not None:
+            if rows.shape[0] == len(self):
+                self.encoder.encode_batch(self.env, self.x, self.y, out=self.features)
+            else:
+                self.features[rows] = self.encoder.encode_batch(self.env, self.x[rows], self.y[rows])
+
+    def decide(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Choose an action for agents ``rows`` (default all) and learn from it.
+
+        Returns the chosen action indices into :data:`ACTIONS`; agents
+        not in ``rows`` keep their last action.
+        """
+        rows = np.arange(len(self)) if rows is None else rows
+        if self.q_table is not None:
+            return self._decide_q(rows)
+        openness, conscientiousness, extraversion, agreeableness, neuroticism = self.traits[rows].T
+        mood = self.mood[rows]
+        weights = np.ones((rows.shape[0], len(ACTIONS)))
+        # Same biases as Personality.influence_action.
+        weights[:, TAWA] += 2.0 * (extraversion + np.maximum(mood, 0.0))
+        weights[:, MOKU] += 1.5 * openness
+        weights[:, LON] += np.where(mood < 0, 2.0 * (conscientiousness + agreeableness), 0.0)
+        weights[:, MOKU] -= neuroticism
+        np.maximum(weights, 0.0, out=weights)
+        total = weights.sum(axis=1, keepdims=True)
+        weights = np.where(total > 0, weights / np.where(total > 0, total, 1.0), 1.0 / len(ACTIONS))
+        r = self.rng.random(rows.shape[0])[:, None]
+        actions = np.argmax(r <= np.cumsum(weights, axis=1), axis=1)
+
+        # Reward, mood and norms as in Mind.decide.
+        rewards = np.where(actions == TAWA, self.sunlight, 0.0)
+        self.mood[rows] = np.clip(mood + rewards, -1.0, 1.0)
+        norms = self.norms[rows, actions] + rewards
+        self.norms[rows, actions] = np.where(norms > 0, norms, 0.0)
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        return self.actions
+
+    def _decide_q(self, rows: np.ndarray) -> np.ndarray:
+        q = self.q_table
+        states = q.states_of(self.x[rows], self.y[rows], self.sunlight)
+        # Back up each agent's previous decision now its next state is known.
+        previous = self.q_states[rows]
+        seen = previous >= 0
+        if seen.any():
+            q.update(previous[seen], self.actions[rows[seen]], self.rewards[rows[seen]],
+                     states[seen])
+        self.q_states[rows] = states
+        actions = q.softmax(states, self.temperature, self.rng)
+        rewards = np.where(actions == TAWA, self.sunlight, 0.0)
+        self.mood[rows] = np.clip(self.mood[rows] + rewards, -1.0, 1.0)
+        norms = self.norms[rows, actions] + rewards
+        self.norms[rows, actions] = np.where(norms > 0, norms, 0.0)
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        return self.actions
+
+    def act(self) -> None:
+        """Apply every agent's chosen action to the world.
+
+        Actions are dispatched through the population's verb registry,
+        one batched call per distinct verb.
+        """
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        self.verbs.apply(self, self.actions)
+
+    def wake_near(self, rows: np.ndarray, reach: float) -> None:
+        """Wake the objects within ``reach`` of the agents ``rows``."""
+        if rows.size == 0:
+            return
+        _, hit = self.env.query_radius_pairs(self.x[rows], self.y[rows],
+                            np.full(rows.shape[0], float(reach)))
+        self.env.objects.wake(np.unique(hit))
+
+    def update(self, dt: float, due: Optional[np.ndarray] = None) -> np.ndarray:
+        """Run perceive → decide → act and return every agent's action.
+
+        ``due`` is an optional boolean mask (see
+        scheduler.DecisionScheduler) of the agents that decide on this
+        tick; the others repeat their last action.
+        """
+        rows = None if due is None else np.nonzero(due)[0]
+        if rows is None or rows.size:
+            self.perceive(rows)
+            self.decide(rows)
+        self.act()
+        return self.actions
+
+    # -- inspection ---------------------------------------------------
+    def sentence(self, i: int) -> List[str]:
+        """Return the sentence agent ``i`` spoke with its last action."""
+        return ["mi", ACTIONS[int(self.actions[i])]]
+
+    def agent(self, i: int) -> Agent:
+        """Return an :class:`agent.Agent` mirroring agent ``i``.
+
+        The object is created on first use and refreshed by
+        :meth:`sync_agents`; changes made to it are not written back.
+        """
+        agent = self._agents.get(i)
+        if agent is None:
+            personality = Personality(**dict(zip(TRAITS, self.traits[i].tolist())))
+            agent = Agent(env=self.env, mind=Mind(grammar=TokiPonaGrammar(),
+                                                  personality=personality),
+                          verbs=self.verbs)
+            self._agents[i] = agent
+            self._sync(i, agent)
+        return agent
+
+    def sync_agents(self, indices: Optional[Sequence[int]] = None) -> None:
+        """Copy array state into the inspected :class:`Agent` objects."""
+        for i in (self._agents if indices is None else indices):
+            if i in self._agents:
+                self._sync(i, self._agents[i])
+
+    def pull(self, i: int, agent: Agent) -> None:
+        """Copy the position of ``agent`` back into row ``i``.
+
+        Used when a verb without a batch handler acts on the
+        :class:`Agent` view of a row.
+        """
+        self.x[i], self.y[i] = agent.x, agent.y
+
+    def _sync(self, i: int, agent: Agent) -> None:
+        agent.x, agent.y = float(self.x[i]), float(self.y[i])
+        agent.prev_x, agent.prev_y = float(self.prev_x[i]), float(self.prev_y[i])
+        agent.perception_radius = float(self.perception_radius[i])
+        agent.mind.emotion.mood = float(self.mood[i])
+        agent.mind.superego.rules = {action: float(weight)
+                                     for action, weight in zip(ACTIONS, self.norms[i].tolist())
+                                     if weight > 0}
+        agent._last_sentence = self.sentence(i)
@@ -0,0 +1,133 @@
+"""
+prioritized.py
+==============
+
+Prioritized experience replay.  Most remembered experiences are idle
+``lon`` ticks with no reward, and replaying them uniformly wastes most
+samples.  A :class:`PrioritizedReplayBuffer` keeps a priority for every
+slot of a :class:`memory.ExperienceBuffer` and samples slots with
+probability proportional to it (Schaul et al., 2016):
+
+* a new experience gets priority ``(|reward| + epsilon) ** alpha``;
+* after learning from it, :meth:`PrioritizedReplayBuffer.update` sets
+  ``(|td_error| + epsilon) ** alpha``;
+* samples come with importance-sampling weights
+  ``(N * P(i)) ** -beta``, normalised by their maximum, that correct
+  the bias of non-uniform sampling.
+
+Priorities live in a :class:`SumTree`, a binary tree stored in one
+array whose leaves are the priorities and whose inner nodes hold the
+sum of their children.  Updating a priority and drawing a sample both
+take O(log n), and both are done for whole index arrays at once, one
+tree level at a time.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class SumTree:
+    """Array-backed sum tree over ``capacity`` non-negative priorities."""
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.depth = max((capacity - 1).bit_length(), 0)
+        self.leaves = 1 << self.depth
+        # Node 1 is the root; the children of node i are 2i and 2i + 1.
+        self.tree = np.zeros(2 * self.leaves)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def get(self, indices: np.ndarray) -> np.ndarray:
+        return self.tree[self.leaves + np.asarray(indices)]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        """Set the priorities of ``indices`` and refresh their ancestors."""
+        nodes = self.leaves + np.asarray(indices, dtype=np.int64)
+        tree = self.tree
+        tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes >> 1)
+            tree[nodes] = tree[2 * nodes] + tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Return the leaf index where each cumulative ``value`` falls."""
+        tree = self.tree
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(values.shape[0], dtype=np.int64)
+        for _ in range(self.depth):
+            left = tree[2 * nodes]
+            right = values > left
+            values -= np.where(right, left, 0.0)
+            nodes = 2 * nodes + right
+        return np.minimum(nodes - self.leaves, self.capacity - 1)
+
+
+class PrioritizedReplayBuffer:
+    """Priority-proportional sampling over the slots of an experience buffer."""
+
+    def __init__(self, memory, alpha: float = 0.6, beta: float = 0.4,
+                 epsilon: float = 1e-3, seed: Optional[int] = None) -> None:
+        self.memory = memory
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        self.tree = SumTree(memory.capacity)
+        self.rng = np.random.default_rng(seed)
+        # Sampling and updates may come from a trainer thread.
+        self.lock = threading.Lock()
+
+    def priority(self, errors: np.ndarray) -> np.ndarray:
+        """Return the priority of absolute rewards or TD ``errors``."""
+        return (np.abs(errors) + self.epsilon) ** self.alpha
+
+    def add(self, slot: int) -> None:
+        """Prioritise the experience just written to ``slot`` by its reward."""
+        priority = self.priority(self.memory.rewards[slot:slot + 1])
+        with self.lock:
+            self.tree.update(np.array([slot]), priority)
+
+    def remove(self, slots: np.ndarray) -> None:
+        """Never sample ``slots`` again (e.g. after they are evicted)."""
+        with self.lock:
+            self.tree.update(slots, np.zeros(len(slots)))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.tree.tree[:] = 0.0
+
+    def update(self, slots: np.ndarray, errors: np.ndarray) -> None:
+        """Reprioritise ``slots`` by the TD ``errors`` learned from them."""
+        priorities = self.priority(np.asarray(errors, dtype=np.float64))
+        with self.lock:
+            self.tree.update(slots, priorities)
+
+    def sample(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw ``n`` slots in proportion to priority.
+
+        Sampling is stratified: one draw from each of ``n`` equal
+        slices of the total priority.  Returns the slots and their
+        importance-sampling weights; both are empty if nothing has a
+        priority.
+        """
+        with self.lock:
+            total = self.tree.total
+            if total <= 0.0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0)
+            values = (np.arange(n) + self.rng.random(n)) * (total / n)
+            slots = self.tree.find(values)
+            probabilities = self.tree.get(slots) / total
+        held = max(len(self.memory), 1)
+        with np.errstate(divide="ignore"):
+            weights = (held * probabilities) ** -self.beta
+        weights[~np.isfinite(weights)] = 0.0
+        peak = weights.max()
+        return slots, weights / peak if peak > 0 else weights
@@ -0,0 +1,105 @@
+"""
+qlearning.py
+============
+
+Tabular Q-learning for the Kama Sona Superego.  A :class:`QTable` is a
+dense ``(states, actions)`` NumPy array of action values, where a state
+is a bucket of the perceived position and sunlight (the first three
+entries of both feature layouts, see :mod:`perception`) on a regular
+grid of ``bins`` between ``low`` and ``high``.
+
+Every method works on arrays of states, so a whole population is
+discretised, queried and updated in single calls.  Updates are
+one-step temporal-difference (Q-learning) backups::
+
+    Q[s, a] += alpha * (r + gamma * max(Q[s']) - Q[s, a])
+
+When several agents update the same ``(s, a)`` in one call, their
+increments are summed, each computed from the values before the call.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from perception import SUNLIGHT, X, Y
+
+
+class QTable:
+    """Dense Q-table over discretised (x, y, sunlight) states."""
+
+    def __init__(self, actions: int = 3, bins: Sequence[int] = (16, 4, 5),
+                 low: Sequence[float] = (0.0, 0.0, 0.0),
+                 high: Sequence[float] = (800.0, 600.0, 1.0),
+                 alpha: float = 0.1, gamma: float = 0.9, seed: Optional[int] = None) -> None:
+        if actions < 1 or len(bins) != 3 or min(bins) < 1:
+            raise ValueError("need at least one action and three positive bin counts")
+        self.actions = actions
+        self.bins = np.asarray(bins, dtype=np.int64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.alpha = alpha
+        self.gamma = gamma
+        self.states = int(np.prod(self.bins))
+        self.q = np.zeros((self.states, actions))
+        self.rng = np.random.default_rng(seed)
+
+    # -- states -------------------------------------------------------
+    def states_of(self, x, y, sunlight) -> np.ndarray:
+        """Return the state index of each ``(x, y, sunlight)``."""
+        values = np.stack(np.broadcast_arrays(np.asarray(x, dtype=np.float64),
+                                              np.asarray(y, dtype=np.float64),
+                                              np.asarray(sunlight, dtype=np.float64)), axis=-1)
+        scaled = (values - self.low) / (self.high - self.low) * self.bins
+        cells = np.clip(np.floor(scaled).astype(np.int64), 0, self.bins - 1)
+        return np.ravel_multi_index(np.moveaxis(cells, -1, 0), self.bins)
+
+    def state(self, features: np.ndarray) -> np.ndarray:
+        """Return the state of feature vectors, shape ``(size,)`` or ``(n, size)``."""
+        return self.states_of(features[..., X], features[..., Y], features[..., SUNLIGHT])
+
+    # -- queries ------------------------------------------------------
+    def greedy(self, states: np.ndarray) -> np.ndarray:
+        """Return the highest-valued action of each state (lowest id on ties)."""
+        return np.argmax(self.q[states], axis=-1)
+
+    def probabilities(self, states: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+        """Return the Boltzmann (softmax) action probabilities of each state."""
+        values = self.q[states] / temperature
+        values = np.exp(values - values.max(axis=-1, keepdims=True))
+        return values / values.sum(axis=-1, keepdims=True)
+
+    def softmax(self, states: np.ndarray, temperature: float = 1.0,
+                rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Sample one action per state from :meth:`probabilities`.
+
+        A ``temperature`` of zero or less picks greedily.
+        """
+        if temperature <= 0:
+            return self.greedy(states)
+        rng = self.rng if rng is None else rng
+        p = self.probabilities(states, temperature)
+        r = rng.random(p.shape[:-1])[..., None]
+        return np.minimum(np.argmax(r <= np.cumsum(p, axis=-1), axis=-1), self.actions - 1)
+
+    # -- learning -----------------------------------------------------
+    def update(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+               next_states: Optional[np.ndarray] = None,
+               weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """Apply one TD backup per ``(state, action, reward, next_state)``.
+
+        Without ``next_states`` the transitions are terminal (no
+        bootstrap).  ``weights`` scale each backup, e.g. by importance
+        sampling weights.  Returns the TD errors.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        targets = np.asarray(rewards, dtype=np.float64)
+        if next_states is not None:
+            targets = targets + self.gamma * self.q[next_states].max(axis=-1)
+        errors = targets - self.q[states, actions]
+        steps = self.alpha * errors if weights is None else self.alpha * weights * errors
+        np.add.at(self.q, (states, actions), steps)
+        return errors
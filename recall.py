@@ -0,0 +1,133 @@
+"""
+recall.py
+=========
+
+Similarity recall over the Kama Sona mind's memory.  A
+:class:`RecallIndex` is a locality-sensitive hash (LSH) of the feature
+vectors held in a :class:`memory.ExperienceBuffer`, keyed by buffer
+slot, so that the experiences most similar to a perception can be
+found without scanning the whole buffer.
+
+The hash is the p-stable (Euclidean) scheme of Datar et al.: each of
+``tables`` hash tables combines ``hashes`` projections
+``floor((a . v + b) / width)`` with Gaussian ``a`` and uniform ``b``
+into one bucket key.  Vectors closer than about ``width`` tend to share
+a bucket in at least one table.  A query gathers the slots of its
+buckets, probes the neighbouring buckets (each projection shifted by
+one) if that yields fewer than ``k`` candidates, and ranks the
+candidates by exact distance.  Inserting or overwriting a slot costs
+one small matrix product and ``tables`` set operations.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class RecallIndex:
+    """Euclidean LSH index of feature vectors stored by slot."""
+
+    def __init__(self, feature_size: int, capacity: int, tables: int = 6,
+                 hashes: int = 6, width: float = 16.0, seed: Optional[int] = None) -> None:
+        if tables < 1 or hashes < 1 or width <= 0:
+            raise ValueError("tables and hashes must be positive and width positive")
+        rng = np.random.default_rng(seed)
+        self.feature_size = feature_size
+        self.capacity = capacity
+        self.tables = tables
+        self.hashes = hashes
+        self.width = float(width)
+        self._projection = rng.normal(size=(tables * hashes, feature_size)) / self.width
+        self._offset = rng.uniform(0.0, 1.0, size=tables * hashes)
+        # Odd multipliers that mix the projections of a table into one key.
+        self._mix = rng.integers(1, 1 << 31, size=hashes, dtype=np.int64) | 1
+        self._keys = np.zeros((capacity, tables), dtype=np.int64)
+        self._present = np.zeros(capacity, dtype=bool)
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(tables)]
+        self._vector = np.zeros(feature_size, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._present))
+
+    def _hash(self, features: np.ndarray) -> np.ndarray:
+        # Projection buckets, shape (tables, hashes).
+        v = self._vector
+        m = min(features.shape[0], self.feature_size)
+        v[:m] = features[:m]
+        v[m:] = 0.0
+        h = np.floor(self._projection @ v + self._offset).astype(np.int64)
+        return h.reshape(self.tables, self.hashes)
+
+    def insert(self, slot: int, features: np.ndarray) -> None:
+        """Index ``features`` under ``slot``, replacing what was there."""
+        if self._present[slot]:
+            self.remove(slot)
+        keys = self._hash(features) @ self._mix
+        self._keys[slot] = keys
+        self._present[slot] = True
+        for bucket, key in zip(self._buckets, keys.tolist()):
+            members = bucket.get(key)
+            if members is None:
+                bucket[key] = {slot}
+            else:
+                members.add(slot)
+
+    def remove(self, slot: int) -> None:
+        if not self._present[slot]:
+            return
+        self._present[slot] = False
+        for bucket, key in zip(self._buckets, self._keys[slot].tolist()):
+            members = bucket[key]
+            members.discard(slot)
+            if not members:
+                del bucket[key]
+
+    def clear(self) -> None:
+        self._present[:] = False
+        for bucket in self._buckets:
+            bucket.clear()
+
+    def candidates(self, features: np.ndarray, k: int = 1) -> np.ndarray:
+        """Return the slots sharing a bucket with ``features``.
+
+        Neighbouring buckets are probed as well when fewer than ``k``
+        slots are found.
+        """
+        h = self._hash(features)
+        keys = h @ self._mix
+        found: Set[int] = set()
+        for bucket, key in zip(self._buckets, keys.tolist()):
+            members = bucket.get(key)
+            if members:
+                found.update(members)
+        if len(found) < k:
+            # Multi-probe: shift each projection of each table by +-1.
+            shifts = np.concatenate([self._mix, -self._mix])
+            for bucket, key in zip(self._buckets, keys):
+                for probe in (key + shifts).tolist():
+                    members = bucket.get(probe)
+                    if members:
+                        found.update(members)
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+    def query(self, features: np.ndarray, vectors: np.ndarray,
+              k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ``k`` candidate slots nearest ``features`` and their distances.
+
+        ``vectors`` holds the indexed feature vectors by slot (the
+        buffer's ``features`` column); results are nearest first.
+        """
+        slots = self.candidates(features, k)
+        if slots.size == 0:
+            return slots, np.zeros(0)
+        m = min(features.shape[0], vectors.shape[1])
+        diff = vectors[slots].astype(np.float64)
+        diff[:, :m] -= features[:m]
+        distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        if slots.size > k:
+            top = np.argpartition(distances, k - 1)[:k]
+            slots, distances = slots[top], distances[top]
+        order = np.argsort(distances, kind="stable")
+        return slots[order], distances[order]
@@ -0,0 +1,105 @@
+"""
+renderer.py
+===========
+
+Optional Pygame rendering layer for the Kama Sona simulation.  The
+simulation core (environment, agent and mind) never imports Pygame;
+this module is only imported when something is drawn, and Pygame
+itself is only imported when a drawing function runs or a window is
+opened.  Headless simulation workers therefore do not need SDL at
+all.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pygame
+
+    from agent import Agent
+    from environment import Environment, WorldObject
+
+
+GROUND_COLOR = (50, 200, 50)
+OBJECT_COLOR = (0, 0, 255)
+BACKGROUND_COLOR = (255, 255, 255)
+TEXT_COLOR = (0, 0, 0)
+
+
+def _pygame():
+    import pygame
+    return pygame
+
+
+def draw_object(surface: "pygame.Surface", obj: "WorldObject") -> None:
+    """Draw a single world object as a circle."""
+    pygame = _pygame()
+    pygame.draw.circle(surface, OBJECT_COLOR, (int(obj.x), int(surface.get_height() - obj.y)), int(obj.radius))
+
+
+def draw_environment(surface: "pygame.Surface", env: "Environment", alpha: float = 1.0) -> None:
+    """Draw the ground and every object, interpolated by ``alpha``."""
+    pygame = _pygame()
+    # Draw a simple ground
+    pygame.draw.rect(surface, GROUND_COLOR, (0, surface.get_height() - 10, surface.get_width(), 10))
+    # Draw objects
+    height = surface.get_height()
+    xs, ys = env.objects.interpolated(alpha)
+    radii = env.objects.radius
+    for x, y, r in zip(xs.tolist(), ys.tolist(), radii.tolist()):
+        pygame.draw.circle(surface, OBJECT_COLOR, (int(x), int(height - y)), int(r))
+
+
+def draw_agent(surface: "pygame.Surface", agent: "Agent", alpha: float = 1.0) -> None:
+    """Draw an agent, interpolated between its last two positions."""
+    pygame = _pygame()
+    x = agent.prev_x + (agent.x - agent.prev_x) * alpha
+    y = agent.prev_y + (agent.y - agent.prev_y) * alpha
+    pygame.draw.circle(surface, agent.color, (int(x), int(surface.get_height() - y)), agent.radius)
+
+
+class PygameRenderer:
+    """A Pygame window that draws an environment and its agents."""
+
+    def __init__(self, width: int, height: int, caption: str = "Kama Sona Simulation") -> None:
+        pygame = _pygame()
+        pygame.init()
+        self.width = width
+        self.height = height
+        self.screen = pygame.display.set_mode((width, height))
+        pygame.display.set_caption(caption)
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont(None, 24)
+
+    def tick(self, fps: int) -> float:
+        """Wait for the next frame and return the elapsed time in seconds."""
+        return self.clock.tick(fps) / 1000.0
+
+    def poll(self) -> bool:
+        """Handle window events; return False once the window is closed."""
+        pygame = _pygame()
+        running = True
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            # Additional input handling (e.g., chat) can be added here.
+        return running
+
+    def draw(self, env: "Environment", agents: Sequence["Agent"],
+             sentence: Optional[List[str]] = None,
+             alpha: float = 1.0, agent_alpha: float = 1.0) -> None:
+        """Draw one frame and present it."""
+        pygame = _pygame()
+        self.screen.fill(BACKGROUND_COLOR)
+        draw_environment(self.screen, env, alpha)
+        for agent in agents:
+            draw_agent(self.screen, agent, agent_alpha)
+        # Render the agent's utterance as text at bottom of screen
+        if sentence:
+            text_surface = self.font.render(" ".join(sentence), True, TEXT_COLOR)
+            self.screen.blit(text_surface, (10, self.height - 30))
+        pygame.display.flip()
+
+    def close(self) -> None:
+        _pygame().quit()
@@ -0,0 +1,171 @@
+"""
+replay.py
+=========
+
+Offline learning from remembered experience.  A :class:`ReplayTrainer`
+repeatedly samples minibatches of experiences uniformly from a
+:class:`mind.Subconscious` memory (the columnar
+:class:`memory.ExperienceBuffer`) and learns from each batch in one
+vectorised step:
+
+* if the Superego has a Q-table (:mod:`qlearning`), every sampled
+  experience and the one recorded after it form a transition that is
+  backed up into the table; transitions drawn more than once in a
+  batch share one step, so the table moves by ``alpha`` times their
+  mean TD error however small the memory;
+* otherwise the batch's rewards are averaged per action and each
+  norm is moved ``learning_rate`` of the way towards its action's mean
+  reward, so repeated replay converges instead of growing the norms
+  without bound.
+
+If the Subconscious keeps a :class:`prioritized.PrioritizedReplayBuffer`
+(``Subconscious(prioritized=True)``), batches are drawn from it
+instead: updates are scaled by the importance-sampling weights and,
+with a Q-table, the sampled experiences are reprioritised by their TD
+errors.
+
+The trainer runs on its own thread every ``interval`` seconds (or can
+be stepped by calling :meth:`ReplayTrainer.train_batch`) and reports
+its throughput in samples per second.  The simulation keeps writing
+to memory meanwhile, so a sample may occasionally mix an experience
+with the one overwriting it; Superego rule and Q-table updates are
+serialised through :attr:`mind.Superego.lock`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from actions import VerbRegistry, verbs as default_verbs
+
+
+class ReplayTrainer:
+    """Trains a Superego from a Subconscious memory on a worker thread."""
+
+    def __init__(self, subconscious, superego, batch_size: int = 64, interval: float = 0.01,
+                 learning_rate: float = 0.01, seed: Optional[int] = None,
+                 verbs: Optional[VerbRegistry] = None, report_interval: float = 1.0) -> None:
+        if batch_size < 1 or interval < 0:
+            raise ValueError("batch_size must be positive and interval non-negative")
+        self.subconscious = subconscious
+        self.superego = superego
+        self.batch_size = batch_size
+        self.interval = interval
+        self.learning_rate = learning_rate
+        self.rng = np.random.default_rng(seed)
+        self.verbs = default_verbs if verbs is None else verbs
+        self.report_interval = report_interval
+        # Throughput counters.
+        self.samples = 0
+        self.batches = 0
+        self.samples_per_second = 0.0
+        self._window_start = time.perf_counter()
+        self._window_samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- thread -------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._window_start = time.perf_counter()
+        self._window_samples = 0
+        self._thread = threading.Thread(target=self._run, name="replay", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "ReplayTrainer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.train_batch()
+            if self.interval:
+                self._stop.wait(self.interval)
+
+    # -- learning -----------------------------------------------------
+    def sample(self, n: int, count: int) -> np.ndarray:
+        """Return ``n`` logical positions drawn from the ``count`` eligible ones."""
+        return self.rng.integers(0, count, n)
+
+    def train_batch(self) -> int:
+        """Sample one minibatch, learn from it and return its size."""
+        memory = self.subconscious.memory
+        superego = self.superego
+        q = superego.q
+        # With a Q-table the newest experience has no successor yet.
+        count = len(memory) - (1 if q is not None else 0)
+        if count < 1:
+            return 0
+        priorities = self.subconscious.priorities
+        if priorities is None:
+            positions = self.sample(self.batch_size, count)
+            slots = memory.slots_of(positions)
+            weights = np.ones(positions.shape[0])
+        else:
+            slots, weights = priorities.sample(self.batch_size)
+            positions = (slots - memory.slots_of(0)) % memory.capacity
+            eligible = positions < count
+            slots, weights, positions = slots[eligible], weights[eligible], positions[eligible]
+        actions = memory.actions[slots].astype(np.int64)
+        rewards = memory.rewards[slots].astype(np.float64)
+        if q is not None:
+            valid = (actions >= 0) & (actions < q.actions)
+            states = q.state(memory.features[slots[valid]])
+            next_states = q.state(memory.features[memory.slots_of(positions[valid] + 1)])
+            # QTable.update sums the steps of repeated (state, action)
+            # pairs; scale each by its share so they average instead.
+            _, pair, repeats = np.unique(states * q.actions + actions[valid],
+                                         return_inverse=True, return_counts=True)
+            shares = weights[valid] / repeats[pair.reshape(-1)]
+            with superego.lock:
+                errors = q.update(states, actions[valid], rewards[valid], next_states, shares)
+            if priorities is not None:
+                priorities.update(slots[valid], errors)
+        else:
+            known = actions >= 0
+            sums = np.bincount(actions[known], weights=rewards[known] * weights[known])
+            totals = np.bincount(actions[known], weights=weights[known])
+            norms = superego.get_norms()
+            for opcode in np.nonzero(totals)[0].tolist():
+                if opcode < len(self.verbs):
+                    name = self.verbs.names[opcode]
+                    mean = float(sums[opcode] / totals[opcode])
+                    # Read and write under one lock so a concurrent
+                    # update is not overwritten.
+                    with superego.lock:
+                        current = norms.get(name, 0.0)
+                        superego.update([name], self.learning_rate * (mean - current))
+        self._count(slots.shape[0])
+        return slots.shape[0]
+
+    def _count(self, n: int) -> None:
+        self.samples += n
+        self.batches += 1
+        self._window_samples += n
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        if elapsed >= self.report_interval:
+            self.samples_per_second = self._window_samples / elapsed
+            self._window_start = now
+            self._window_samples = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return the samples, batches and samples/sec processed so far."""
+        return {"samples": self.samples, "batches": self.batches,
+                "samples_per_second": self.samples_per_second}
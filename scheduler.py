@@ -0,0 +1,144 @@
+"""
+scheduler.py
+============
+
+Time-step scheduling for the Kama Sona simulation.  The render loop
+runs at whatever rate the display allows, while physics and agent
+decisions advance in fixed increments of simulated time.  This keeps
+the simulation independent of frame hitches and lets physics run
+faster (or slower) than rendering.
+
+Decision steps need not consult every agent's mind: a
+:class:`DecisionScheduler` gives each agent its own cadence and lets
+the others repeat their last action.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class FixedStepScheduler:
+    """Accumulator-based fixed-timestep scheduler.
+
+    Each call to :meth:`advance` adds the elapsed wall-clock time to two
+    accumulators and reports how many physics steps and decision steps
+    are due.  The remainder left in the physics accumulator is exposed
+    as :attr:`alpha` so the renderer can interpolate between the last
+    two physics states.
+    """
+
+    def __init__(self, physics_hz: float = 240.0, decision_hz: float = 60.0,
+                 max_frame_time: float = 0.25) -> None:
+        if physics_hz <= 0 or decision_hz <= 0:
+            raise ValueError("physics_hz and decision_hz must be positive")
+        self.physics_dt = 1.0 / physics_hz
+        self.decision_dt = 1.0 / decision_hz
+        # Frames longer than this are truncated so that a long stall does
+        # not trigger an ever-growing burst of catch-up steps.
+        self.max_frame_time = max_frame_time
+        self._physics_acc = 0.0
+        self._decision_acc = 0.0
+        self.physics_steps = 0
+        self.decision_steps = 0
+
+    def advance(self, frame_dt: float) -> Tuple[int, int]:
+        """Consume ``frame_dt`` seconds and return the due step counts.
+
+        Returns a ``(physics_steps, decision_steps)`` tuple; the caller
+        should run that many steps of ``physics_dt`` and ``decision_dt``
+        respectively.
+        """
+        frame_dt = min(max(frame_dt, 0.0), self.max_frame_time)
+        self._physics_acc += frame_dt
+        self._decision_acc += frame_dt
+        physics = int(self._physics_acc / self.physics_dt)
+        decisions = int(self._decision_acc / self.decision_dt)
+        self._physics_acc -= physics * self.physics_dt
+        self._decision_acc -= decisions * self.decision_dt
+        self.physics_steps += physics
+        self.decision_steps += decisions
+        return physics, decisions
+
+    @property
+    def alpha(self) -> float:
+        """Fraction of a physics step elapsed since the last step (0–1)."""
+        return min(1.0, self._physics_acc / self.physics_dt)
+
+    @property
+    def decision_alpha(self) -> float:
+        """Fraction of a decision step elapsed since the last decision."""
+        return min(1.0, self._decision_acc / self.decision_dt)
+
+
+class DecisionScheduler:
+    """Per-agent decision cadence with staggered phases.
+
+    Agents are identified by index.  Each has a decision interval in
+    decision ticks; on the ticks in between, the caller reuses the
+    agent's last action instead of consulting its mind.  Agents are
+    spread across phases so that, with equal intervals, roughly the
+    same number decide on every tick.  Promoted agents (those near the
+    camera or in a conversation, say) decide every ``fast_interval``
+    ticks instead.
+    """
+
+    def __init__(self, n: int = 0, interval: int = 4, fast_interval: int = 1) -> None:
+        if interval < 1 or fast_interval < 1:
+            raise ValueError("intervals must be at least one tick")
+        self.default_interval = interval
+        self.fast_interval = fast_interval
+        self.tick = 0
+        self.interval = np.full(n, interval, dtype=np.int64)
+        self.promoted = np.zeros(n, dtype=bool)
+        self.next_due = np.arange(n, dtype=np.int64) % interval
+        # Decisions due on the last tick, and in total.
+        self.decisions_last_tick = 0
+        self.decisions = 0
+
+    def __len__(self) -> int:
+        return self.interval.shape[0]
+
+    def add(self, interval: Optional[int] = None) -> int:
+        """Register a new agent and return its index."""
+        interval = self.default_interval if interval is None else interval
+        i = len(self)
+        self.interval = np.append(self.interval, interval)
+        self.promoted = np.append(self.promoted, False)
+        # The new agent joins the phase with the fewest agents.
+        load = np.bincount(self.next_due[:i] % interval, minlength=interval)
+        phase = int(np.argmin(load))
+        self.next_due = np.append(self.next_due, self.tick + (phase - self.tick) % interval)
+        return i
+
+    def set_interval(self, agents, interval: int) -> None:
+        """Change the decision interval of ``agents`` (an index or indices)."""
+        if interval < 1:
+            raise ValueError("interval must be at least one tick")
+        self.interval[agents] = interval
+        self.next_due[agents] = np.minimum(self.next_due[agents], self.tick + interval)
+
+    def promote(self, agents, promoted: bool = True) -> None:
+        """Move ``agents`` to (or, with ``promoted=False``, off) the fast cadence."""
+        self.promoted[agents] = promoted
+        if promoted:
+            self.next_due[agents] = np.minimum(self.next_due[agents],
+                                               self.tick + self.fast_interval)
+
+    def effective_interval(self) -> np.ndarray:
+        return np.where(self.promoted, np.minimum(self.interval, self.fast_interval), self.interval)
+
+    def due(self) -> np.ndarray:
+        """Advance one decision tick and return a mask of agents to decide.
+
+        Agents not in the mask should repeat their last action.
+        """
+        due = self.next_due <= self.tick
+        self.next_due[due] = self.tick + self.effective_interval()[due]
+        self.tick += 1
+        count = int(np.count_nonzero(due))
+        self.decisions_last_tick = count
+        self.decisions += count
+        return due
@@ -0,0 +1,253 @@
+"""
+snapshot.py
+===========
+
+Binary snapshots of a running Kama Sona world.  A snapshot holds the
+object arrays of an :class:`environment.Environment` together with
+its clock, sunlight and chunk bookkeeping, the position and mind state
+of each :class:`agent.Agent` (Superego rules, Emotion mood and
+personality) and the state of the ``random`` module.
+
+Snapshots are written as a single file: an 8-byte magic string, the
+length of a JSON header, the header itself and then every array as raw
+bytes starting at a 64-byte aligned offset, much like a bundle of
+``.npy`` files.  :func:`load` maps those arrays copy-on-write with
+``numpy.memmap``, and :func:`restore` hands them to the object store
+without copying, so restoring a large world reads only the pages that
+are actually touched.
+
+:func:`fork` clones a world in memory so that a what-if branch can be
+simulated without disturbing the original.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agent import Agent
+from environment import Environment
+from grammar import TokiPonaGrammar
+from mind import Mind
+from personality import Personality
+
+MAGIC = b"KSNAP\x00\x01\x00"
+FORMAT_VERSION = 1
+# Array data starts at multiples of this many bytes.
+ALIGN = 64
+
+
+@dataclass
+class Snapshot:
+    """World state as JSON-compatible metadata plus named arrays."""
+
+    meta: Dict[str, Any]
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def capture(env: Environment, agents: Sequence[Agent] = ()) -> Snapshot:
+    """Take a snapshot of ``env`` and ``agents``.
+
+    The arrays are copied, so the snapshot does not change as the world
+    keeps running.
+    """
+    chunks = env.chunks
+    meta: Dict[str, Any] = {
+        "env": {
+            "width": env.width,
+            "height": env.height,
+            "cell_size": env.index.cell_size,
+            "physics": "event" if env.events is not None else "step",
+            "seed": chunks.seed if chunks is not None else None,
+            "chunk_size": chunks.chunk_size if chunks is not None else 512.0,
+            "cache_dir": chunks.cache_dir if chunks is not None else None,
+            "loaded_chunks": sorted(chunks.loaded) if chunks is not None else [],
+            "generated_chunks": sorted(chunks.generated) if chunks is not None else [],
+            "time": env.time,
+            "sunlight": env.sunlight,
+            "gravity": env.gravity,
+            "friction": env.friction,
+            "restitution": env.restitution,
+        },
+        "agents": [_agent_state(agent) for agent in agents],
+        "rng": _rng_state(random.getstate()),
+    }
+    arrays = {f"objects/{name}": col.copy() for name, col in env.objects.columns().items()}
+    if chunks is not None:
+        for chunk, data in chunks.saved_chunks().items():
+            for name, col in data.items():
+                arrays[f"chunk/{chunk}/{name}"] = np.array(col)
+    return Snapshot(meta, arrays)
+
+
+def _agent_state(agent: Agent) -> Dict[str, Any]:
+    mind = agent.mind
+    personality = mind.ego.personality
+    return {
+        "x": agent.x,
+        "y": agent.y,
+        "prev_x": agent.prev_x,
+        "prev_y": agent.prev_y,
+        "perception_radius": agent.perception_radius,
+        "incremental": agent.world_model is not None,
+        "mood": mind.emotion.mood,
+        "rules": mind.superego.rules,
+        "rules_time": mind.superego.now,
+        "personality": {
+            "openness": personality.openness,
+            "conscientiousness": personality.conscientiousness,
+            "extraversion": personality.extraversion,
+            "agreeableness": personality.agreeableness,
+            "neuroticism": personality.neuroticism,
+        },
+    }
+
+
+def _rng_state(state: Tuple[Any, ...]) -> List[Any]:
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+
+def restore(snapshot: Snapshot, env: Optional[Environment] = None,
+            agents: Optional[Sequence[Agent]] = None,
+            restore_rng: bool = True) -> Tuple[Environment, List[Agent]]:
+    """Apply ``snapshot`` and return the restored environment and agents.
+
+    When ``env`` or ``agents`` are omitted, new ones are built from the
+    snapshot.  Given ``agents`` must match the snapshot in number.  The
+    snapshot's arrays become the object store's columns, so a snapshot
+    should be restored at most once; :func:`load` a file again (or
+    :func:`capture` again) to restore it a second time.
+    """
+    meta = snapshot.meta["env"]
+    if env is None:
+        env = Environment(meta["width"], meta["height"], cell_size=meta["cell_size"],
+                          seed=meta["seed"], chunk_size=meta["chunk_size"],
+                          cache_dir=meta["cache_dir"], physics=meta["physics"])
+    env.time = meta["time"]
+    env.sunlight = meta["sunlight"]
+    env.gravity = meta["gravity"]
+    env.friction = meta["friction"]
+    env.restitution = meta["restitution"]
+
+    arrays = snapshot.arrays
+    env.objects.adopt({name[8:]: col for name, col in arrays.items()
+                       if name.startswith("objects/")})
+    env._sync_index()
+    if env.events is not None:
+        # Objects in flight are relaunched from their stored state.
+        env.events._reset()
+        env.events.now = env.time
+    if env.chunks is not None:
+        saved: Dict[int, Dict[str, np.ndarray]] = {}
+        for name, col in arrays.items():
+            if name.startswith("chunk/"):
+                _, chunk, column = name.split("/")
+                saved.setdefault(int(chunk), {})[column] = col
+        env.chunks.load_saved(meta["loaded_chunks"], saved, meta.get("generated_chunks"))
+
+    states = snapshot.meta["agents"]
+    if agents is None:
+        agents = [Agent(env=env, mind=Mind(grammar=TokiPonaGrammar(),
+                                           personality=Personality(**state["personality"])),
+                        incremental=state.get("incremental", False))
+                  for state in states]
+    elif len(agents) != len(states):
+        raise ValueError(f"snapshot holds {len(states)} agents, got {len(agents)}")
+    for agent, state in zip(agents, states):
+        agent.env = env
+        agent.x, agent.y = state["x"], state["y"]
+        agent.prev_x, agent.prev_y = state["prev_x"], state["prev_y"]
+        agent.perception_radius = state["perception_radius"]
+        if agent.world_model is not None:
+            agent.world_model.cursor = -1  # resynchronise with the restored world
+        agent.mind.emotion.mood = state["mood"]
+        agent.mind.superego.now = state.get("rules_time", 0.0)
+        agent.mind.superego.rules = dict(state["rules"])
+        for trait, value in state["personality"].items():
+            setattr(agent.mind.ego.personality, trait, value)
+
+    if restore_rng:
+        version, internal, gauss_next = snapshot.meta["rng"]
+        random.setstate((version, tuple(internal), gauss_next))
+    return env, list(agents)
+
+
+def fork(env: Environment, agents: Sequence[Agent] = ()) -> Tuple[Environment, List[Agent]]:
+    """Clone a running world for what-if evaluation.
+
+    The clone shares no state with the original.  Its chunks are kept
+    in memory even if the original caches them on disk, and the global
+    random state is left alone.
+    """
+    snapshot = capture(env, agents)
+    snapshot.meta["env"]["cache_dir"] = None
+    return restore(snapshot, restore_rng=False)
+
+
+# -- files -------------------------------------------------------------
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def save(snapshot: Snapshot, path: str) -> None:
+    """Write ``snapshot`` to ``path`` in the binary snapshot format."""
+    arrays = {name: np.ascontiguousarray(col) for name, col in snapshot.arrays.items()}
+    layout: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for name, col in arrays.items():
+        layout[name] = {"dtype": col.dtype.str, "shape": list(col.shape), "offset": offset}
+        offset = _aligned(offset + col.nbytes)
+    header = json.dumps({"version": FORMAT_VERSION, "meta": snapshot.meta,
+                         "arrays": layout}).encode("utf-8")
+    # Pad the header so that the data section starts aligned.
+    prefix = len(MAGIC) + 8
+    header += b" " * (_aligned(prefix + len(header)) - prefix - len(header))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        base = f.tell()
+        for name, col in arrays.items():
+            f.seek(base + layout[name]["offset"])
+            f.write(col.tobytes())
+
+
+def load(path: str, mmap: bool = True) -> Snapshot:
+    """Read a snapshot written by :func:`save`.
+
+    With ``mmap`` the arrays are copy-on-write memory maps of the file:
+    nothing is read until it is used and writes never reach the file.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+        base = f.tell()
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot version {header['version']}")
+        arrays = {}
+        for name, info in header["arrays"].items():
+            dtype = np.dtype(info["dtype"])
+            shape = tuple(info["shape"])
+            count = int(np.prod(shape))
+            if count == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            elif mmap:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="c",
+                                         offset=base + info["offset"], shape=shape)
+            else:
+                f.seek(base + info["offset"])
+                arrays[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+    return Snapshot(header["meta"], arrays)
+
+
+def checkpoint(path: str, env: Environment, agents: Sequence[Agent] = ()) -> None:
+    """Capture ``env`` and ``agents`` and save them to ``path``."""
+    save(capture(env, agents), path)
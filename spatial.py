@@ -0,0 +1,173 @@
+"""
+spatial.py
+==========
+
+Spatial indexing for the Kama Sona world.  The :class:`SpatialHash`
+buckets object rows of an :class:`environment.ObjectStore` into a
+uniform grid so that radius and nearest-neighbour queries only look
+at nearby cells instead of every object in the world.
+
+The index stores row numbers, not objects.  It is kept in sync
+incrementally: on each update only rows whose grid cell changed are
+moved between buckets.  A full rebuild happens only when the store
+reassigns rows (for example after an object is removed).
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+from typing import Dict, Set, Tuple
+
+import numpy as np
+
+
+class SpatialHash:
+    """Uniform-grid spatial hash over object rows."""
+
+    def __init__(self, cell_size: float = 64.0) -> None:
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._cx = np.empty(0, dtype=np.int64)
+        self._cy = np.empty(0, dtype=np.int64)
+        self._version = -1
+        # Bounding box of occupied cells; only ever grows between rebuilds.
+        self._bounds = (0, -1, 0, -1)
+
+    def __len__(self) -> int:
+        return self._cx.shape[0]
+
+    def _cell_coords(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        inv = 1.0 / self.cell_size
+        return (np.floor(xs * inv).astype(np.int64),
+                np.floor(ys * inv).astype(np.int64))
+
+    def _insert(self, row: int, cx: int, cy: int) -> None:
+        self.cells.setdefault((cx, cy), set()).add(row)
+        x0, x1, y0, y1 = self._bounds
+        if x0 > x1:
+            self._bounds = (cx, cx, cy, cy)
+        else:
+            self._bounds = (min(x0, cx), max(x1, cx), min(y0, cy), max(y1, cy))
+
+    def _discard(self, row: int, cx: int, cy: int) -> None:
+        bucket = self.cells.get((cx, cy))
+        if bucket is not None:
+            bucket.discard(row)
+            if not bucket:
+                del self.cells[(cx, cy)]
+
+    def rebuild(self, xs: np.ndarray, ys: np.ndarray, version: int = 0) -> None:
+        """Discard the current buckets and index every row from scratch."""
+        self.cells = {}
+        self._bounds = (0, -1, 0, -1)
+        cx, cy = self._cell_coords(xs, ys)
+        for row, (i, j) in enumerate(zip(cx.tolist(), cy.tolist())):
+            self._insert(row, i, j)
+        self._cx, self._cy = cx, cy
+        self._version = version
+
+    def update(self, xs: np.ndarray, ys: np.ndarray, version: int = 0,
+               rows: np.ndarray | None = None) -> int:
+        """Bring the index in line with the given positions.
+
+        ``version`` identifies the row layout of the store; when it
+        differs from the layout the index was built against the index
+        is rebuilt.  Otherwise only rows that changed cell, plus any
+        rows appended since the last update, are touched.  ``rows``
+        optionally restricts the check to rows that may have moved.
+        Returns the number of rows that were (re)bucketed.
+        """
+        n = xs.shape[0]
+        m = self._cx.shape[0]
+        if version != self._version or n < m:
+            self.rebuild(xs, ys, version)
+            return n
+        if rows is None:
+            rows = np.arange(m)
+        else:
+            rows = rows[rows < m]
+        cx, cy = self._cell_coords(xs[rows], ys[rows])
+        old_cx, old_cy = self._cx[rows], self._cy[rows]
+        changed = np.nonzero((cx != old_cx) | (cy != old_cy))[0]
+        for i in changed.tolist():
+            row = int(rows[i])
+            self._discard(row, int(old_cx[i]), int(old_cy[i]))
+            self._insert(row, int(cx[i]), int(cy[i]))
+        if changed.size:
+            self._cx[rows[changed]] = cx[changed]
+            self._cy[rows[changed]] = cy[changed]
+        if n > m:
+            new_cx, new_cy = self._cell_coords(xs[m:], ys[m:])
+            for row, (i, j) in enumerate(zip(new_cx.tolist(), new_cy.tolist()), start=m):
+                self._insert(row, i, j)
+            self._cx = np.concatenate([self._cx, new_cx])
+            self._cy = np.concatenate([self._cy, new_cy])
+        return changed.shape[0] + (n - m)
+
+    def _gather(self, cx0: int, cx1: int, cy0: int, cy1: int) -> np.ndarray:
+        cells = self.cells
+        buckets = [cells[(i, j)]
+                   for i in range(cx0, cx1 + 1)
+                   for j in range(cy0, cy1 + 1)
+                   if (i, j) in cells]
+        return np.fromiter(chain.from_iterable(buckets), dtype=np.int64)
+
+    def query_radius(self, x: float, y: float, r: float,
+                     xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return the rows whose position lies within ``r`` of ``(x, y)``.
+
+        ``xs`` and ``ys`` are the position arrays the index was last
+        updated with; they are used for the exact distance test.
+        """
+        inv = 1.0 / self.cell_size
+        bx0, bx1, by0, by1 = self._bounds
+        cx0 = max(int(np.floor((x - r) * inv)), bx0)
+        cx1 = min(int(np.floor((x + r) * inv)), bx1)
+        cy0 = max(int(np.floor((y - r) * inv)), by0)
+        cy1 = min(int(np.floor((y + r) * inv)), by1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.int64)
+        rows = self._gather(cx0, cx1, cy0, cy1)
+        dx = xs[rows] - x
+        dy = ys[rows] - y
+        return rows[dx * dx + dy * dy <= r * r]
+
+    def nearest(self, x: float, y: float, k: int,
+                xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return up to ``k`` rows closest to ``(x, y)``, nearest first.
+
+        Rings of cells are searched outwards from the query cell until
+        ``k`` candidates are known to be closer than anything in the
+        unsearched cells, or the occupied area has been exhausted.
+        """
+        if k <= 0 or not self.cells:
+            return np.empty(0, dtype=np.int64)
+        inv = 1.0 / self.cell_size
+        qx, qy = int(np.floor(x * inv)), int(np.floor(y * inv))
+        bx0, bx1, by0, by1 = self._bounds
+        # Distance from the query point to the nearest edge of its cell.
+        margin = min(x - qx * self.cell_size, (qx + 1) * self.cell_size - x,
+                     y - qy * self.cell_size, (qy + 1) * self.cell_size - y)
+        # Skip rings that cannot reach the occupied area at all.
+        ring = max(0, bx0 - qx, qx - bx1, by0 - qy, qy - by1)
+        while True:
+            cx0, cx1 = max(qx - ring, bx0), min(qx + ring, bx1)
+            cy0, cy1 = max(qy - ring, by0), min(qy + ring, by1)
+            covered = (qx - ring <= bx0 and qx + ring >= bx1
+                       and qy - ring <= by0 and qy + ring >= by1)
+            rows = self._gather(cx0, cx1, cy0, cy1) if cx0 <= cx1 and cy0 <= cy1 \
+                else np.empty(0, dtype=np.int64)
+            if rows.shape[0] >= k or covered:
+                dx = xs[rows] - x
+                dy = ys[rows] - y
+                dist2 = dx * dx + dy * dy
+                # Anything outside the searched block is at least this far away.
+                reach = ring * self.cell_size + margin
+                if covered or np.count_nonzero(dist2 <= reach * reach) >= k:
+                    if rows.shape[0] > k:
+                        part = np.argpartition(dist2, k - 1)[:k]
+                        rows, dist2 = rows[part], dist2[part]
+                    return rows[np.argsort(dist2, kind="stable")]
+            ring += 1
@@ -0,0 +1,84 @@
+"""Checks for verb dispatch."""
+
+import unittest
+
+import numpy as np
+
+from actions import UNKNOWN, VerbRegistry, default_registry
+from agent import Agent
+from environment import Environment
+from grammar import TokiPonaGrammar
+from mind import Mind
+from personality import Personality
+from population import ACTIONS, AgentPopulation
+
+
+class VerbRegistryTest(unittest.TestCase):
+    def test_registering_a_verb_only_extends_the_registry_grammar(self):
+        registry = VerbRegistry()
+        registry.register("pali", lambda agent, tokens: None)
+        self.assertTrue(registry.grammar.validate(["mi", "pali"]))
+        self.assertFalse(TokiPonaGrammar().validate(["mi", "pali"]))
+        self.assertFalse(VerbRegistry().grammar.validate(["mi", "pali"]))
+        self.assertNotIn("pali", TokiPonaGrammar.verbs)
+
+    def test_a_shared_grammar_learns_registered_verbs(self):
+        grammar = TokiPonaGrammar()
+        VerbRegistry(grammar).register("pali", lambda agent, tokens: None)
+        self.assertTrue(grammar.validate(["mi", "pali"]))
+
+
+class DispatchTest(unittest.TestCase):
+    def test_opcodes_are_assigned_in_order(self):
+        registry = default_registry()
+        self.assertEqual([registry.opcode(verb) for verb in ACTIONS], [0, 1, 2])
+        self.assertEqual(registry.compile(["tawa", "tomo"]), 0)
+        self.assertEqual(registry.compile(["pali"]), UNKNOWN)
+        self.assertEqual(registry.compile([]), UNKNOWN)
+        calls = []
+        self.assertEqual(registry.register("lon", lambda agent, tokens: calls.append(tokens)), 1)
+        self.assertEqual(len(registry), 3)
+        registry.dispatch(None, ["lon"])
+        registry.dispatch(None, ["pali"])
+        self.assertEqual(calls, [["lon"]])
+
+    def test_agents_act_through_their_registry(self):
+        env = Environment(800, 600)
+        agent = Agent(env=env, mind=Mind(grammar=TokiPonaGrammar(),
+                                         personality=Personality(0.5, 0.5, 0.5, 0.5, 0.5)))
+        x = agent.x
+        agent.act(["tawa"])
+        agent.act(["lon"])
+        agent.act(["pali"])
+        self.assertEqual(agent.x, x + 5)
+
+    def test_populations_apply_one_batch_per_verb(self):
+        env = Environment(800, 600)
+        registry = default_registry()
+        batches = []
+        registry.register("moku", lambda agent, tokens: None,
+                          lambda population, rows: batches.append(rows.tolist()))
+        population = AgentPopulation(env, np.full((6, 5), 0.5), verbs=registry)
+        population.actions[:] = [0, 2, 1, 2, 0, UNKNOWN]
+        x = population.x.copy()
+        population.act()
+        self.assertEqual(batches, [[1, 3]])
+        np.testing.assert_array_equal(population.x - x, [5.0, 0.0, 0.0, 0.0, 5.0, 0.0])
+
+    def test_verbs_without_a_batch_handler_act_on_agent_views(self):
+        env = Environment(800, 600)
+        registry = default_registry()
+
+        def back(agent, tokens):
+            agent.x -= 3.0
+
+        registry.register("tawa", back)
+        population = AgentPopulation(env, np.full((4, 5), 0.5), verbs=registry)
+        population.actions[:] = [0, 1, 0, 1]
+        x = population.x.copy()
+        population.act()
+        np.testing.assert_array_equal(population.x - x, [-3.0, 0.0, -3.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Checks for the salience-based attention filter."""
+
+import unittest
+
+import numpy as np
+
+from attention import AttentionFilter
+from environment import Environment, ObjectStates
+
+
+def _world(n: int = 100) -> Environment:
+    env = Environment(800, 600)
+    env.objects.extract(np.arange(env.objects.count))
+    rng = np.random.default_rng(0)
+    env.objects.extend({"x": rng.uniform(-150.0, 150.0, n), "y": rng.uniform(0.0, 150.0, n),
+                        "vx": rng.uniform(-20.0, 20.0, n), "movable": np.ones(n, dtype=bool)})
+    return env
+
+
+class AttentionFilterTest(unittest.TestCase):
+    def test_select_returns_the_top_k_in_order(self):
+        attention = AttentionFilter(k=5)
+        rng = np.random.default_rng(1)
+        scores = rng.random(1000)
+        np.testing.assert_array_equal(attention.select(scores), np.argsort(-scores)[:5])
+        self.assertEqual(attention.select(np.array([0.2, 0.9])).tolist(), [1, 0])
+
+    def test_filter_keeps_the_most_salient_objects(self):
+        env = _world()
+        attention = AttentionFilter(k=8)
+        states = env.query_radius_states(0.0, 0.0, 200.0)
+        perception = {"position": (0.0, 0.0), "objects": states, "sunlight": 1.0}
+        scores = attention.salience(env, states, 0.0, 0.0)
+        filtered = attention.filter(env, perception)
+        kept = filtered["objects"]
+        self.assertEqual(len(kept), 8)
+        np.testing.assert_array_equal(kept.rows, states.rows[np.argsort(-scores)[:8]])
+        np.testing.assert_array_equal(filtered["salience"], np.sort(scores)[::-1][:8])
+        self.assertEqual(filtered["sunlight"], 1.0)
+        self.assertIs(perception["objects"], states)
+
+    def test_attended_objects_lose_novelty_until_it_recovers(self):
+        env = _world()
+        attention = AttentionFilter(k=8, distance_weight=0.0, motion_weight=0.0)
+        states = env.query_radius_states(0.0, 0.0, 200.0)
+        perception = {"position": (0.0, 0.0), "objects": states}
+        first = attention.filter(env, perception)["objects"].rows
+        second = attention.filter(env, perception)["objects"].rows
+        self.assertFalse(np.intersect1d(first, second).size)
+        env.time += 100.0
+        scores = attention.salience(env, states, 0.0, 0.0)
+        np.testing.assert_allclose(scores, 1.0, atol=1e-6)
+
+    def test_incremental_perceptions_pass_through(self):
+        attention = AttentionFilter()
+        perception = {"position": (0.0, 0.0), "changes": None}
+        self.assertIs(attention.filter(_world(), perception), perception)
+        empty = {"position": (0.0, 0.0), "objects": ObjectStates(
+            np.empty(0, dtype=np.int64), np.empty((0, 2)), np.empty(0, dtype=bool))}
+        self.assertEqual(len(attention.filter(_world(), empty)["objects"]), 0)
+        with self.assertRaises(ValueError):
+            AttentionFilter(k=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Checks for the change log and the agents' world models."""
+
+import unittest
+
+import numpy as np
+
+from changes import ADDED, MOVED, REMOVED, SUNLIGHT, ChangeLog, WorldModel
+from environment import Environment, WorldObject
+
+
+def _model_matches(model: WorldModel, env: Environment) -> bool:
+    objects = env.objects
+    rows = objects.rows_of(model.ids[:len(model)])
+    return bool(np.array_equal(model.positions, np.column_stack([objects.x[rows], objects.y[rows]])))
+
+
+class ChangeLogTest(unittest.TestCase):
+    def test_reads_report_net_changes(self):
+        log = ChangeLog()
+        log.record(ADDED, np.array([1, 2, 3]))
+        cursor = log.seq
+        log.record(MOVED, np.array([1, 3]))
+        log.record(ADDED, np.array([4]))
+        log.record(MOVED, np.array([4, 3]))
+        log.record(REMOVED, np.array([2, 4]))
+        log.record(SUNLIGHT, 0.25)
+        log.record(MOVED, np.array([], dtype=np.int64))  # empty records are skipped
+        self.assertEqual(log.seq, cursor + 5)
+        added, moved, removed, sunlight = log.read(cursor)
+        # 4 came and went; 2 was removed, so it is not also reported as moved.
+        self.assertEqual(added.tolist(), [])
+        self.assertEqual(moved.tolist(), [1, 3])
+        self.assertEqual(removed.tolist(), [2])
+        self.assertEqual(sunlight, 0.25)
+        added, moved, removed, sunlight = log.read(log.seq)
+        self.assertEqual(len(added) + len(moved) + len(removed), 0)
+        self.assertIsNone(sunlight)
+
+    def test_readers_that_fall_behind_must_resynchronise(self):
+        log = ChangeLog(max_entries=3)
+        for i in range(5):
+            log.record(MOVED, np.array([i]))
+        self.assertIsNone(log.read(1))
+        self.assertEqual(log.read(2)[1].tolist(), [2, 3, 4])
+        self.assertIsNone(log.read(log.seq + 1))
+        log.clear()
+        self.assertIsNone(log.read(4))
+        self.assertIsNotNone(log.read(log.seq))
+
+
+class WorldModelTest(unittest.TestCase):
+    def test_model_follows_the_world_in_step_mode(self):
+        env = Environment(800, 600)
+        env.objects.extract(np.arange(env.objects.count))
+        env.objects.append(WorldObject(200, 0))
+        model = WorldModel()
+        changes = model.sync(env)
+        self.assertTrue(changes.reset)
+        self.assertTrue(_model_matches(model, env))
+        rock = WorldObject(600, 200, movable=True)
+        env.objects.append(rock)
+        for _ in range(5):
+            env.update_physics(0.05)
+        changes = model.sync(env)
+        self.assertEqual(changes.added.tolist(), [int(env.objects.ids[rock._index])])
+        self.assertIn(changes.added[0], model)
+        self.assertTrue(_model_matches(model, env))
+        # Only what moved is reported, not the static object.
+        env.update_physics(0.05)
+        changes = model.sync(env)
+        self.assertEqual(changes.moved.tolist(), [int(env.objects.ids[rock._index])])
+        self.assertTrue(_model_matches(model, env))
+        gone = int(env.objects.ids[rock._index])
+        env.objects.remove(rock)
+        changes = model.sync(env)
+        self.assertEqual(changes.removed.tolist(), [gone])
+        self.assertNotIn(gone, model)
+        self.assertEqual(model.within(200.0, 0.0, 5.0).tolist(), env.objects.ids[:1].tolist())
+
+    def test_lagging_model_is_rebuilt(self):
+        env = Environment(800, 600)
+        env.changes = env.objects.log = ChangeLog(max_entries=4)
+        model = WorldModel()
+        model.sync(env)
+        for _ in range(10):
+            env.update_physics(0.05)
+        changes = model.sync(env)
+        self.assertTrue(changes.reset)
+        self.assertEqual(len(model), env.objects.count)
+        self.assertTrue(_model_matches(model, env))
+
+
+class EventChangesTest(unittest.TestCase):
+    def test_objects_in_flight_are_reported_without_being_logged(self):
+        env = Environment(800, 600, physics="event")
+        n = 50
+        env.objects.extend({"x": np.arange(n) * 100.0, "y": np.full(n, 500.0),
+                            "movable": np.ones(n, dtype=bool)})
+        model = WorldModel()
+        model.sync(env)
+        env.update_physics(0.05)
+        logged = env.changes.seq
+        for _ in range(5):
+            env.update_physics(0.05)
+        # Only sunlight was logged while the rocks fell ...
+        moves = [kind for kind, _ in list(env.changes._entries)[logged - env.changes._first:]
+                 if kind == MOVED]
+        self.assertEqual(moves, [])
+        # ... yet a reader still sees them move.
+        changes = model.sync(env)
+        self.assertEqual(changes.moved.shape[0], n + 1)
+        self.assertTrue(_model_matches(model, env))
+        for _ in range(300):
+            env.update_physics(0.05)
+        model.sync(env)
+        self.assertTrue(_model_matches(model, env))
+        self.assertEqual(env.events.flying_rows().size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Regression checks for chunk loading and unloading."""
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from environment import Environment
+
+
+def _chunk_rows(env: Environment, chunk: int) -> np.ndarray:
+    x0, x1 = env.chunks.bounds(chunk)
+    x = env.objects.x
+    return np.nonzero((x >= x0) & (x < x1))[0]
+
+
+class ChunkTest(unittest.TestCase):
+    def test_drifted_objects_do_not_replace_generated_contents(self):
+        fresh = Environment(800, 600, seed=7)
+        fresh.update_chunks([5000.0])
+        expected = len(_chunk_rows(fresh, fresh.chunks.chunk_of(5000.0)))
+
+        env = Environment(800, 600, seed=7)
+        env.update_chunks([0.0])
+        # A rock drifts into a chunk that has never been generated.
+        env.objects.extend({"x": np.array([5000.0]), "y": np.array([0.0]),
+                            "movable": np.ones(1, dtype=bool)})
+        env.update_chunks([20000.0])
+        env.update_chunks([5000.0])
+        rows = _chunk_rows(env, env.chunks.chunk_of(5000.0))
+        self.assertEqual(len(rows), expected + 1)
+
+
+    def test_same_seed_generates_the_same_world(self):
+        worlds = []
+        for _ in range(2):
+            env = Environment(800, 600, seed=3)
+            env.update_chunks([10000.0])
+            worlds.append(sorted(zip(env.objects.x.tolist(), env.objects.y.tolist())))
+        self.assertEqual(worlds[0], worlds[1])
+        other = Environment(800, 600, seed=4)
+        other.update_chunks([10000.0])
+        self.assertNotEqual(sorted(zip(other.objects.x.tolist(), other.objects.y.tolist())), worlds[0])
+
+    def test_only_chunks_near_agents_stay_loaded(self):
+        env = Environment(800, 600, seed=0)
+        env.update_chunks([0.0])
+        self.assertEqual(env.chunks.loaded, {-1, 0, 1})
+        env.update_chunks([512.0 * 10])
+        self.assertEqual(env.chunks.loaded, {9, 10, 11})
+        x = env.objects.x
+        self.assertTrue(((x >= 512.0 * 9) & (x < 512.0 * 12)).all())
+
+    def test_unloaded_chunks_come_back_as_they_were_left(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for where in (None, cache_dir):
+                with self.subTest(cache_dir=where):
+                    env = Environment(800, 600, seed=5, cache_dir=where)
+                    env.objects.extract(np.arange(env.objects.count))
+                    env.update_chunks([0.0])
+                    for _ in range(200):
+                        env.update_physics(0.05)
+                    before = sorted(zip(env.objects.x.tolist(), env.objects.y.tolist()))
+                    env.update_chunks([512.0 * 20])
+                    env.update_chunks([0.0])
+                    after = sorted(zip(env.objects.x.tolist(), env.objects.y.tolist()))
+                    self.assertEqual(after, before)
+
+if __name__ == "__main__":
+    unittest.main()
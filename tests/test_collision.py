@@ -0,0 +1,71 @@
+"""Checks for the sweep-and-prune broadphase and circle contacts."""
+
+import unittest
+
+import numpy as np
+
+from collision import SweepAndPrune, resolve_circle_contacts
+from environment import ObjectStore
+
+
+def _store(xs, ys, movable, awake=None, vx=None) -> ObjectStore:
+    store = ObjectStore()
+    data = {"x": np.array(xs, dtype=float), "y": np.array(ys, dtype=float),
+            "movable": np.array(movable, dtype=bool)}
+    if awake is not None:
+        data["awake"] = np.array(awake, dtype=bool)
+    if vx is not None:
+        data["vx"] = np.array(vx, dtype=float)
+    store.extend(data)
+    return store
+
+
+class SweepAndPruneTest(unittest.TestCase):
+    def test_pairs_match_brute_force_as_objects_move(self):
+        rng = np.random.default_rng(0)
+        xs = rng.uniform(0.0, 1000.0, 200)
+        radii = rng.uniform(1.0, 15.0, 200)
+        broadphase = SweepAndPrune()
+        for _ in range(3):
+            a, b = broadphase.pairs(xs, radii)
+            found = {(min(i, j), max(i, j)) for i, j in zip(a.tolist(), b.tolist())}
+            lo, hi = xs - radii, xs + radii
+            expected = {(i, j) for i in range(200) for j in range(i + 1, 200)
+                        if lo[i] <= hi[j] and lo[j] <= hi[i]}
+            self.assertEqual(found, expected)
+            xs = xs + rng.normal(0.0, 5.0, 200)
+        # Rows may also disappear between calls.
+        a, b = broadphase.pairs(xs[:50], radii[:50])
+        self.assertTrue((a < 50).all() and (b < 50).all())
+
+
+class ResolveContactsTest(unittest.TestCase):
+    def test_overlapping_objects_are_separated(self):
+        store = _store([0.0, 15.0], [50.0, 50.0], [True, True], vx=[10.0, -10.0])
+        moved = resolve_circle_contacts(store, np.array([0]), np.array([1]))
+        self.assertEqual(sorted(moved.tolist()), [0, 1])
+        self.assertAlmostEqual(store.x[1] - store.x[0], 20.0)
+        self.assertAlmostEqual(store.x[0] + store.x[1], 15.0)
+        self.assertEqual(store.vx.tolist(), [0.0, 0.0])
+
+    def test_static_and_sleeping_objects_do_not_move(self):
+        store = _store([0.0, 15.0, 100.0, 110.0], [50.0] * 4, [False, True, True, True],
+                       awake=[True, True, False, False])
+        moved = resolve_circle_contacts(store, np.array([0, 2]), np.array([1, 3]))
+        self.assertEqual(moved.tolist(), [1])
+        self.assertEqual(store.x.tolist(), [0.0, 20.0, 100.0, 110.0])
+
+    def test_hard_hits_wake_sleepers(self):
+        store = _store([0.0, 15.0], [50.0, 50.0], [True, True], awake=[True, False], vx=[5.0, 0.0])
+        resolve_circle_contacts(store, np.array([0]), np.array([1]))
+        self.assertTrue(store.awake[1])
+
+    def test_grounded_objects_are_not_pushed_into_the_ground(self):
+        store = _store([0.0, 5.0], [0.0, 15.0], [True, True], vx=[0.0, 0.0])
+        resolve_circle_contacts(store, np.array([0]), np.array([1]))
+        self.assertEqual(store.y[0], 0.0)
+        self.assertGreaterEqual(np.hypot(store.x[1] - store.x[0], store.y[1] - store.y[0]), 20.0 - 1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
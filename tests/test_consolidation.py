@@ -0,0 +1,82 @@
+"""Checks for background memory consolidation."""
+
+import unittest
+
+import numpy as np
+
+from consolidation import Consolidator
+from memory import ExperienceBuffer
+from mind import Subconscious
+
+
+class ConsolidatorTest(unittest.TestCase):
+    def setUp(self):
+        self.consolidator = Consolidator(keep=4, batch=8, cell=(10.0, 10.0, 1.0))
+
+    def tearDown(self):
+        self.consolidator.close()
+
+    def test_oldest_experiences_are_folded_into_buckets(self):
+        memory = ExperienceBuffer(capacity=32)
+        evicted = []
+        for i in range(12):
+            # Two buckets, x in [0, 10) and [10, 20); action 1 in the first.
+            features = np.array([2.0 + 10.0 * (i % 2), 0.0, 0.5], dtype=np.float32)
+            memory.append(features, 1 - i % 2, 0, float(i), float(i))
+            evicted.append(self.consolidator.submit(memory))
+        self.assertEqual([e.size for e in evicted], [0] * 11 + [8])
+        self.assertEqual(evicted[-1].tolist(), list(range(8)))
+        self.assertEqual(memory.read()["times"].tolist(), [8.0, 9.0, 10.0, 11.0])
+        self.consolidator.drain()
+        summary = self.consolidator.summary
+        self.assertEqual((len(summary), summary.consolidated, summary.until), (2, 8, 7.0))
+        self.assertEqual(summary.keys.tolist(), [[0, 0, 0], [1, 0, 0]])
+        self.assertEqual(summary.experiences.tolist(), [4, 4])
+        # Columns: unknown action, opcode 0, opcode 1.
+        self.assertEqual(summary.counts.tolist(), [[0, 0, 4], [0, 4, 0]])
+        np.testing.assert_allclose(summary.mean_rewards()[:, 1:], [[np.nan, 3.0], [4.0, np.nan]])
+        np.testing.assert_allclose(summary.prototypes, [[2.0, 0.0, 0.5], [12.0, 0.0, 0.5]])
+        rows, distances = summary.nearest(np.array([11.0, 0.0, 0.5], dtype=np.float32))
+        self.assertEqual(rows.tolist(), [1])
+        self.assertAlmostEqual(distances[0], 1.0)
+
+    def test_summaries_accumulate_across_batches(self):
+        memory = ExperienceBuffer(capacity=64)
+        for i in range(40):
+            memory.append(np.array([1.0, 1.0, 0.0], dtype=np.float32), -1, 0, 1.0, float(i))
+            self.consolidator.submit(memory)
+            self.consolidator.drain()
+        summary = self.consolidator.summary
+        self.assertEqual(summary.consolidated, 32)
+        self.assertEqual(summary.counts.tolist(), [[32]])
+        self.assertEqual(len(memory), 8)
+
+
+class SubconsciousConsolidationTest(unittest.TestCase):
+    def test_evicted_experiences_leave_the_recall_index(self):
+        consolidator = Consolidator(keep=8, batch=8)
+        try:
+            subconscious = Subconscious(capacity=64, consolidator=consolidator)
+            for i in range(20):
+                perception = {"position": (5.0 * i, 0.0), "sunlight": 1.0, "time": float(i)}
+                subconscious.record(perception, ["mi", "lon"], ["lon"], 0.0)
+            consolidator.drain()
+            self.assertEqual(len(subconscious.memory), 12)
+            self.assertEqual(len(subconscious.index), 12)
+            recalled = subconscious.recall({"position": (0.0, 0.0), "sunlight": 1.0}, k=4)
+            self.assertTrue((recalled["times"] >= 8.0).all())
+            self.assertEqual(consolidator.summary.consolidated, 8)
+            # x = 0 .. 30 share the nearest bucket; 35 is in the next one.
+            summary = subconscious.recall_summary({"position": (0.0, 0.0), "sunlight": 1.0})
+            self.assertEqual(summary["counts"].sum(), 7)
+            self.assertAlmostEqual(summary["prototypes"][0, 0], 15.0)
+        finally:
+            consolidator.close()
+        wrong = Consolidator(feature_size=5)
+        with self.assertRaises(ValueError):
+            Subconscious(feature_size=3, consolidator=wrong)
+        wrong.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
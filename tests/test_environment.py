@@ -0,0 +1,87 @@
+"""Checks for the structure-of-arrays object store."""
+
+import unittest
+
+import numpy as np
+
+from environment import Environment, ObjectStore, WorldObject
+
+
+class ObjectStoreTest(unittest.TestCase):
+    def test_vectorised_step_matches_per_object_update(self):
+        env = Environment(800, 600)
+        rng = np.random.default_rng(0)
+        n = 20
+        rows = env.objects.extend({"x": np.arange(n) * 100.0 + 1000.0,
+                                   "y": rng.uniform(50.0, 100.0, n),
+                                   "vx": rng.uniform(-5.0, 5.0, n),
+                                   "vy": rng.uniform(-5.0, 5.0, n),
+                                   "movable": np.ones(n, dtype=bool)})
+        loose = [WorldObject(float(x), float(y), movable=True)
+                 for x, y in zip(env.objects.x[rows], env.objects.y[rows])]
+        for obj, vx, vy in zip(loose, env.objects.vx[rows], env.objects.vy[rows]):
+            obj.velocity_x, obj.velocity_y = float(vx), float(vy)
+        for _ in range(10):
+            env.update_physics(0.05)
+            for obj in loose:
+                obj.update(0.05, env.gravity)
+        np.testing.assert_allclose(env.objects.x[rows], [obj.x for obj in loose])
+        np.testing.assert_allclose(env.objects.y[rows], [obj.y for obj in loose])
+
+    def test_views_follow_their_rows(self):
+        store = ObjectStore()
+        a, b, c = (WorldObject(float(i), 0.0, movable=True) for i in range(3))
+        for obj in (a, b, c):
+            store.append(obj)
+        ids = store.ids.copy()
+        b.x = 42.0
+        self.assertEqual(store.x[1], 42.0)
+        store.remove(a)
+        # The last row fills the gap; ids and views stay with their objects.
+        self.assertEqual(len(store), 2)
+        self.assertEqual((c._index, c.x), (0, 2.0))
+        self.assertEqual(store.rows_of(ids[1:]).tolist(), [b._index, c._index])
+        self.assertEqual(a.x, 0.0)
+        self.assertIsNot(a._store, store)
+
+    def test_extract_compacts_rows_and_extend_restores_them(self):
+        store = ObjectStore()
+        store.extend({"x": np.arange(5.0), "y": np.zeros(5), "movable": np.ones(5, dtype=bool)})
+        views = list(store)
+        data = store.extract(np.array([1, 3]))
+        self.assertEqual(store.x.tolist(), [0.0, 2.0, 4.0])
+        self.assertEqual(data["x"].tolist(), [1.0, 3.0])
+        self.assertEqual(views[4]._index, 2)
+        self.assertEqual(views[3].x, 3.0)
+        store.extend(data)
+        self.assertEqual(store.x.tolist(), [0.0, 2.0, 4.0, 1.0, 3.0])
+        self.assertTrue(store.movable.all())
+
+
+class ObjectStatesTest(unittest.TestCase):
+    def test_world_objects_hold_no_instance_dict(self):
+        rock = WorldObject(1.0, 2.0, movable=True)
+        self.assertFalse(hasattr(rock, "__dict__"))
+        with self.assertRaises(AttributeError):
+            rock.colour = "grey"
+        self.assertEqual(rock.get_state(), {"position": (1.0, 2.0), "movable": True})
+
+    def test_states_match_get_state_and_are_read_only(self):
+        env = Environment(800, 600)
+        states = env.query_radius_states(300.0, 50.0, 150.0)
+        objects = env.query_radius(300.0, 50.0, 150.0)
+        self.assertEqual(len(states), len(objects))
+        self.assertGreater(len(states), 0)
+        self.assertEqual(list(states), [obj.get_state() for obj in objects])
+        for array in (states.rows, states.positions, states.movable):
+            with self.assertRaises(ValueError):
+                array[0] = 0
+        # The states are a snapshot: later moves do not show through.
+        before = states.positions.copy()
+        objects[0].x += 25.0
+        np.testing.assert_array_equal(states.positions, before)
+        self.assertEqual(len(env.query_radius_states(-5000.0, 0.0, 10.0)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Checks for the on-disk episodic log."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from episodic import EpisodicLog
+
+
+def _append(log: EpisodicLog, times) -> None:
+    for t in times:
+        sentence = ["mi", "tawa"] if t % 2 else ["mi", "lon"]
+        log.append(np.full(2, t, dtype=np.float32), int(t) % 3, sentence, 0.1 * t, float(t))
+
+
+class EpisodicLogTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "log")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_span_segments_and_ranges(self):
+        with EpisodicLog(self.path, feature_size=2, segment_records=4) as log:
+            _append(log, range(10))
+            self.assertEqual(len(log), 10)
+            self.assertEqual(sorted(f for f in os.listdir(self.path) if f.startswith("segment")),
+                             ["segment_00000000.bin", "segment_00000001.bin", "segment_00000002.bin"])
+            self.assertEqual(log.read()["time"].tolist(), [float(t) for t in range(10)])
+            self.assertEqual(log.read(3, 6)["action"].tolist(), [0, 1, 2])
+            self.assertEqual(log.range(2.5, 7.0)["time"].tolist(), [3.0, 4.0, 5.0, 6.0])
+            self.assertEqual(log.range(20.0).shape, (0,))
+            self.assertEqual(log.last(2)["features"].tolist(), [[8.0, 8.0], [9.0, 9.0]])
+            records = log.read(0, 2)
+            self.assertEqual([log.sentence(s) for s in records["sentence"]],
+                             [["mi", "lon"], ["mi", "tawa"]])
+            self.assertEqual(log.sentence(99), [])
+
+    def test_reopening_resumes_the_log(self):
+        with EpisodicLog(self.path, feature_size=2, segment_records=4) as log:
+            _append(log, range(6))
+        # The stored layout wins over the arguments.
+        with EpisodicLog(self.path, feature_size=7, segment_records=100) as log:
+            self.assertEqual((log.feature_size, log.segment_records), (2, 4))
+            self.assertEqual(len(log), 6)
+            self.assertEqual(log.sentence_id(["mi", "tawa"]), 1)
+            _append(log, range(6, 9))
+            self.assertEqual(log.read()["time"].tolist(), [float(t) for t in range(9)])
+            self.assertEqual(log.range(7.0)["time"].tolist(), [7.0, 8.0])
+        with open(os.path.join(self.path, "sentences.txt")) as f:
+            self.assertEqual(f.read().splitlines(), ["mi lon", "mi tawa"])
+
+    def test_a_torn_record_is_discarded(self):
+        with EpisodicLog(self.path, feature_size=2, segment_records=4) as log:
+            _append(log, range(6))
+            itemsize = log.dtype.itemsize
+        segment = os.path.join(self.path, "segment_00000001.bin")
+        with open(segment, "ab") as f:
+            f.write(b"\x01" * (itemsize // 2))
+        with EpisodicLog(self.path) as log:
+            self.assertEqual(len(log), 6)
+            self.assertEqual(os.path.getsize(segment), 2 * itemsize)
+            _append(log, [6])
+            self.assertEqual(log.last(2)["time"].tolist(), [5.0, 6.0])
+
+    def test_empty_trailing_segments_are_dropped(self):
+        with EpisodicLog(self.path, feature_size=2, segment_records=4) as log:
+            _append(log, range(5))
+        # As if the process died right after starting segment 1.
+        with open(os.path.join(self.path, "segment_00000001.bin"), "wb"):
+            pass
+        with EpisodicLog(self.path) as log:
+            self.assertEqual(len(log), 4)
+            _append(log, [4, 5])
+            self.assertEqual(log.read()["time"].tolist(), [0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+            self.assertEqual(log.range(4.0)["time"].tolist(), [4.0, 5.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+"""Checks that the simulation runs without Pygame."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make any import of pygame fail, then run a short simulation.
+SCRIPT = """
+import sys
+sys.modules["pygame"] = None
+import main
+sentence = main.run_headless(240, seed=1)
+population = main.run_population(120, 8, seed=1)
+assert sentence and population.sentence(0), (sentence, population.sentence(0))
+"""
+
+
+class HeadlessTest(unittest.TestCase):
+    def test_simulation_runs_without_pygame(self):
+        result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT,
+                                capture_output=True, text=True, timeout=300)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Checks for the columnar experience buffer."""
+
+import unittest
+
+import numpy as np
+
+from memory import ExperienceBuffer
+
+
+def _filled(capacity: int, n: int) -> ExperienceBuffer:
+    buffer = ExperienceBuffer(capacity=capacity, feature_size=2)
+    for i in range(n):
+        buffer.append(np.array([i, -i], dtype=np.float32), i % 3, 0, 0.5 * i, float(i))
+    return buffer
+
+
+class ExperienceBufferTest(unittest.TestCase):
+    def test_ring_keeps_the_newest_experiences(self):
+        buffer = _filled(5, 12)
+        self.assertEqual((len(buffer), buffer.total), (5, 12))
+        data = buffer.read()
+        self.assertEqual(data["times"].tolist(), [7.0, 8.0, 9.0, 10.0, 11.0])
+        self.assertEqual(data["features"][:, 1].tolist(), [-7.0, -8.0, -9.0, -10.0, -11.0])
+        self.assertEqual(data["actions"].tolist(), [1, 2, 0, 1, 2])
+        # Ranges that wrap around the end of the arrays read back in order.
+        self.assertEqual(buffer.read(1, 4)["times"].tolist(), [8.0, 9.0, 10.0])
+        self.assertEqual(buffer.read(-2)["times"].tolist(), [10.0, 11.0])
+        self.assertEqual(buffer.last(3)["rewards"].tolist(), [4.5, 5.0, 5.5])
+        self.assertEqual(buffer.since(9.5)["times"].tolist(), [10.0, 11.0])
+        self.assertEqual(buffer.read(3, 1)["times"].tolist(), [])
+        slots = buffer.slots_of(np.arange(5))
+        self.assertEqual(buffer.gather(slots)["times"].tolist(), data["times"].tolist())
+
+    def test_reads_are_copies(self):
+        buffer = _filled(4, 3)
+        data = buffer.read()
+        data["rewards"][:] = 99.0
+        self.assertEqual(buffer.read()["rewards"].tolist(), [0.0, 0.5, 1.0])
+
+    def test_features_are_fitted_to_the_row(self):
+        buffer = ExperienceBuffer(capacity=3, feature_size=3)
+        buffer.append(np.arange(5, dtype=np.float32), 0, 0, 0.0, 0.0)
+        buffer.append(np.ones(1, dtype=np.float32), 0, 0, 0.0, 1.0)
+        buffer.append(None, 0, 0, 0.0, 2.0)
+        self.assertEqual(buffer.read()["features"].tolist(),
+                         [[0.0, 1.0, 2.0], [1.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+
+    def test_discard_drops_the_oldest(self):
+        buffer = _filled(4, 6)
+        self.assertEqual(buffer.discard(3).tolist(), [2, 3, 0])
+        self.assertEqual(buffer.read()["times"].tolist(), [5.0])
+        self.assertEqual(buffer.discard(10).tolist(), [1])
+        self.assertEqual(len(buffer), 0)
+        buffer.append(None, 0, 0, 0.0, 9.0)
+        self.assertEqual(buffer.read()["times"].tolist(), [9.0])
+
+    def test_sentences_are_interned(self):
+        buffer = ExperienceBuffer()
+        a = buffer.sentence_id(["mi", "tawa"])
+        b = buffer.sentence_id(["mi", "lon"])
+        self.assertEqual(buffer.sentence_id(("mi", "tawa")), a)
+        self.assertNotEqual(a, b)
+        tokens = buffer.sentence(a)
+        tokens.append("x")
+        self.assertEqual(buffer.sentence(a), ["mi", "tawa"])
+        with self.assertRaises(ValueError):
+            ExperienceBuffer(capacity=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
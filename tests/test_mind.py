@@ -0,0 +1,106 @@
+"""Checks for the agent's cognitive layers."""
+
+import unittest
+
+import numpy as np
+
+from agent import Agent
+from environment import Environment
+from grammar import TokiPonaGrammar
+from mind import Mind, Subconscious, Superego
+from perception import PerceptionEncoder
+from personality import Personality
+
+
+def _mind(**kwargs) -> Mind:
+    return Mind(grammar=TokiPonaGrammar(), personality=Personality(0.5, 0.5, 0.5, 0.5, 0.5), **kwargs)
+
+
+class FeatureSizeTest(unittest.TestCase):
+    def test_memory_is_sized_from_the_encoder(self):
+        env = Environment(800, 600)
+        encoder = PerceptionEncoder()
+        mind = _mind(encoder=encoder)
+        agent = Agent(env=env, mind=mind, encoder=encoder)
+        agent.update(0.05)
+        memory = mind.subconscious.memory
+        self.assertEqual(memory.feature_size, encoder.size)
+        np.testing.assert_array_equal(memory.features[0], agent.features)
+
+    def test_mismatched_sizes_are_rejected(self):
+        encoder = PerceptionEncoder()
+        with self.assertRaises(ValueError):
+            _mind(feature_size=3, encoder=encoder)
+        mind = _mind()
+        with self.assertRaises(ValueError):
+            Agent(env=Environment(800, 600), mind=mind, encoder=encoder)
+        with self.assertRaises(ValueError):
+            Subconscious(feature_size=3).record({"features": np.zeros(35, dtype=np.float32)},
+                                                ["mi", "tawa"], ["tawa"], 1.0)
+
+
+class SuperegoTest(unittest.TestCase):
+    def test_rewards_strengthen_and_punishments_release_rules(self):
+        superego = Superego()
+        superego.update(["tawa"], 1.0)
+        superego.update(["tawa"], 0.5)
+        superego.update(["moku"], -1.0)
+        self.assertEqual(superego.rules, {"tawa": 1.5})
+        rule = superego.lookup(["tawa"])
+        self.assertEqual(superego.action(rule), ("tawa",))
+        superego.update(["tawa"], -2.0)
+        self.assertEqual((len(superego), superego.lookup(["tawa"])), (0, None))
+        self.assertEqual(superego.weight(["tawa"]), 0.0)
+
+    def test_least_frequently_used_rule_is_evicted(self):
+        superego = Superego(capacity=3)
+        for action in ("a", "b", "c"):
+            superego.update([action], 1.0)
+        superego.weight(["a"])
+        superego.weight(["c"])
+        superego.update(["d"], 1.0)
+        # b has the fewest uses.
+        self.assertEqual(sorted(superego.rules), ["a", "c", "d"])
+        self.assertEqual(len(superego), 3)
+        # Ties go to the least recently used: a was last used before c and d.
+        superego.weight(["d"])
+        superego.update(["e"], 1.0)
+        self.assertEqual(sorted(superego.rules), ["c", "d", "e"])
+
+    def test_least_recently_used_rule_is_evicted(self):
+        superego = Superego(capacity=2, policy="lru")
+        superego.update(["a"], 1.0)
+        superego.weight(["a"])
+        superego.weight(["a"])
+        superego.update(["b"], 1.0)
+        superego.update(["c"], 1.0)
+        self.assertEqual(sorted(superego.rules), ["b", "c"])
+        with self.assertRaises(ValueError):
+            Superego(policy="fifo")
+
+    def test_weights_decay_lazily_with_time(self):
+        superego = Superego(half_life=10.0)
+        superego.update(["tawa"], 4.0, time=0.0)
+        superego.update(["lon"], 1.0, time=20.0)
+        self.assertAlmostEqual(superego.weight(["tawa"]), 1.0)
+        self.assertAlmostEqual(superego.get_norms()["tawa"], 1.0)
+        # Further rewards add to the decayed weight.
+        superego.update(["tawa"], 1.0, time=30.0)
+        self.assertAlmostEqual(superego.rules["tawa"], 1.5)
+        self.assertAlmostEqual(superego.rules["lon"], 0.5)
+        # Time never runs backwards.
+        superego.update(["moku"], 1.0, time=5.0)
+        self.assertEqual(superego.now, 30.0)
+
+    def test_norms_are_a_read_only_view(self):
+        superego = Superego()
+        norms = superego.get_norms()
+        superego.update(["mi", "tawa"], 2.0)
+        self.assertEqual(dict(norms), {"mi tawa": 2.0})
+        self.assertNotIn("lon", norms)
+        with self.assertRaises(TypeError):
+            norms["lon"] = 1.0
+
+
+if __name__ == "__main__":
+    unittest.main()
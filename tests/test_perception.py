@@ -0,0 +1,65 @@
+"""Checks for the fixed-length perception encoder."""
+
+import unittest
+
+import numpy as np
+
+from environment import Environment
+from perception import HEADER, SLOT, SUNLIGHT, PerceptionEncoder
+
+
+def _world(n: int = 400) -> Environment:
+    env = Environment(800, 600)
+    rng = np.random.default_rng(0)
+    env.objects.extend({"x": rng.uniform(0.0, 2000.0, n), "y": rng.uniform(0.0, 300.0, n),
+                        "movable": rng.random(n) < 0.5})
+    return env
+
+
+class PerceptionEncoderTest(unittest.TestCase):
+    def test_slots_hold_the_nearest_objects_in_range(self):
+        env = _world()
+        encoder = PerceptionEncoder(k=5, radius=100.0)
+        x, y = 1000.0, 100.0
+        features = encoder.encode(env, x, y)
+        self.assertEqual(features.shape, (HEADER + SLOT * 5,))
+        self.assertEqual(features.dtype, np.float32)
+        self.assertEqual(features[SUNLIGHT], np.float32(env.sunlight))
+        d = np.hypot(env.objects.x - x, env.objects.y - y)
+        nearest = np.argsort(d)[:5]
+        slots = features[HEADER:].reshape(5, SLOT)
+        in_range = d[nearest] <= 100.0
+        self.assertTrue(in_range.any())
+        np.testing.assert_allclose(slots[in_range, 0], (env.objects.x[nearest] - x)[in_range] / 100.0,
+                                   rtol=1e-6)
+        np.testing.assert_array_equal(slots[in_range, 2], env.objects.movable[nearest][in_range])
+        np.testing.assert_array_equal(slots[:, 3], in_range)
+        self.assertFalse(slots[~in_range].any())
+
+    def test_batch_matches_single_encodings(self):
+        env = _world()
+        encoder = PerceptionEncoder(k=4, radius=150.0)
+        rng = np.random.default_rng(1)
+        xs = np.append(rng.uniform(0.0, 2000.0, 50), -5000.0)  # the last sees nothing
+        ys = np.append(rng.uniform(0.0, 300.0, 50), 0.0)
+        out = np.full((51, encoder.size), 7.0, dtype=np.float32)
+        batch = encoder.encode_batch(env, xs, ys, out=out)
+        self.assertIs(batch, out)
+        for i in range(51):
+            np.testing.assert_allclose(batch[i], encoder.encode(env, xs[i], ys[i]), atol=1e-6)
+        self.assertFalse(batch[50, HEADER:].any())
+
+    def test_buffers_are_reused(self):
+        env = _world()
+        encoder = PerceptionEncoder(k=2)
+        first = encoder.encode(env, 100.0, 0.0)
+        self.assertIs(encoder.encode(env, 500.0, 0.0), first)
+        out = np.zeros(encoder.size, dtype=np.float32)
+        self.assertIs(encoder.encode(env, 100.0, 0.0, out=out), out)
+        self.assertEqual(PerceptionEncoder(k=0).encode(env, 1.0, 2.0).tolist()[:2], [1.0, 2.0])
+        with self.assertRaises(ValueError):
+            PerceptionEncoder(radius=0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
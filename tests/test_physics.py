@@ -0,0 +1,210 @@
+"""Regression checks for the step and event physics backends."""
+
+import time
+import unittest
+
+import numpy as np
+
+from collision import SUPPORT_MARGIN
+from environment import Environment, WorldObject
+
+
+def _rocks(physics: str, seed: int, overlapping: bool, n: int = 150) -> Environment:
+    # ``n`` rocks scattered above the ground with random horizontal speeds.
+    env = Environment(800, 600, physics=physics)
+    env.objects.extract(np.arange(env.objects.count))
+    rng = np.random.default_rng(seed)
+    xs, ys = [], []
+    while len(xs) < n:
+        x, y = rng.uniform(0.0, 3000.0), rng.uniform(0.0, 200.0)
+        if overlapping or all((x - a) ** 2 + (y - b) ** 2 >= 400.0 for a, b in zip(xs, ys)):
+            xs.append(x)
+            ys.append(y)
+    env.objects.extend({"x": np.array(xs), "y": np.array(ys),
+                        "vx": rng.uniform(-40.0, 40.0, n), "movable": np.ones(n, dtype=bool)})
+    return env
+
+
+def _unsupported_sleepers(env: Environment) -> np.ndarray:
+    # Sleeping movable objects above the ground touching nothing lower down.
+    objects = env.objects
+    x, y, r = objects.x, objects.y, objects.radius
+    gap = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :]) - (r[:, None] + r[None, :])
+    np.fill_diagonal(gap, np.inf)
+    supported = ((gap <= SUPPORT_MARGIN) & (y[None, :] < y[:, None])).any(axis=1)
+    asleep = objects.movable & ~objects.awake & (y > 0.0)
+    return np.nonzero(asleep & ~supported)[0]
+
+
+def _overlapping_pairs(env: Environment, tolerance: float = 5.0) -> int:
+    objects = env.objects
+    x, y, r = objects.x, objects.y, objects.radius
+    gap = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :]) - (r[:, None] + r[None, :])
+    upper = np.triu_indices(len(objects), 1)
+    return int(np.count_nonzero(gap[upper] < -tolerance))
+
+
+class PhysicsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Worlds of rocks left to settle, shared by the tests below.
+        cls.settled = {}
+        for physics in ("step", "event"):
+            for overlapping in (False, True):
+                for seed in (0, 1):
+                    env = _rocks(physics, seed, overlapping)
+                    for _ in range(320):
+                        env.update_physics(0.05)
+                    cls.settled[physics, overlapping, seed] = env
+
+    def test_objects_end_without_overlaps(self):
+        for (physics, overlapping, seed), env in self.settled.items():
+            with self.subTest(physics=physics, overlapping=overlapping, seed=seed):
+                self.assertEqual(_overlapping_pairs(env), 0)
+
+    def test_no_object_sleeps_without_support(self):
+        for (physics, overlapping, seed), env in self.settled.items():
+            with self.subTest(physics=physics, overlapping=overlapping, seed=seed):
+                self.assertEqual(_unsupported_sleepers(env).tolist(), [])
+        for physics in ("step", "event"):
+            with self.subTest(physics=physics, pair=True):
+                # Two overlapping rocks pushed apart in mid-air must still fall.
+                env = Environment(800, 600, physics=physics)
+                env.objects.extend({"x": np.array([1000.0, 1012.0]), "y": np.array([200.0, 200.0]),
+                                    "movable": np.ones(2, dtype=bool)})
+                for _ in range(200):
+                    env.update_physics(0.05)
+                self.assertEqual(env.objects.y[-2:].tolist(), [0.0, 0.0])
+                self.assertEqual(_unsupported_sleepers(env).tolist(), [])
+
+    def test_event_mode_keeps_ballistic_and_idle_ticks_cheap(self):
+        # Rocks dropped far apart cost nothing while they fall or rest
+        # and one event each when they land; in flight and at rest the
+        # ticks are no dearer than stepping.
+        n = 5000
+        seconds = {}
+        for physics in ("step", "event"):
+            env = Environment(800, 600, physics=physics)
+            env.objects.extract(np.arange(env.objects.count))
+            rng = np.random.default_rng(0)
+            env.objects.extend({"x": np.arange(n) * 100.0, "y": rng.uniform(2000.0, 3000.0, n),
+                                "movable": np.ones(n, dtype=bool)})
+            start = time.perf_counter()
+            for _ in range(60):
+                env.update_physics(0.05)
+            flight = time.perf_counter() - start
+            while env.objects.awake.any():
+                env.update_physics(0.05)
+            start = time.perf_counter()
+            for _ in range(100):
+                env.update_physics(0.05)
+            seconds[physics] = flight, time.perf_counter() - start
+            self.assertEqual(env.objects.y.tolist(), [0.0] * n)
+            if physics == "event":
+                self.assertEqual(env.events.events_processed, n)
+                self.assertIsNone(env.objects.pending)
+        for step, event in zip(seconds["step"], seconds["event"]):
+            self.assertLess(event, step + 0.05)
+
+    def test_interpolation_blends_the_last_tick(self):
+        for physics in ("step", "event"):
+            with self.subTest(physics=physics):
+                env = Environment(800, 600, physics=physics)
+                rock = WorldObject(1000, 300, movable=True)
+                env.objects.append(rock)
+                for _ in range(3):
+                    before = rock.y
+                    env.update_physics(0.05)
+                    _, ys = env.objects.interpolated(0.0)
+                    self.assertAlmostEqual(ys[rock._index], before)
+                    _, ys = env.objects.interpolated(0.5)
+                    self.assertAlmostEqual(ys[rock._index], 0.5 * (before + rock.y))
+                    self.assertLess(rock.y, before)
+
+    def test_sleeper_falls_when_support_moves_away(self):
+        for physics in ("step", "event"):
+            with self.subTest(physics=physics):
+                env = Environment(800, 600, physics=physics)
+                bottom = WorldObject(100, 0, movable=True)
+                top = WorldObject(100, 20, movable=True)
+                env.objects.append(bottom)
+                env.objects.append(top)
+                for _ in range(100):
+                    env.update_physics(0.05)
+                self.assertFalse(top.awake)
+                bottom.apply_impulse(60, 0)
+                for _ in range(100):
+                    env.update_physics(0.05)
+                self.assertEqual(top.y, 0.0)
+
+
+class EventTest(unittest.TestCase):
+    def test_trajectories_follow_the_closed_form(self):
+        env = Environment(800, 600, physics="event")
+        env.objects.extract(np.arange(env.objects.count))
+        rock = WorldObject(1000, 100, movable=True)
+        env.objects.append(rock)
+        rock.apply_impulse(20, 10)
+        env.update_physics(0.05)
+        g = env.gravity
+        # The trajectory is anchored where the impulse was applied.
+        for t in (0.5, 1.0, 2.0):
+            x, y = env.position_at(rock, env.time - 0.05 + t)
+            self.assertAlmostEqual(x, 1000 + 20 * t)
+            self.assertAlmostEqual(y, 100 + 10 * t - 0.5 * g * t * t)
+        # It lands once, then slides to rest under friction.
+        landing = (10 + np.sqrt(100 + 2 * g * 100)) / g
+        while env.time < landing + 0.05:
+            env.update_physics(0.05)
+        self.assertEqual(rock.y, 0.0)
+        self.assertEqual(env.events.events_processed, 1)
+        for _ in range(40):
+            env.update_physics(0.05)
+        self.assertFalse(rock.awake)
+        slide = 20 * (1 - env.objects.sleep_velocity / 20) / env.friction
+        self.assertAlmostEqual(rock.x, 1000 + 20 * landing + slide)
+        self.assertEqual(env.events.events_processed, 2)
+
+
+class SleepTest(unittest.TestCase):
+    def test_resting_objects_fall_asleep_and_are_skipped(self):
+        env = Environment(800, 600)
+        env.objects.extract(np.arange(env.objects.count))
+        rock = WorldObject(1000, 0, movable=True)
+        env.objects.append(rock)
+        steps = int(np.ceil(env.objects.sleep_delay / 0.05))
+        for _ in range(steps - 1):
+            env.update_physics(0.05)
+        self.assertTrue(rock.awake)
+        env.update_physics(0.05)
+        env.update_physics(0.05)
+        self.assertFalse(rock.awake)
+        self.assertEqual(env.objects.awake_count, 0)
+        self.assertEqual(env.objects.sleeping_count, 1)
+        # Sleeping objects are not integrated, even if their state says
+        # they should move.
+        env.objects._vy[rock._index] = -50.0
+        env.update_physics(0.05)
+        self.assertEqual(rock.y, 0.0)
+
+    def test_objects_wake_when_disturbed(self):
+        env = Environment(800, 600)
+        rocks = [WorldObject(1000 + 100 * i, 0, movable=True) for i in range(3)]
+        for rock in rocks:
+            env.objects.append(rock)
+        for _ in range(20):
+            env.update_physics(0.05)
+        self.assertFalse(any(rock.awake for rock in rocks))
+        self.assertEqual(env.wake_radius(1000, 0, 20), 1)
+        self.assertTrue(rocks[0].awake)
+        rocks[1].apply_impulse(10, 20)
+        self.assertTrue(rocks[1].awake)
+        env.update_physics(0.05)
+        self.assertGreater(rocks[1].y, 0.0)
+        self.assertFalse(rocks[2].awake)
+        env.terrain_changed(1150, 1250)
+        self.assertTrue(rocks[2].awake)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Checks for the vectorised agent population."""
+
+import unittest
+
+import numpy as np
+
+from environment import Environment
+from population import ACTIONS, LON, MOKU, TAWA, AgentPopulation
+
+
+class AgentPopulationTest(unittest.TestCase):
+    def test_perception_counts_match_brute_force(self):
+        env = Environment(800, 600)
+        rng = np.random.default_rng(0)
+        env.objects.extend({"x": rng.uniform(0.0, 800.0, 300), "y": np.zeros(300),
+                            "movable": np.zeros(300, dtype=bool)})
+        population = AgentPopulation.random(env, 40, seed=0)
+        population.perceive()
+        ox, oy = env.objects.x, env.objects.y
+        for i in range(len(population)):
+            d2 = (ox - population.x[i]) ** 2 + (oy - population.y[i]) ** 2
+            self.assertEqual(population.nearby[i], np.count_nonzero(d2 <= 200.0 ** 2))
+        self.assertEqual(population.sunlight, env.sunlight)
+
+    def test_choices_follow_the_personality_weights(self):
+        # Extraversion 1 and neutral mood weight tawa, lon, moku as 3:1:1
+        # in Personality.influence_action.
+        env = Environment(800, 600)
+        n = 20000
+        traits = np.tile([0.0, 0.0, 1.0, 0.0, 0.0], (n, 1))
+        population = AgentPopulation(env, traits, seed=1)
+        population.decide()
+        shares = np.bincount(population.actions, minlength=len(ACTIONS)) / n
+        np.testing.assert_allclose(shares, [0.6, 0.2, 0.2], atol=0.02)
+        # A neurotic agent with no openness never picks moku.
+        population = AgentPopulation(env, np.tile([0.0, 0.0, 0.0, 0.0, 1.0], (n, 1)), seed=1)
+        population.decide()
+        self.assertEqual(np.count_nonzero(population.actions == MOKU), 0)
+
+    def test_rewards_update_mood_and_norms(self):
+        env = Environment(800, 600)
+        population = AgentPopulation(env, np.tile([0.0, 0.0, 1.0, 0.0, 0.0], (200, 1)), seed=2)
+        population.sunlight = 0.5
+        actions = population.decide().copy()
+        tawa = actions == TAWA
+        np.testing.assert_allclose(population.rewards, np.where(tawa, 0.5, 0.0))
+        np.testing.assert_allclose(population.mood, np.where(tawa, 0.5, 0.0))
+        np.testing.assert_allclose(population.norms[:, TAWA], np.where(tawa, 0.5, 0.0))
+        self.assertFalse(population.norms[:, [LON, MOKU]].any())
+
+    def test_act_moves_walkers_and_mirrors_agents(self):
+        env = Environment(800, 600)
+        population = AgentPopulation(env, np.full((3, 5), 0.5), x=np.array([10.0, 20.0, 798.0]))
+        population.actions[:] = [TAWA, LON, TAWA]
+        population.act()
+        self.assertEqual(population.x.tolist(), [15.0, 20.0, 800.0])
+        self.assertEqual(population.prev_x.tolist(), [10.0, 20.0, 798.0])
+        agent = population.agent(0)
+        self.assertEqual((agent.x, agent.prev_x), (15.0, 10.0))
+        self.assertEqual(agent.mind.ego.personality.openness, 0.5)
+        population.act()
+        self.assertEqual(agent.x, 15.0)
+        population.sync_agents()
+        self.assertEqual(agent.x, 20.0)
+        self.assertEqual(population.sentence(1), ["mi", "lon"])
+
+    def test_only_due_agents_decide(self):
+        env = Environment(800, 600)
+        population = AgentPopulation.random(env, 50, seed=3)
+        population.actions[:] = MOKU
+        due = np.zeros(50, dtype=bool)
+        due[::5] = True
+        population.update(0.05, due)
+        self.assertTrue((population.actions[~due] == MOKU).all())
+        self.assertTrue((population.rewards[~due] == 0.0).all())
+        population.actions[:] = LON
+        x = population.x.copy()
+        population.update(0.05, np.zeros(50, dtype=bool))
+        np.testing.assert_array_equal(population.x, x)
+        self.assertTrue((population.actions == LON).all())
+
+    def test_traits_must_be_big_five(self):
+        with self.assertRaises(ValueError):
+            AgentPopulation(Environment(800, 600), np.zeros((4, 3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
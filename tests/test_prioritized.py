@@ -0,0 +1,86 @@
+"""Checks for the sum tree and prioritized replay."""
+
+import unittest
+
+import numpy as np
+
+from memory import ExperienceBuffer
+from mind import Subconscious
+from prioritized import PrioritizedReplayBuffer, SumTree
+
+
+class SumTreeTest(unittest.TestCase):
+    def test_find_matches_a_cumulative_search(self):
+        for capacity in (1, 5, 64, 100):
+            with self.subTest(capacity=capacity):
+                rng = np.random.default_rng(capacity)
+                priorities = rng.uniform(0.0, 2.0, capacity)
+                priorities[rng.random(capacity) < 0.2] = 0.0
+                priorities[0] = 1.0
+                tree = SumTree(capacity)
+                tree.update(np.arange(capacity), priorities)
+                self.assertAlmostEqual(tree.total, priorities.sum())
+                values = rng.uniform(0.0, priorities.sum(), 500)
+                expected = np.searchsorted(np.cumsum(priorities), values, side="left")
+                np.testing.assert_array_equal(tree.find(values), expected)
+
+    def test_updates_refresh_the_sums(self):
+        tree = SumTree(6)
+        tree.update(np.arange(6), np.ones(6))
+        tree.update(np.array([2, 5]), np.array([4.0, 0.0]))
+        self.assertEqual(tree.total, 8.0)
+        self.assertEqual(tree.get(np.array([2, 5])).tolist(), [4.0, 0.0])
+        self.assertEqual(tree.find(np.array([0.5, 2.5, 5.9, 7.9])).tolist(), [0, 2, 2, 4])
+        with self.assertRaises(ValueError):
+            SumTree(0)
+
+
+class PrioritizedReplayBufferTest(unittest.TestCase):
+    def _buffer(self, rewards, **kwargs) -> PrioritizedReplayBuffer:
+        memory = ExperienceBuffer(capacity=len(rewards))
+        replay = PrioritizedReplayBuffer(memory, seed=0, **kwargs)
+        for i, reward in enumerate(rewards):
+            replay.add(memory.append(None, 0, 0, reward, float(i)))
+        return replay
+
+    def test_samples_follow_the_priorities(self):
+        rewards = [0.0, 1.0, 3.0, 0.0]
+        replay = self._buffer(rewards, alpha=1.0, epsilon=0.0)
+        counts = np.zeros(4)
+        for _ in range(200):
+            slots, _ = replay.sample(50)
+            counts += np.bincount(slots, minlength=4)
+        np.testing.assert_allclose(counts / counts.sum(), [0.0, 0.25, 0.75, 0.0], atol=0.01)
+
+    def test_importance_weights_correct_the_bias(self):
+        replay = self._buffer([1.0, 3.0], alpha=1.0, beta=0.5, epsilon=0.0)
+        slots, weights = replay.sample(64)
+        # P = 1/4 and 3/4; weights (2 P) ** -0.5 over their maximum.
+        expected = np.where(slots == 0, 1.0, np.sqrt(1.0 / 3.0))
+        np.testing.assert_allclose(weights, expected)
+
+    def test_updated_and_removed_slots(self):
+        replay = self._buffer([1.0, 1.0, 1.0], alpha=1.0, epsilon=0.0)
+        replay.update(np.array([0]), np.array([-5.0]))
+        self.assertEqual(replay.tree.get(np.array([0, 1])).tolist(), [5.0, 1.0])
+        replay.remove(np.array([0, 2]))
+        slots, _ = replay.sample(20)
+        self.assertEqual(set(slots.tolist()), {1})
+        replay.clear()
+        slots, weights = replay.sample(20)
+        self.assertEqual((slots.size, weights.size), (0, 0))
+
+    def test_overwritten_experiences_take_the_new_priority(self):
+        subconscious = Subconscious(capacity=4, prioritized=True)
+        for i in range(6):
+            perception = {"position": (float(i), 0.0), "sunlight": 1.0, "time": float(i)}
+            subconscious.record(perception, ["mi", "lon"], ["lon"], 1.0 if i == 1 else 0.0)
+        priorities = subconscious.priorities
+        # Slot 1 held the rewarded experience until time 5 overwrote it.
+        leaves = priorities.tree.get(np.arange(4))
+        self.assertEqual(np.unique(leaves).size, 1)
+        self.assertAlmostEqual(priorities.tree.total, 4 * priorities.priority(np.zeros(1))[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
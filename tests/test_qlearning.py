@@ -0,0 +1,87 @@
+"""Checks for tabular Q-learning."""
+
+import unittest
+
+import numpy as np
+
+from environment import Environment
+from mind import Superego
+from population import TAWA, AgentPopulation
+from qlearning import QTable
+
+
+class QTableTest(unittest.TestCase):
+    def test_states_bucket_position_and_sunlight(self):
+        q = QTable(bins=(4, 2, 2), high=(800.0, 600.0, 1.0))
+        self.assertEqual(q.states, 16)
+        states = q.states_of([0.0, 250.0, 799.0, -50.0, 9000.0], [0.0, 0.0, 400.0, 0.0, 0.0],
+                             [0.0, 0.9, 0.9, 0.0, 1.0])
+        self.assertEqual(states.tolist(), [0, 5, 15, 0, 13])
+        features = np.array([[250.0, 0.0, 0.9], [799.0, 400.0, 0.9]], dtype=np.float32)
+        self.assertEqual(q.state(features).tolist(), [5, 15])
+        with self.assertRaises(ValueError):
+            QTable(bins=(4, 0, 2))
+
+    def test_backups_follow_the_td_rule(self):
+        q = QTable(actions=2, alpha=0.5, gamma=0.9)
+        q.q[1] = [0.0, 2.0]
+        errors = q.update([0], [1], [1.0], [1])
+        self.assertAlmostEqual(errors[0], 1.0 + 0.9 * 2.0)
+        self.assertAlmostEqual(q.q[0, 1], 0.5 * 2.8)
+        # Terminal and weighted backups.
+        q.update([0], [0], [2.0], weights=np.array([0.5]))
+        self.assertAlmostEqual(q.q[0, 0], 0.5 * 0.5 * 2.0)
+        # Duplicate pairs sum increments computed from the old values.
+        q.update([2, 2], [0, 0], [1.0, 3.0])
+        self.assertAlmostEqual(q.q[2, 0], 0.5 * 1.0 + 0.5 * 3.0)
+
+    def test_policies(self):
+        q = QTable(actions=3, seed=0)
+        q.q[0] = [0.0, 1.0, 1.0]
+        self.assertEqual(q.greedy(np.array([0, 1])).tolist(), [1, 0])
+        self.assertEqual(q.softmax(np.array([0]), temperature=0.0).tolist(), [1])
+        p = q.probabilities(np.array([0]), temperature=1.0)[0]
+        np.testing.assert_allclose(p, np.exp([0.0, 1.0, 1.0]) / np.exp([0.0, 1.0, 1.0]).sum())
+        samples = q.softmax(np.zeros(20000, dtype=np.int64), temperature=1.0)
+        np.testing.assert_allclose(np.bincount(samples, minlength=3) / 20000, p, atol=0.02)
+
+    def test_learning_finds_the_rewarded_action(self):
+        # A one-state bandit where only action 2 pays.
+        q = QTable(actions=3, bins=(1, 1, 1), seed=0)
+        for _ in range(300):
+            actions = q.softmax(np.zeros(8, dtype=np.int64), temperature=0.5)
+            q.update(np.zeros(8, dtype=np.int64), actions, (actions == 2).astype(float))
+        self.assertEqual(q.greedy(np.array([0])).tolist(), [2])
+
+
+class QLearningAgentsTest(unittest.TestCase):
+    def test_superego_backs_up_on_the_next_choice(self):
+        q = QTable(actions=3, alpha=1.0, gamma=0.0)
+        superego = Superego(q=q)
+        perception = {"position": (10.0, 0.0), "sunlight": 1.0}
+        action = superego.choose(perception)
+        superego.update(["tawa"], 2.0)
+        self.assertFalse(q.q.any())
+        superego.choose(perception)
+        state = int(q.states_of(10.0, 0.0, 1.0))
+        self.assertEqual(q.q[state, action], 2.0)
+
+    def test_population_learns_from_a_shared_table(self):
+        env = Environment(800, 600)
+        q = QTable(actions=3, alpha=1.0, gamma=0.0)
+        population = AgentPopulation(env, np.full((50, 5), 0.5), q_table=q, seed=0)
+        population.sunlight = env.sunlight = 1.0
+        population.decide()
+        self.assertFalse(q.q.any())
+        first = population.actions.copy()
+        population.decide()
+        # Every agent's first transition was backed up.  They all share
+        # one state, so the tawa agents' rewards add up.
+        state = int(q.states_of(population.x[0], population.y[0], 1.0))
+        self.assertEqual(np.unique(q.states_of(population.x, population.y, 1.0)).tolist(), [state])
+        self.assertEqual(q.q[state, TAWA], np.count_nonzero(first == TAWA))
+        self.assertEqual(np.count_nonzero(q.q), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Checks for LSH similarity recall."""
+
+import unittest
+
+import numpy as np
+
+from mind import Subconscious
+from recall import RecallIndex
+
+
+def _clustered(n: int = 2000, d: int = 19, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(-50.0, 50.0, (40, d))
+    return (centres[rng.integers(0, 40, n)] + rng.normal(0.0, 2.0, (n, d))).astype(np.float32)
+
+
+class RecallIndexTest(unittest.TestCase):
+    def test_nearest_neighbours_are_found_from_few_candidates(self):
+        vectors = _clustered()
+        index = RecallIndex(vectors.shape[1], vectors.shape[0], seed=0)
+        for slot, v in enumerate(vectors):
+            index.insert(slot, v)
+        self.assertEqual(len(index), vectors.shape[0])
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.integers(0, len(vectors), 200)]
+        queries = queries + rng.normal(0.0, 0.5, queries.shape).astype(np.float32)
+        hits = candidates = 0
+        for q in queries:
+            slots, distances = index.query(q, vectors, 1)
+            exact = np.linalg.norm(vectors - q, axis=1)
+            hits += slots.size == 1 and slots[0] == np.argmin(exact)
+            candidates += index.candidates(q, 1).size
+        self.assertGreaterEqual(hits / len(queries), 0.9)
+        self.assertLess(candidates / len(queries), 50)
+
+    def test_results_are_ranked_by_exact_distance(self):
+        vectors = _clustered(500)
+        index = RecallIndex(vectors.shape[1], 500, seed=2)
+        for slot, v in enumerate(vectors):
+            index.insert(slot, v)
+        slots, distances = index.query(vectors[7], vectors, 5)
+        self.assertEqual(slots[0], 7)
+        self.assertEqual(distances[0], 0.0)
+        self.assertTrue((np.diff(distances) >= 0.0).all())
+        np.testing.assert_allclose(distances, np.linalg.norm(vectors[slots] - vectors[7], axis=1),
+                                   rtol=1e-6)
+
+    def test_slots_can_be_overwritten_and_removed(self):
+        index = RecallIndex(3, 4, seed=0)
+        vectors = np.array([[0, 0, 0], [100, 0, 0], [0, 100, 0], [0, 0, 100]], dtype=np.float32)
+        for slot, v in enumerate(vectors):
+            index.insert(slot, v)
+        self.assertEqual(index.query(vectors[1], vectors, 1)[0].tolist(), [1])
+        vectors[1] = [0, 0, 100]
+        index.insert(1, vectors[1])
+        self.assertEqual(len(index), 4)
+        self.assertNotIn(1, index.query(np.array([100, 0, 0], dtype=np.float32), vectors, 1)[0])
+        index.remove(3)
+        index.remove(3)
+        self.assertEqual(index.query(vectors[3], vectors, 1)[0].tolist(), [1])
+        index.clear()
+        self.assertEqual((len(index), index.query(vectors[0], vectors, 1)[0].size), (0, 0))
+        with self.assertRaises(ValueError):
+            RecallIndex(3, 4, width=0.0)
+
+
+class SubconsciousRecallTest(unittest.TestCase):
+    def test_recall_follows_the_ring_buffer(self):
+        subconscious = Subconscious(capacity=8)
+        for i in range(12):
+            perception = {"position": (10.0 * i, 0.0), "sunlight": 1.0, "time": float(i)}
+            subconscious.record(perception, ["mi", "tawa"], ["tawa"], 0.1 * i)
+        recalled = subconscious.recall({"position": (101.0, 0.0), "sunlight": 1.0}, k=1)
+        self.assertEqual(recalled["times"].tolist(), [10.0])
+        self.assertEqual(recalled["actions"].tolist(), [0])
+        self.assertAlmostEqual(recalled["distances"][0], 1.0)
+        # Overwritten experiences are no longer recalled.
+        recalled = subconscious.recall({"position": (30.0, 0.0), "sunlight": 1.0}, k=3)
+        self.assertTrue((recalled["times"] >= 4.0).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
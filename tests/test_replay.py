@@ -0,0 +1,80 @@
+"""Checks for offline replay training."""
+
+import time
+import unittest
+
+from mind import Subconscious, Superego
+from qlearning import QTable
+from replay import ReplayTrainer
+
+
+def _remember(subconscious: Subconscious, n: int) -> None:
+    # tawa at x = 100 earns 1.0, lon at x = 500 earns 0.5.
+    for i in range(n):
+        if i % 2:
+            perception, action, reward = {"position": (500.0, 0.0), "sunlight": 1.0}, "lon", 0.5
+        else:
+            perception, action, reward = {"position": (100.0, 0.0), "sunlight": 1.0}, "tawa", 1.0
+        perception["time"] = float(i)
+        subconscious.record(perception, ["mi", action], [action], reward)
+
+
+class ReplayTrainerTest(unittest.TestCase):
+    def test_norms_converge_to_mean_rewards(self):
+        subconscious = Subconscious(capacity=64)
+        _remember(subconscious, 40)
+        superego = Superego()
+        trainer = ReplayTrainer(subconscious, superego, batch_size=32, learning_rate=0.2, seed=0)
+        for _ in range(200):
+            self.assertEqual(trainer.train_batch(), 32)
+        norms = superego.get_norms()
+        self.assertAlmostEqual(norms["tawa"], 1.0, places=3)
+        self.assertAlmostEqual(norms["lon"], 0.5, places=3)
+        self.assertNotIn("moku", norms)
+        self.assertEqual(trainer.stats()["samples"], 200 * 32)
+
+    def test_q_values_converge_to_the_td_target(self):
+        subconscious = Subconscious(capacity=64)
+        _remember(subconscious, 41)
+        q = QTable(alpha=0.2, gamma=0.5)
+        trainer = ReplayTrainer(subconscious, Superego(q=q), batch_size=32, seed=0)
+        for _ in range(300):
+            trainer.train_batch()
+        a = int(q.states_of(100.0, 0.0, 1.0))
+        b = int(q.states_of(500.0, 0.0, 1.0))
+        # Q(a, tawa) = 1 + 0.5 Q(b, lon) and Q(b, lon) = 0.5 + 0.5 Q(a, tawa).
+        self.assertAlmostEqual(q.q[a, 0], 5.0 / 3.0, places=2)
+        self.assertAlmostEqual(q.q[b, 1], 4.0 / 3.0, places=2)
+        self.assertEqual(q.q[a, 1:].tolist() + [q.q[b, 0], q.q[b, 2]], [0.0, 0.0, 0.0, 0.0])
+
+    def test_nothing_is_learned_without_experience(self):
+        subconscious = Subconscious()
+        self.assertEqual(ReplayTrainer(subconscious, Superego()).train_batch(), 0)
+        _remember(subconscious, 1)
+        # A lone experience has no successor to back up into a Q-table.
+        self.assertEqual(ReplayTrainer(subconscious, Superego(q=QTable())).train_batch(), 0)
+        with self.assertRaises(ValueError):
+            ReplayTrainer(subconscious, Superego(), batch_size=0)
+
+    def test_trainer_runs_on_a_thread(self):
+        subconscious = Subconscious(capacity=64)
+        _remember(subconscious, 20)
+        superego = Superego()
+        with ReplayTrainer(subconscious, superego, interval=0.0, report_interval=0.01) as trainer:
+            deadline = time.monotonic() + 5.0
+            while time.monotonic() < deadline and (trainer.batches < 10
+                                                   or not trainer.samples_per_second):
+                # The simulation keeps recording meanwhile.
+                _remember(subconscious, 2)
+                time.sleep(0.001)
+        stats = trainer.stats()
+        self.assertGreaterEqual(stats["batches"], 10)
+        self.assertGreater(stats["samples_per_second"], 0.0)
+        batches = trainer.batches
+        time.sleep(0.02)
+        self.assertEqual(trainer.batches, batches)
+        self.assertIn("tawa", superego.get_norms())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Checks for the time-step and decision schedulers."""
+
+import unittest
+
+import numpy as np
+
+from scheduler import DecisionScheduler, FixedStepScheduler
+
+
+class FixedStepSchedulerTest(unittest.TestCase):
+    def test_steps_add_up_to_elapsed_time(self):
+        scheduler = FixedStepScheduler(physics_hz=100.0, decision_hz=10.0)
+        total = (0, 0)
+        for frame_dt in [0.016, 0.017, 0.033, 0.001, 0.05] * 20:
+            steps = scheduler.advance(frame_dt)
+            total = (total[0] + steps[0], total[1] + steps[1])
+        # 2.34 s of frames: 234 physics steps and 23 decisions.
+        self.assertEqual(total, (scheduler.physics_steps, scheduler.decision_steps))
+        self.assertIn(scheduler.physics_steps, (233, 234))
+        self.assertEqual(scheduler.decision_steps, 23)
+        self.assertTrue(0.0 <= scheduler.alpha < 1.0)
+
+    def test_alpha_is_the_leftover_fraction_of_a_step(self):
+        scheduler = FixedStepScheduler(physics_hz=100.0, decision_hz=10.0)
+        self.assertEqual(scheduler.advance(0.025), (2, 0))
+        self.assertAlmostEqual(scheduler.alpha, 0.5)
+        self.assertAlmostEqual(scheduler.decision_alpha, 0.25)
+
+    def test_long_frames_are_truncated(self):
+        scheduler = FixedStepScheduler(physics_hz=100.0, max_frame_time=0.25)
+        physics, _ = scheduler.advance(5.0)
+        self.assertEqual(physics, 25)
+        self.assertEqual(scheduler.advance(-1.0), (0, 0))
+
+
+class DecisionSchedulerTest(unittest.TestCase):
+    def test_phases_spread_decisions_evenly(self):
+        scheduler = DecisionScheduler(100, interval=4)
+        counts = np.zeros(100, dtype=np.int64)
+        for _ in range(40):
+            due = scheduler.due()
+            self.assertEqual(scheduler.decisions_last_tick, 25)
+            counts += due
+        # Every agent decided once every four ticks.
+        self.assertTrue((counts == 10).all())
+        self.assertEqual(scheduler.decisions, 1000)
+
+    def test_promoted_agents_decide_every_fast_tick(self):
+        scheduler = DecisionScheduler(8, interval=4, fast_interval=1)
+        scheduler.promote([3])
+        # The promotion takes effect within one fast interval.
+        scheduler.due()
+        for _ in range(8):
+            self.assertTrue(scheduler.due()[3])
+        scheduler.promote([3], promoted=False)
+        scheduler.due()
+        seen = [bool(scheduler.due()[3]) for _ in range(8)]
+        self.assertEqual(sum(seen), 2)
+
+    def test_new_agents_join_the_emptiest_phase(self):
+        scheduler = DecisionScheduler(7, interval=4)
+        scheduler.due()
+        i = scheduler.add()
+        self.assertEqual((i, len(scheduler)), (7, 8))
+        per_tick = [scheduler.due().sum() for _ in range(4)]
+        self.assertEqual(per_tick, [2, 2, 2, 2])
+        scheduler.set_interval(i, 1)
+        scheduler.due()
+        self.assertTrue(all(scheduler.due()[i] for _ in range(3)))
+        with self.assertRaises(ValueError):
+            scheduler.set_interval(i, 0)
+        with self.assertRaises(ValueError):
+            DecisionScheduler(3, interval=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Checks for world snapshots, checkpoints and forks."""
+
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from agent import Agent
+from environment import Environment, WorldObject
+from grammar import TokiPonaGrammar
+from mind import Mind
+from personality import Personality
+from snapshot import capture, checkpoint, fork, load, restore, save
+
+
+def _world():
+    env = Environment(800, 600, seed=3)
+    rock = WorldObject(300, 250, movable=True)
+    env.objects.append(rock)
+    rock.apply_impulse(15, 5)
+    agent = Agent(env=env, mind=Mind(grammar=TokiPonaGrammar(),
+                                     personality=Personality(0.2, 0.4, 0.6, 0.8, 0.1)))
+    agent.x, agent.y = 120.0, 40.0
+    agent.mind.superego.rules = {"tawa": 1.5, "moku kili": 0.5}
+    agent.mind.emotion.mood = 0.3
+    for _ in range(10):
+        env.update_physics(0.05)
+    return env, [agent]
+
+
+class SnapshotTest(unittest.TestCase):
+    def _assert_same_world(self, a, b):
+        for name, col in a.objects.columns().items():
+            np.testing.assert_array_equal(col, b.objects.columns()[name], err_msg=name)
+        self.assertEqual(a.time, b.time)
+        self.assertEqual(sorted(a.chunks.loaded), sorted(b.chunks.loaded))
+
+    def test_save_and_load_round_trip(self):
+        env, agents = _world()
+        random.seed(5)
+        expected = random.random()
+        random.seed(5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "world.snap")
+            checkpoint(path, env, agents)
+            for mmap in (True, False):
+                with self.subTest(mmap=mmap):
+                    random.seed(0)
+                    restored, [agent] = restore(load(path, mmap=mmap))
+                    self._assert_same_world(env, restored)
+                    self.assertEqual((agent.x, agent.y), (120.0, 40.0))
+                    self.assertEqual(agent.mind.emotion.mood, 0.3)
+                    self.assertEqual(agent.mind.superego.rules, agents[0].mind.superego.rules)
+                    self.assertEqual(agent.mind.ego.personality.agreeableness, 0.8)
+                    self.assertEqual(random.random(), expected)
+            # The restored world keeps running without touching the file.
+            restored.update_physics(0.05)
+            env.update_physics(0.05)
+            self._assert_same_world(env, restored)
+
+    def test_bad_files_are_rejected(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "junk.snap")
+            with open(path, "wb") as f:
+                f.write(b"not a snapshot")
+            with self.assertRaises(ValueError):
+                load(path)
+            env, agents = _world()
+            save(capture(env, agents), path)
+            with self.assertRaises(ValueError):
+                restore(load(path), agents=[])
+
+    def test_fork_evolves_independently(self):
+        env, agents = _world()
+        state = random.getstate()
+        clone, [twin] = fork(env, agents)
+        self.assertEqual(random.getstate(), state)
+        self._assert_same_world(env, clone)
+        # Stepped alike, the fork and the original stay identical.
+        for _ in range(20):
+            env.update_physics(0.05)
+            clone.update_physics(0.05)
+        self._assert_same_world(env, clone)
+        # Changes to the fork do not reach the original.
+        clone.objects.extract(np.arange(clone.objects.count))
+        twin.x = 500.0
+        twin.mind.superego.rules = {}
+        self.assertGreater(env.objects.count, 0)
+        self.assertEqual(agents[0].x, 120.0)
+        self.assertEqual(agents[0].mind.superego.rules["tawa"], 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
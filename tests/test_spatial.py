@@ -0,0 +1,46 @@
+"""Checks for the spatial hash index."""
+
+import unittest
+
+import numpy as np
+
+from spatial import SpatialHash
+
+
+class SpatialHashTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.xs = rng.uniform(-500.0, 500.0, 400)
+        self.ys = rng.uniform(-500.0, 500.0, 400)
+        self.index = SpatialHash(cell_size=32.0)
+        self.index.update(self.xs, self.ys)
+
+    def _brute_radius(self, x, y, r):
+        d2 = (self.xs - x) ** 2 + (self.ys - y) ** 2
+        return np.nonzero(d2 <= r * r)[0]
+
+    def test_radius_queries_match_brute_force(self):
+        for x, y, r in [(0.0, 0.0, 50.0), (-480.0, 300.0, 120.0), (10.0, -20.0, 0.0), (900.0, 0.0, 30.0)]:
+            found = self.index.query_radius(x, y, r, self.xs, self.ys)
+            self.assertEqual(sorted(found.tolist()), self._brute_radius(x, y, r).tolist())
+
+    def test_nearest_matches_brute_force(self):
+        for x, y in [(0.0, 0.0), (400.0, -400.0), (2000.0, 2000.0)]:
+            found = self.index.nearest(x, y, 5, self.xs, self.ys)
+            d2 = (self.xs - x) ** 2 + (self.ys - y) ** 2
+            np.testing.assert_allclose(d2[found], np.sort(d2)[:5])
+
+    def test_incremental_update_moves_only_changed_rows(self):
+        self.xs[:10] += 200.0
+        moved = self.index.update(self.xs, self.ys)
+        self.assertLessEqual(moved, 10)
+        found = self.index.query_radius(0.0, 0.0, 300.0, self.xs, self.ys)
+        self.assertEqual(sorted(found.tolist()), self._brute_radius(0.0, 0.0, 300.0).tolist())
+        # A new row layout forces a rebuild.
+        self.assertEqual(self.index.update(self.xs[:100], self.ys[:100], version=1), 100)
+        found = self.index.query_radius(0.0, 0.0, 300.0, self.xs[:100], self.ys[:100])
+        self.assertTrue((found < 100).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Checks for the ray-cast vision sensor."""
+
+import math
+import unittest
+
+import numpy as np
+
+from environment import Environment
+from vision import VisionSensor
+
+
+def _world(xs, ys) -> Environment:
+    env = Environment(800, 600)
+    env.objects.extract(np.arange(env.objects.count))
+    env.objects.extend({"x": np.array(xs, dtype=float), "y": np.array(ys, dtype=float),
+                        "movable": np.zeros(len(xs), dtype=bool)})
+    return env
+
+
+class VisionSensorTest(unittest.TestCase):
+    def test_only_objects_in_the_cone_and_range_are_seen(self):
+        # Ahead, behind, above and too far away.
+        env = _world([100.0, -100.0, 0.0, 400.0], [50.0, 50.0, 150.0, 50.0])
+        sensor = VisionSensor(fov=math.radians(60.0), range=200.0, rays=31)
+        rows, distances = sensor.see(env, 0.0, 50.0, facing=0.0)
+        self.assertEqual(rows.tolist(), [0])
+        self.assertAlmostEqual(distances[0], 90.0)
+        rows, _ = sensor.see(env, 0.0, 50.0, facing=math.pi)
+        self.assertEqual(rows.tolist(), [1])
+        rows, _ = sensor.see(env, 0.0, 50.0, facing=math.pi / 2.0)
+        self.assertEqual(rows.tolist(), [2])
+        self.assertGreater(sensor.cells_visited, 0)
+
+    def test_near_objects_hide_those_behind_them(self):
+        env = _world([60.0, 120.0, 180.0, 150.0], [50.0, 50.0, 50.0, 100.0])
+        sensor = VisionSensor(fov=math.radians(90.0), range=300.0, rays=61)
+        rows, distances = sensor.see(env, 0.0, 50.0)
+        # 1 and 2 are behind 0; 3 sits above the line of sight.
+        self.assertEqual(rows.tolist(), [0, 3])
+        self.assertTrue((np.diff(distances) >= 0.0).all())
+
+    def test_the_ground_blocks_rays(self):
+        env = _world([100.0], [-50.0])
+        sensor = VisionSensor(fov=math.radians(10.0), range=300.0, rays=5)
+        rows, _ = sensor.see(env, 0.0, 10.0, facing=-math.atan2(60.0, 100.0))
+        self.assertEqual(rows.tolist(), [])
+
+    def test_matches_brute_force_ray_casting(self):
+        rng = np.random.default_rng(0)
+        env = _world(rng.uniform(-300.0, 300.0, 150), rng.uniform(0.0, 300.0, 150))
+        sensor = VisionSensor(rays=24)
+        x, y = 0.0, 150.0
+        ox, oy, r = env.objects.x - x, env.objects.y - y, env.objects.radius
+        for facing in (0.0, 1.0, 2.5, -2.0):
+            expected = {}
+            for dx, dy in sensor.directions(facing):
+                b = ox * dx + oy * dy
+                c = ox * ox + oy * oy - r * r
+                disc = b * b - c
+                with np.errstate(invalid="ignore"):
+                    t = np.where(c <= 0.0, 0.0, b - np.sqrt(disc))
+                limit = min(sensor.range, y / -dy) if dy < 0 else sensor.range
+                t = np.where((disc >= 0.0) & (t >= 0.0) & (t <= limit), t, np.inf)
+                k = int(np.argmin(t))
+                if np.isfinite(t[k]):
+                    expected[k] = min(expected.get(k, np.inf), t[k])
+            rows, distances = sensor.see(env, x, y, facing)
+            self.assertEqual(dict(zip(rows.tolist(), distances.tolist())), expected)
+
+    def test_invalid_parameters_are_rejected(self):
+        for kwargs in ({"fov": 0.0}, {"range": 0.0}, {"rays": 0}):
+            with self.assertRaises(ValueError):
+                VisionSensor(**kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()